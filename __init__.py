@@ -3,12 +3,13 @@ from .rsi import RSI
 from .stoch_rsi import StochRSI
 from .macd import MACD
 from .momentum import Momentum
-from .ichimoku import Ichimoku
 from .pivot_points import PivotPoints
 from .fibonacci_pivot_points import FibonacciPivotPoints
 from .volatility import Volatility
 from .atr import ATR
 from .atr_trailing_stop import ATRTrailingStop
+from .bollinger_bands import BollingerBands
+from .obv import OBV
 from .base import Indicator  # Import Indicator from base.py
 
 __all__ = [
@@ -18,11 +19,11 @@ __all__ = [
     "StochRSI",
     "MACD",
     "Momentum",
-    "Ichimoku",
     "PivotPoints",
     "FibonacciPivotPoints",
     "Volatility",
     "BollingerBands",
     "ATR",
-    "ATRTrailingStop"
+    "ATRTrailingStop",
+    "OBV"
 ]
@@ -5,6 +5,8 @@ from typing import Dict,Tuple,List,Union
 from colorama import init,Fore,Style
 from zoneinfo import ZoneInfo
 from decimal import Decimal,getcontext
+from psar import parabolic_sar
+from ratelimit import get_limiter
 getcontext().prec=10;init(autoreset=True);load_dotenv()
 AK=os.getenv("BYBIT_API_KEY");AS=os.getenv("BYBIT_API_SECRET")
 if not AK or not AS:raise ValueError("BYBIT_API_KEY/SECRET missing")
@@ -32,12 +34,15 @@ def sjr(r:requests.Response,l=None)->Union[dict,None]:
     try:return r.json()
     except ValueError:l.error(NR+f"JSON error: {r.text}{RST}")if l else None;return None
 def br(m:str,e:str,p:dict=None,l=None)->Union[dict,None]:
+    rl=get_limiter()
     for retry in range(MAR):
         try:
-            p=p or {};ts=str(int(datetime.now(TZ).timestamp()*1000));ps="&".join(f"{k}={v}"for k,v in sorted(p.items()))
+            rl.acquire(e);p=p or {};ts=str(int(datetime.now(TZ).timestamp()*1000));ps="&".join(f"{k}={v}"for k,v in sorted(p.items()))
             h={"X-BAPI-API-KEY":AK,"X-BAPI-TIMESTAMP":ts,"X-BAPI-SIGN":gs(p)};url=f"{BU}{e}";r=requests.request(m,url,headers=h,params=p if m=="GET"else None,json=p if m=="POST"else None)
-            if r.status_code==200:return sjr(r,l)
-            elif r.status_code in REC:l.warning(f"{NY}Rate limit. Retry {retry+1}/{MAR} in {RDS}s...{RST}")if l else None;time.sleep(RDS*(2**retry));continue
+            j=sjr(r,l)if r.status_code==200 else None
+            if rl.observe(e,r.headers,r.status_code,j.get("retCode")if j else None):l.warning(f"{NY}Rate limit. Retry {retry+1}/{MAR} after reset...{RST}")if l else None;continue
+            if r.status_code==200:return j
+            elif r.status_code in REC:l.warning(f"{NY}Server err. Retry {retry+1}/{MAR} in {RDS*(2**retry)}s...{RST}")if l else None;time.sleep(RDS*(2**retry));continue
             else:l.error(f"{NR}Bybit API err: {r.status_code} - {r.text}{RST}")if l else None;return None
         except requests.exceptions.RequestException as exp:l.error(f"{NR}API req fail: {exp}{RST}")if l else None;time.sleep(RDS*(2**retry))
     l.error(f"{NR}Max retries for {e}{RST}")if l else None;return None
@@ -48,30 +53,35 @@ def fk(s:str,i:str,limit:int=200,l=None)->pd.DataFrame:
             d=r["result"]["list"];cols=["start_time","open","high","low","close","volume"]
             if d and len(d[0])>6 and d[0][6]:cols.append("turnover")
             df=pd.DataFrame(d,columns=cols);df["start_time"]=pd.to_datetime(df["start_time"],unit="ms",errors="coerce")
+            for col in ["open","high","low","close","volume","turnover"]:
+                if col not in df.columns:df[col]=0
             for col in ["open","high","low","close","volume","turnover"]:df[col]=pd.to_numeric(df[col],errors="coerce").fillna(0)
-            for col in ["open","high","low","close","volume","turnover"]:if col not in df.columns:df[col]=0
             if not {"close","high","low","volume"}.issubset(df.columns):l.error(f"{NR}Kline missing cols.{RST}")if l else None;return pd.DataFrame()
             return df.astype({col:float for col in cols if col!="start_time"})
         l.error(f"{NR}Kline fetch fail: {r}{RST}")if l else None;return pd.DataFrame()
     except Exception as e:l.exception(f"{NR}Kline error: {e}{RST}")if l else None;return pd.DataFrame()
 class TA:
     def __init__(self,df:pd.DataFrame,logger:logging.Logger,config:dict,sym:str,inter:str):self.df,self.log,self.lvls,self.fibs,self.cfg,self.sig,self.w_sets,self.u_weights,self.sym,self.inter=df,logger,{},{},config,None,config["weight_sets"],config["weight_sets"]["low_volatility"],sym,inter
-    def sma(self,w:int)->pd.Series:try:return self.df["close"].rolling(window=w).mean()
-    except KeyError:self.log.error(NR+"Missing 'close' for SMA."+RST)if self.log else None;return pd.Series(dtype="float64")
-    def mom(self,p:int=10)->pd.Series:try:return((self.df["close"]-self.df["close"].shift(p))/self.df["close"].shift(p))*100
-    except Exception as e:self.log.error(NR+f"Mom err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
+    def sma(self,w:int)->pd.Series:
+        try:return self.df["close"].rolling(window=w).mean()
+        except KeyError:self.log.error(NR+"Missing 'close' for SMA."+RST)if self.log else None;return pd.Series(dtype="float64")
+    def mom(self,p:int=10)->pd.Series:
+        try:return((self.df["close"]-self.df["close"].shift(p))/self.df["close"].shift(p))*100
+        except Exception as e:self.log.error(NR+f"Mom err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
     def fib_ret(self,h:float,l:float,cp:float)->Dict[str,float]:
         diff = h - l
         if diff == 0:return {}
         fib_levels={"Fib 23.6%":h-diff*0.236,"Fib 38.2%":h-diff*0.382,"Fib 50.0%":h-diff*0.5,"Fib 61.8%":h-diff*0.618,"Fib 78.6%":h-diff*0.786,"Fib 88.6%":h-diff*0.886,"Fib 94.1%":h-diff*0.941}
         self.lvls={"Sup":{},"Res":{}};[self.lvls["Sup"].__setitem__(label,value) if value<cp else self.lvls["Res"].__setitem__(label,value) for label,value in fib_levels.items()];self.fibs=fib_levels;return self.fibs
-    def pivot_points(self,h:float,l:float,c:float):try:p,r1,s1,r2,s2,r3,s3=(h+l+c)/3,(2*p)-l,(2*p)-h,p+(h-l),p-(h-l),h+2*(p-l),l-2*(h-p);self.lvls.update({"pivot":p,"r1":r1,"s1":s1,"r2":r2,"s2":s2,"r3":r3,"s3":s3})
-    except Exception as e:self.log.error(NR+f"Pivot err: {e}"+RST)if self.log else None;self.lvls={}
+    def pivot_points(self,h:float,l:float,c:float):
+        try:p=(h+l+c)/3;r1,s1,r2,s2,r3,s3=(2*p)-l,(2*p)-h,p+(h-l),p-(h-l),h+2*(p-l),l-2*(h-p);self.lvls.update({"pivot":p,"r1":r1,"s1":s1,"r2":r2,"s2":s2,"r3":r3,"s3":s3})
+        except Exception as e:self.log.error(NR+f"Pivot err: {e}"+RST)if self.log else None;self.lvls={}
     def near_lvls(self,cp:float,nl:int=5)->Tuple[List[Tuple[str,float]],List[Tuple[str,float]]]:
         slvls,rlvls=[],[];plvl=lambda label,value:(slvls.append((label,value)) if value<cp else rlvls.append((label,value)))
         [ [plvl(f"{label} ({slabel})",svalue) for slabel,svalue in value.items()if isinstance(svalue,(float,Decimal))]if isinstance(value,dict) else plvl(label,value) for label,value in self.lvls.items()];return sorted(slvls,key=lambda x:abs(x[1]-cp),reverse=True)[-nl:],sorted(rlvls,key=lambda x:abs(x[1]-cp))[:nl]
-    def atr(self,w:int=20)->pd.Series:try:tr=pd.concat([self.df["high"]-self.df["low"],abs(self.df["high"]-self.df["close"].shift()),abs(self.df["low"]-self.df["close"].shift())],axis=1).max(axis=1);return tr.rolling(window=w).mean()
-    except KeyError as e:self.log.error(NR+f"ATR err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
+    def atr(self,w:int=20)->pd.Series:
+        try:tr=pd.concat([self.df["high"]-self.df["low"],abs(self.df["high"]-self.df["close"].shift()),abs(self.df["low"]-self.df["close"].shift())],axis=1).max(axis=1);return tr.rolling(window=w).mean()
+        except KeyError as e:self.log.error(NR+f"ATR err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
     def rsi(self,w:int=14)->pd.Series:
         try:delta=self.df["close"].diff();gain=(delta.where(delta>0,0)).rolling(window=w).mean();loss=(-delta.where(delta<0,0)).rolling(window=w).mean();rs=gain/loss;return 100-(100/(1+rs))
         except Exception as e:self.log.error(NR+f"RSI err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
@@ -79,16 +89,17 @@ class TA:
         try:rsi=self.rsi(window=rsiw);srsi=(rsi-rsi.rolling(stochw).min())/(rsi.rolling(stochw).max()-rsi.rolling(stochw).min());k=srsi.rolling(window=kw).mean();d=k.rolling(window=dw).mean();return pd.DataFrame({"stoch_rsi":srsi,"k":k,"d":d})
         except Exception as e:self.log.error(NR+f"Stoch RSI err: {e}"+RST)if self.log else None;return pd.DataFrame()
     def mom_ma(self)->None:
-        try:p,sma,lma,vma=self.cfg["momentum_period"],self.cfg["momentum_ma_short"],self.cfg["momentum_ma_long"],self.cfg["volume_ma_period"];self.df["momentum"],self.df["momentum_ma_short"],self.df["momentum_ma_long"],self.df["volume_ma"]=self.df["close"].diff(p),self.df["momentum"].rolling(window=sma).mean(),self.df["momentum"].rolling(window=lma).mean(),self.df["volume"].rolling(window=vma).mean()
+        try:p,sma,lma,vma=self.cfg["momentum_period"],self.cfg["momentum_ma_short"],self.cfg["momentum_ma_long"],self.cfg["volume_ma_period"];self.df["momentum"]=self.df["close"].diff(p);self.df["momentum_ma_short"],self.df["momentum_ma_long"],self.df["volume_ma"]=self.df["momentum"].rolling(window=sma).mean(),self.df["momentum"].rolling(window=lma).mean(),self.df["volume"].rolling(window=vma).mean()
         except KeyError as e:self.log.error(NR+f"Mom/MA err: {e}"+RST)if self.log else None
     def macd(self)->pd.DataFrame:
-        try:c=self.df["close"];ms,ml=c.ewm(span=12,adjust=False).mean(),c.ewm(span=26,adjust=False).mean();macd,sig,hist=ms-ml,macd.ewm(span=9,adjust=False).mean(),macd-sig;return pd.DataFrame({"macd":macd,"signal":sig,"histogram":hist})
+        try:c=self.df["close"];ms,ml=c.ewm(span=12,adjust=False).mean(),c.ewm(span=26,adjust=False).mean();macd=ms-ml;sig=macd.ewm(span=9,adjust=False).mean();hist=macd-sig;return pd.DataFrame({"macd":macd,"signal":sig,"histogram":hist})
         except KeyError:self.log.error(NR+"Missing 'close' for MACD."+RST)if self.log else None;return pd.DataFrame()
     def det_macd_div(self)->str|None:
         if self.df.empty or len(self.df)<30:return None
         mdf=self.macd();return None if mdf.empty else ("bullish" if self.df["close"].iloc[-2]>self.df["close"].iloc[-1] and mdf["histogram"].iloc[-2]<mdf["histogram"].iloc[-1] else "bearish" if self.df["close"].iloc[-2]<self.df["close"].iloc[-1] and mdf["histogram"].iloc[-2]>mdf["histogram"].iloc[-1] else None)
-    def ema(self,w:int)->pd.Series:try:return self.df["close"].ewm(span=w,adjust=False).mean()
-    except KeyError:self.log.error(NR+"Missing 'close' for EMA."+RST)if self.log else None;return pd.Series(dtype="float64")
+    def ema(self,w:int)->pd.Series:
+        try:return self.df["close"].ewm(span=w,adjust=False).mean()
+        except KeyError:self.log.error(NR+"Missing 'close' for EMA."+RST)if self.log else None;return pd.Series(dtype="float64")
     def trend_mom(self)->dict:
         if self.df.empty or len(self.df)<26:return{"trend":"None","strength":0}
         atr=self.atr();trend="Sideways"
@@ -101,26 +112,25 @@ class TA:
             df["TR"]=df["TR"].rolling(w).sum();df["+DM"]=df["+DM"].rolling(w).sum();df["-DM"]=df["-DM"].rolling(w).sum();df["+DI"]=100*(df["+DM"]/df["TR"]);df["-DI"]=100*(df["-DM"]/df["TR"]);df["DX"]=100*(abs(df["+DI"]-df["-DI"])/(df["+DI"]+df["-DI"]))
             return df["DX"].rolling(w).mean().iloc[-1]
         except Exception as e:self.log.error(NR+f"ADX err: {e}"+RST)if self.log else None;return 0.0
-    def obv(self)->pd.Series:try:obv=np.where(self.df['close']>self.df['close'].shift(1),self.df['volume'],np.where(self.df['close']<self.df['close'].shift(1),-self.df['volume'],0));return pd.Series(np.cumsum(obv),index=self.df.index)
-    except KeyError as e:self.log.error(NR+f"OBV err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
-    def adi(self)->pd.Series:try:mfm=((self.df['close']-self.df['low'])-(self.df['high']-self.df['close']))/(self.df['high']-self.df['low']);mfv=mfm*self.df['volume'];return mfv.cumsum()
-    except Exception as e:self.log.error(NR+f"ADI err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
+    def obv(self)->pd.Series:
+        try:obv=np.where(self.df['close']>self.df['close'].shift(1),self.df['volume'],np.where(self.df['close']<self.df['close'].shift(1),-self.df['volume'],0));return pd.Series(np.cumsum(obv),index=self.df.index)
+        except KeyError as e:self.log.error(NR+f"OBV err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
+    def adi(self)->pd.Series:
+        try:mfm=((self.df['close']-self.df['low'])-(self.df['high']-self.df['close']))/(self.df['high']-self.df['low']);mfv=mfm*self.df['volume'];return mfv.cumsum()
+        except Exception as e:self.log.error(NR+f"ADI err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
     def cci(self,w:int=20)->pd.Series:
         try:tp=(self.df["high"]+self.df["low"]+self.df["close"])/3;sma=tp.rolling(window=w).mean();mad=tp.rolling(window=w).apply(lambda x:np.abs(x-x.mean()).mean(),raw=True);return (tp-sma)/(0.015*mad)
         except Exception as e:self.log.error(NR+f"CCI err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
     def mfi(self,w:int=14)->pd.Series:
         try:tp=(self.df["high"]+self.df["low"]+self.df["close"])/3;rmf=tp*self.df["volume"];mfr=pd.Series(np.where(tp>tp.shift(),rmf,0)).rolling(w).sum()/(pd.Series(np.where(tp<tp.shift(),rmf,0)).rolling(w).sum()+1e-9);return 100-(100/(1+mfr))
         except Exception as e:self.log.error(NR+f"MFI err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
-    def wr(self,w:int=14)->pd.Series:try:hh=self.df["high"].rolling(window=w).max();ll=self.df["low"].rolling(window=w).min();return -100*(hh-self.df["close"])/(hh-ll)
-    except Exception as e:self.log.error(NR+f"WR% err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
-    def psar(self,a=0.02,ma=0.2)->pd.Series:
-        psar=pd.Series(index=self.df.index,dtype='float64');psar.iloc[0]=self.df["low"].iloc[0];trend,ep,af=1,self.df['high'].iloc[0],a
-        for i in range(1,len(self.df)):
-            if trend==1:psar.iloc[i]=psar.iloc[i-1]+af*(ep-psar.iloc[i-1]);if self.df["low"].iloc[i]<psar.iloc[i]:trend,psar.iloc[i],ep,af=-1,ep,self.df["low"].iloc[i],a;elif self.df["high"].iloc[i]>ep:ep,af=self.df["high"].iloc[i],min(af+a,ma)
-            elif trend==-1:psar.iloc[i]=psar.iloc[i-1]+af*(ep-psar.iloc[i-1]);if self.df["high"].iloc[i]>psar.iloc[i]:trend,psar.iloc[i],ep,af=1,ep,self.df["high"].iloc[i],a;elif self.df["low"].iloc[i]<ep:ep,af=self.df["low"].iloc[i],min(af+a,ma)
-        return psar
-    def fve(self)->pd.Series:try:force=self.df["close"].diff()*self.df["volume"];return force.cumsum()
-    except KeyError as e:self.log.error(NR+f"FVE err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
+    def wr(self,w:int=14)->pd.Series:
+        try:hh=self.df["high"].rolling(window=w).max();ll=self.df["low"].rolling(window=w).min();return -100*(hh-self.df["close"])/(hh-ll)
+        except Exception as e:self.log.error(NR+f"WR% err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
+    def psar(self,a=0.02,ma=0.2)->pd.Series:return pd.Series(parabolic_sar(self.df["high"],self.df["low"],a,ma),index=self.df.index)
+    def fve(self)->pd.Series:
+        try:force=self.df["close"].diff()*self.df["volume"];return force.cumsum()
+        except KeyError as e:self.log.error(NR+f"FVE err: {e}"+RST)if self.log else None;return pd.Series(dtype="float64")
     def next_lvl_pred(self,cp:float,ns:List[Tuple[str,float]],nr:List[Tuple[str,float]])->str:
         if not ns or not nr:return"No clear prediction"
         cs,cr=min(ns,key=lambda x:abs(x[1]-cp)),min(nr,key=lambda x:abs(x[1]-cp));return f"Support at {cs[0]}: {cs[1]:.2f}"if abs(cs[1]-cp)<abs(cr[1]-cp)else f"Resistance at {cr[0]}: {cr[1]:.2f}"
@@ -1,11 +1,13 @@
 # indicators/atr.py
 
+import math
 import pandas as pd
 import numpy as np
 from typing import Dict, Any
-from .base import Indicator
+from .base import Indicator, RollingWindow, bar_value
+from .batch import batch_field, rolling_mean, true_range
 
-class ATR:
+class ATR(Indicator):
     def __init__(self, config: Dict[str, Any]) -> None:
         """
         Initializes the ATR indicator.
@@ -15,6 +17,7 @@ class ATR:
         """
         self.config = config
         self.length = self.config.get("length", 14)
+        self.reset()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -31,4 +34,30 @@ class ATR:
         atr = tr.rolling(window=self.length).mean()
 
         df[f'atr_{self.length}'] = atr
-        return df
\ No newline at end of file
+        return df
+
+    def calculate_batch(self, data) -> dict:
+        """calculate() for (bars x symbols) 'high'/'low'/'close' arrays; returns {'atr_<length>': array}."""
+        tr = true_range(batch_field(data, "high"), batch_field(data, "low"), batch_field(data, "close"))
+        return {f'atr_{self.length}': rolling_mean(tr, self.length)}
+
+    def update(self, bar) -> float:
+        """
+        Feeds one bar ('high', 'low', 'close') and returns the latest ATR (NaN until `length` bars).
+        """
+        high, low, close = bar_value(bar, "high"), bar_value(bar, "low"), bar_value(bar, "close")
+        tr = high - low
+        if self._prev_close is not None:
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        self._trs.push(tr)
+        self._current = self._trs.mean()
+        return self._current
+
+    def current(self) -> float:
+        return self._current
+
+    def reset(self) -> None:
+        self._prev_close = None
+        self._trs = RollingWindow(self.length)
+        self._current = math.nan
@@ -1,10 +1,75 @@
 # indicators/atr_trailing_stop.py
 # Pyrrrmethus, the Python Coding Wizard and Bybit v5 API Sage! - ATR Trailing Stop Indicator - Forging the Dynamic Shield of Profit!
 
+import math
 import pandas as pd
 import numpy as np
+from collections import deque
 from typing import Dict, Any
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+
+def _trailing_stop_loop(high, low, close, length, multiplier):
+    """ATRTrailingStop._step over whole arrays, with the same float operations in the same order."""
+    n = close.shape[0]
+    stops = np.empty(n, dtype=np.float64)
+    window = np.empty(max(length, 1), dtype=np.float64) # Ring of the last `length` True Ranges
+    tr_sum = 0.0
+    nan_trs = 0
+    stop = np.nan
+    for i in range(n):
+        if i == 0 or np.isnan(close[i - 1]):
+            tr = high[i] - low[i]
+        else:
+            # Same pick as Python's max(): a later value wins only when strictly greater
+            tr = high[i] - low[i]
+            up = abs(high[i] - close[i - 1])
+            if up > tr:
+                tr = up
+            down = abs(low[i] - close[i - 1])
+            if down > tr:
+                tr = down
+
+        slot = i % length
+        if i >= length:
+            old = window[slot]
+            if np.isnan(old):
+                nan_trs -= 1
+            else:
+                tr_sum -= old
+        window[slot] = tr
+        if np.isnan(tr):
+            nan_trs += 1
+        else:
+            tr_sum += tr
+        if (i + 1) % length == 0:
+            tr_sum = 0.0
+            for k in range(length): # Window is oldest-first in slot order right after a full lap
+                if not np.isnan(window[k]):
+                    tr_sum += window[k]
+
+        if i + 1 < length or nan_trs:
+            stops[i] = stop
+            continue
+        atr = tr_sum / length
+        rising = i > 0 and close[i] > close[i - 1]
+        if np.isnan(stop):
+            stop = low[i] - (multiplier * atr) if rising else high[i] + (multiplier * atr)
+        elif rising:
+            stop = max(stop, low[i] - (multiplier * atr))
+        elif i > 0 and close[i] < close[i - 1]:
+            stop = min(stop, high[i] + (multiplier * atr))
+        stops[i] = stop
+    return stops
+
+
+_trailing_stop_compiled = njit(cache=True)(_trailing_stop_loop) if njit is not None else None
+
+
 class ATRTrailingStop:
     """
     Pyrrrmethus, the ATR Trailing Stop Forger! - Crafting the Dynamic Shield of Profit and Risk Management.
@@ -26,12 +91,17 @@ class ATRTrailingStop:
         """
         self.atr_length = config.get('atr_length', 14) # ATR Length - How far back we gaze into volatility's range (Default: 14)
         self.atr_multiplier = config.get('atr_multiplier', 3.0) # ATR Multiplier - How many multiples of ATR to set stop distance (Default: 3.0)
+        self.reset() # Streaming state for update()
 
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Pyrrrmethus, the Trailing Stop Artificer, invokes the Calculating Ritual to forge the ATR Trailing Stop values.
 
+        One array kernel (numba-compiled when numba is installed, else the same loop over NumPy arrays) computes
+        True Range, the rolling ATR and the trailing stop in a single pass. The stop state is rebuilt from the last
+        `atr_length` bars afterwards, so `update()` can extend the shield bar by bar.
+
         Args:
             df (pd.DataFrame): DataFrame containing OHLCV data - The raw materials for crafting the shield.
                 Must contain columns: 'high', 'low', 'close'.
@@ -43,64 +113,85 @@ class ATRTrailingStop:
             # Empty Dataframe? A silent shield in a silent market.
             return pd.DataFrame(columns=['atr_trailing_stop']) # Return empty DataFrame with the column
 
+        highs = np.ascontiguousarray(df['high'].to_numpy(dtype='float64'))
+        lows = np.ascontiguousarray(df['low'].to_numpy(dtype='float64'))
+        closes = np.ascontiguousarray(df['close'].to_numpy(dtype='float64'))
+        kernel = _trailing_stop_compiled if _trailing_stop_compiled is not None else _trailing_stop_loop
+        atr_trailing_stop = kernel(highs, lows, closes, int(self.atr_length), float(self.atr_multiplier))
 
-        # --- 1. Calculate True Range (TR) - Measuring the Volatility's Breath ---
-        high_low_range = df['high'] - df['low'] # Range within the current bar
-        high_prev_close_range = abs(df['high'] - df['close'].shift(1)) # Range from current high to previous close
-        low_prev_close_range = abs(df['low'] - df['close'].shift(1)) # Range from current low to previous close
-
-        true_range = pd.concat([high_low_range, high_prev_close_range, low_prev_close_range], axis=1).max(axis=1) # Max of the three ranges is the True Range
-
-        # --- 2. Calculate Average True Range (ATR) - Smoothing the Volatility's Fury ---
-        atr = true_range.rolling(window=self.atr_length, min_periods=self.atr_length).mean() # Simple Moving Average of True Range over the configured length
-
-
-        # --- 3. Initialize Trailing Stop Levels - Setting the Initial Shield Positions ---
-        atr_trailing_stop = pd.Series(index=df.index, dtype='float64') # Initialize Series to hold Trailing Stop values
-
-        # Determine initial direction based on the first data point (handle edge case of first ATR value being NaN)
-        first_atr = atr.iloc[self.atr_length-1] # Get the first calculated ATR value (after rolling window is full)
-        if not np.isnan(first_atr): # Proceed only if we have a valid first ATR value
-            initial_long_stop = df['low'].iloc[self.atr_length-1] - (self.atr_multiplier * first_atr) # Initial Long Stop below initial low
-            initial_short_stop = df['high'].iloc[self.atr_length-1] + (self.atr_multiplier * first_atr) # Initial Short Stop above initial high
-
-            atr_trailing_stop.iloc[self.atr_length-1] = initial_long_stop if df['close'].iloc[self.atr_length-1] > df['close'].iloc[self.atr_length-2] else initial_short_stop # Determine initial stop direction
+        # Streaming state: only the ATR window and the last close/stop matter for the next bar
+        self.reset()
+        start = max(0, len(closes) - self.atr_length - 1)
+        for high, low, close in zip(highs[start:].tolist(), lows[start:].tolist(), closes[start:].tolist(), strict=True):
+            self._step(high, low, close)
+        self._stop = float(atr_trailing_stop[-1])
 
-        # --- 4. Iterate and Calculate Trailing Stop - Dynamically Adjusting the Shield with Market Flow ---
-        for i in range(self.atr_length, len(df)): # Start from where ATR is first calculated and valid
-            current_atr = atr.iloc[i] # Current ATR value
-            if np.isnan(current_atr): # Skip if current ATR is NaN (shouldn't happen after initial ATR)
-                atr_trailing_stop.iloc[i] = atr_trailing_stop.iloc[i-1] # Carry forward previous valid trailing stop if ATR is unexpectedly NaN
-                continue # Skip to the next iteration
-
-            prev_atr_trailing_stop = atr_trailing_stop.iloc[i-1] # Previous Trailing Stop value
-            current_close = df['close'].iloc[i] # Current Close price
-            prev_close = df['close'].iloc[i-1] # Previous Close price
-            current_high = df['high'].iloc[i] # Current High price
-            current_low = df['low'].iloc[i] # Current Low price
-
-
-            if prev_atr_trailing_stop is None or np.isnan(prev_atr_trailing_stop): # Handle potential NaN at start (though unlikely now with initialization)
-                # Re-initialize if previous is NaN - Rare edge case handling for robustness
-                if not np.isnan(current_atr): # Only initialize if current ATR is valid
-                    if current_close > prev_close:
-                         atr_trailing_stop.iloc[i] = current_low - (self.atr_multiplier * current_atr) # Initialize long stop
-                    else:
-                        atr_trailing_stop.iloc[i] = current_high + (self.atr_multiplier * current_atr) # Initialize short stop
-                else: # If even current ATR is NaN, carry forward previous valid stop (if any) or leave as NaN
-                    atr_trailing_stop.iloc[i] = atr_trailing_stop.iloc[i-1] if i > self.atr_length else np.nan
-                continue # Proceed to next iteration after handling re-initialization
+        return pd.DataFrame({'atr_trailing_stop': atr_trailing_stop}, index=df.index)
 
+    def update(self, bar) -> float:
+        """
+        Extends the trailing stop by one closed bar without touching history.
 
-            if current_close > prev_close: # Uptrend - Shield moves below price
-                long_stop_level = max(prev_atr_trailing_stop, current_low - (self.atr_multiplier * current_atr)) # Raise stop if previous stop is higher, or set new stop below current low
-                atr_trailing_stop.iloc[i] = long_stop_level # Set the new Trailing Stop level for Uptrend
+        Args:
+            bar: Mapping (dict, pd.Series row, ...) with 'high', 'low' and 'close'.
 
-            elif current_close < prev_close: # Downtrend - Shield moves above price
-                short_stop_level = min(prev_atr_trailing_stop, current_high + (self.atr_multiplier * current_atr)) # Lower stop if previous stop is lower, or set new stop above current high
-                atr_trailing_stop.iloc[i] = short_stop_level # Set the new Trailing Stop level for Downtrend
+        Returns:
+            float: The trailing stop for this bar (NaN until `atr_length` bars have been seen).
+        """
+        return self._step(float(bar['high']), float(bar['low']), float(bar['close']))
+
+    def current(self) -> float:
+        """Returns the latest trailing stop level (NaN before warm-up)."""
+        return self._stop
+
+    def reset(self) -> None:
+        """Forgets all streaming state."""
+        self._trs = deque(maxlen=self.atr_length) # True Ranges inside the ATR window
+        self._tr_sum = 0.0
+        self._nan_trs = 0 # NaN True Ranges still inside the window
+        self._seen = 0 # Bars fed since the last reset
+        self._prev_close = None
+        self._stop = np.nan
+
+    def _step(self, high: float, low: float, close: float) -> float:
+        """Advances True Range, ATR and the trailing stop by one bar."""
+        # --- 1. True Range - Measuring the Volatility's Breath ---
+        if self._prev_close is None or math.isnan(self._prev_close):
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+
+        # --- 2. Rolling ATR - Running window sum, rebuilt once per lap to keep float drift in check ---
+        if len(self._trs) == self.atr_length:
+            old = self._trs[0]
+            if math.isnan(old):
+                self._nan_trs -= 1
             else:
-                atr_trailing_stop.iloc[i] = prev_atr_trailing_stop # If close unchanged, maintain previous stop level - Stability in stillness
-
-
-        return pd.DataFrame({'atr_trailing_stop': atr_trailing_stop})
+                self._tr_sum -= old
+        self._trs.append(tr)
+        if math.isnan(tr):
+            self._nan_trs += 1
+        else:
+            self._tr_sum += tr
+        self._seen += 1
+        if self._seen % self.atr_length == 0:
+            self._tr_sum = sum(t for t in self._trs if not math.isnan(t))
+
+        prev_close = self._prev_close
+        self._prev_close = close
+        if len(self._trs) < self.atr_length or self._nan_trs:
+            # ATR not ready (or unexpectedly NaN) - carry the previous shield forward
+            return self._stop
+        atr = self._tr_sum / self.atr_length
+
+        # --- 3. Trailing Stop - Dynamically Adjusting the Shield with Market Flow ---
+        prev_stop = self._stop
+        rising = prev_close is not None and close > prev_close
+        if math.isnan(prev_stop): # No shield yet (first valid ATR) - set the initial stop by direction
+            self._stop = low - (self.atr_multiplier * atr) if rising else high + (self.atr_multiplier * atr)
+        elif rising: # Uptrend - Shield moves below price
+            self._stop = max(prev_stop, low - (self.atr_multiplier * atr))
+        elif prev_close is not None and close < prev_close: # Downtrend - Shield moves above price
+            self._stop = min(prev_stop, high + (self.atr_multiplier * atr))
+        # If close unchanged, maintain previous stop level - Stability in stillness
+        return self._stop
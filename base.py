@@ -1,4 +1,6 @@
 # indicators/base.py
+import math
+from collections import deque
 from typing import Dict, Any
 
 class Indicator:
@@ -10,6 +12,175 @@ class Indicator:
         """Calculates the indicator on the provided data."""
         raise NotImplementedError("Subclasses must implement the calculate method")
 
+    def calculate_batch(self, data):
+        """
+        Calculates the indicator for many symbols in one vectorized call.
+
+        `data` is a mapping of 2-D (bars x symbols) arrays keyed like the
+        DataFrame columns calculate() reads, or a plain 2-D array for indicators
+        that only use the close (see batch.stack to build one from per-symbol
+        frames).  Returns a dict of 2-D arrays named like calculate()'s output
+        columns; column j holds what calculate() gives for symbol j alone, on
+        the same bars (NaN where calculate() would drop a row).
+        """
+        raise NotImplementedError("Subclasses must implement the calculate_batch method")
+
+    def update(self, bar):
+        """
+        Feeds one new closed bar and returns the latest value, same as current().
+
+        `bar` is a mapping (dict, pd.Series row, ...) with the OHLCV fields the
+        indicator needs, or a plain number for indicators that only use the close.
+        Streaming state is O(1) in the length of the history, and after n updates
+        current() equals the last row of calculate() on those n bars.
+        """
+        raise NotImplementedError("Subclasses must implement the update method")
+
+    def current(self):
+        """Returns the value produced by the most recent update()."""
+        raise NotImplementedError("Subclasses must implement the current method")
+
+    def reset(self) -> None:
+        """Forgets all streaming state."""
+        raise NotImplementedError("Subclasses must implement the reset method")
+
     def get_indicator_name(self) -> str:
         """Gets the name of the indicator."""
-        raise NotImplementedError("Subclasses must implement get_indicator_name method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement get_indicator_name method")
+
+
+def bar_value(bar, field: str) -> float:
+    """Reads `field` from a bar mapping (falling back to 'Field'); a plain number is taken as the close."""
+    if isinstance(bar, (int, float)):
+        return float(bar)
+    try:
+        return float(bar[field])
+    except KeyError:
+        return float(bar[field.capitalize()])
+
+
+def divide(numerator: float, denominator: float) -> float:
+    """Float division with pandas/NumPy semantics: x/0 is +-inf and 0/0 is NaN."""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+class StreamingEMA:
+    """EMA with the pandas ewm(adjust=False) recursion, seeded by the first non-NaN input."""
+
+    def __init__(self, span: int = None, alpha: float = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.value = math.nan
+
+    def update(self, x: float) -> float:
+        if not math.isnan(x):
+            if math.isnan(self.value):
+                self.value = x
+            else:
+                self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class RollingWindow:
+    """
+    Last `size` values with running mean and variance, matching pandas rolling().
+
+    NaN values occupy a slot but are left out of the statistics; like pandas,
+    results are NaN while fewer than `min_periods` non-NaN values are in the
+    window.  Mean and M2 are updated with Welford's add/remove formulas and are
+    rebuilt from the window once per lap so rounding error cannot accumulate.
+    Min and max come from monotonic deques of (push index, value), amortized
+    O(1) per push.
+    """
+
+    def __init__(self, size: int, min_periods: int = None):
+        self.size = size
+        self.min_periods = size if min_periods is None else min_periods
+        self.values = deque(maxlen=size)
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._pushes = 0
+        self._mins = deque()
+        self._maxes = deque()
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.size:
+            self._remove(self.values[0])
+        self.values.append(x)
+        self._add(x)
+        self._track_extremes(x)
+        self._pushes += 1
+        if self._pushes % self.size == 0:
+            self._resync()
+
+    def _add(self, x):
+        if math.isnan(x):
+            return
+        self._n += 1
+        delta = x - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (x - self._mean)
+
+    def _remove(self, x):
+        if math.isnan(x):
+            return
+        if self._n == 1:
+            self._n, self._mean, self._m2 = 0, 0.0, 0.0
+            return
+        old_mean = self._mean
+        self._mean = (self._n * old_mean - x) / (self._n - 1)
+        self._m2 -= (x - old_mean) * (x - self._mean)
+        self._n -= 1
+
+    def _track_extremes(self, x):
+        mins, maxes = self._mins, self._maxes
+        oldest = self._pushes - self.size  # Push index that just left the window
+        if mins and mins[0][0] <= oldest:
+            mins.popleft()
+        if maxes and maxes[0][0] <= oldest:
+            maxes.popleft()
+        if math.isnan(x):
+            return
+        while mins and mins[-1][1] >= x:
+            mins.pop()
+        mins.append((self._pushes, x))
+        while maxes and maxes[-1][1] <= x:
+            maxes.pop()
+        maxes.append((self._pushes, x))
+
+    def _resync(self):
+        valid = [x for x in self.values if not math.isnan(x)]
+        self._n = len(valid)
+        self._mean = math.fsum(valid) / self._n if valid else 0.0
+        self._m2 = math.fsum((x - self._mean) ** 2 for x in valid)
+
+    @property
+    def ready(self) -> bool:
+        return self._n >= self.min_periods and self._n > 0
+
+    def mean(self) -> float:
+        return self._mean if self.ready else math.nan
+
+    def var(self, ddof: int = 1) -> float:
+        if not self.ready or self._n <= ddof:
+            return math.nan
+        return max(self._m2, 0.0) / (self._n - ddof)
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.var(ddof))
+
+    def min(self) -> float:
+        return self._mins[0][1] if self.ready else math.nan
+
+    def max(self) -> float:
+        return self._maxes[0][1] if self.ready else math.nan
+
+    def clear(self) -> None:
+        self.values.clear()
+        self._mins.clear()
+        self._maxes.clear()
+        self._n, self._mean, self._m2, self._pushes = 0, 0.0, 0.0, 0
@@ -0,0 +1,275 @@
+# indicators/batch.py
+"""Column-wise kernels for 2-D (bars x symbols) arrays behind the indicators' calculate_batch()."""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+
+def as_panel(values) -> np.ndarray:
+    """float64 (bars x symbols) array; a 1-D input becomes a single column."""
+    values = np.asarray(values, dtype=np.float64)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def batch_field(data, field: str) -> np.ndarray:
+    """Reads `field` from a mapping of 2-D arrays (falling back to 'Field'); a bare array is taken as the close.
+
+    Raises ValueError when any other field is asked of a bare array, rather
+    than quietly using closes as highs and lows.
+    """
+    if isinstance(data, np.ndarray):
+        if field.lower() != "close":
+            raise ValueError(f"'{field}' needs a mapping of per-field arrays; a bare array only provides 'close'")
+        return as_panel(data)
+    try:
+        return as_panel(data[field])
+    except KeyError:
+        return as_panel(data[field.capitalize()])
+
+
+def stack(frames, field: str = "close", length: int = None) -> np.ndarray:
+    """Right-aligns one column of several per-symbol frames into a (bars x symbols) array.
+
+    Symbols with shorter histories are padded with leading NaN, which every
+    kernel here treats exactly like pandas treats a series that starts later.
+    """
+    columns = [np.asarray(frame[field], dtype=np.float64) for frame in frames]
+    if length is None:
+        length = max((len(col) for col in columns), default=0)
+    panel = np.full((length, len(columns)), np.nan)
+    for j, col in enumerate(columns):
+        col = col[-length:]
+        panel[length - len(col):, j] = col
+    return panel
+
+
+def _ewm_loop(values, alpha, min_periods):
+    """pandas ewm(adjust=False, ignore_na=False).mean() recursion, run down each column."""
+    n, m = values.shape
+    out = np.empty((n, m))
+    for j in range(m):
+        weighted = values[0, j]
+        nobs = 0 if np.isnan(weighted) else 1
+        old_wt = 1.0
+        out[0, j] = weighted if nobs >= min_periods else np.nan
+        for i in range(1, n):
+            cur = values[i, j]
+            is_obs = not np.isnan(cur)
+            nobs += is_obs
+            if not np.isnan(weighted):
+                old_wt *= 1.0 - alpha
+                if is_obs:
+                    if weighted != cur:
+                        weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                    old_wt = 1.0
+            elif is_obs:
+                weighted = cur
+            out[i, j] = weighted if nobs >= min_periods else np.nan
+    return out
+
+
+_ewm_compiled = njit(cache=True)(_ewm_loop) if njit is not None else None
+
+
+def _ewm_rows(values, alpha, min_periods):
+    """Same recursion as _ewm_loop, stepping over bars with every column updated at once."""
+    n, m = values.shape
+    out = np.empty((n, m))
+    weighted = values[0].copy()
+    nobs = (~np.isnan(weighted)).astype(np.int64)
+    old_wt = np.ones(m)
+    out[0] = np.where(nobs >= min_periods, weighted, np.nan)
+    for i in range(1, n):
+        cur = values[i]
+        is_obs = ~np.isnan(cur)
+        nobs += is_obs
+        seeded = ~np.isnan(weighted)
+        old_wt = np.where(seeded, old_wt * (1.0 - alpha), old_wt)
+        blend = seeded & is_obs
+        mixed = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(blend & (weighted != cur), mixed, weighted)
+        old_wt = np.where(blend, 1.0, old_wt)
+        weighted = np.where(~seeded & is_obs, cur, weighted)
+        out[i] = np.where(nobs >= min_periods, weighted, np.nan)
+    return out
+
+
+def ewm(values, span: float = None, alpha: float = None, min_periods: int = 0, use_numba: bool = True) -> np.ndarray:
+    """Column-wise ``ewm(span=..., adjust=False).mean()`` matching pandas, NaN handling included.
+
+    The recursion is sequential in time, so it runs as a numba-compiled loop
+    when numba is installed; otherwise one NumPy step per bar updates every
+    symbol together.
+    """
+    values = np.ascontiguousarray(as_panel(values))
+    alpha = float(alpha if alpha is not None else 2.0 / (span + 1.0))
+    if not len(values):
+        return values.copy()
+    if use_numba and _ewm_compiled is not None:
+        return _ewm_compiled(values, alpha, int(min_periods))
+    return _ewm_rows(values, alpha, int(min_periods))
+
+
+_SUM, _MEAN, _STD = 0, 1, 2
+
+
+def _rolling_loop(values, window, min_periods, ddof, stat):
+    """Rolling sum/mean/std of the non-NaN values down each column, as pandas' rolling() does.
+
+    Welford add/remove keeps the window's mean and squared deviations, and the
+    state is rebuilt from the window itself every `window` rows, so rounding
+    error never carries over from older history.  A window whose values are
+    all equal gets std 0 and mean equal to that value exactly, like pandas.
+    """
+    n, m = values.shape
+    out = np.empty((n, m))
+    for j in range(m):
+        nobs, mean, ssq = 0, 0.0, 0.0
+        run, prev = 0, np.nan  # Length of the current run of equal non-NaN values
+        for i in range(n):
+            cur = values[i, j]
+            if not np.isnan(cur):
+                run = run + 1 if cur == prev else 1
+                prev = cur
+            if i % window == 0:
+                nobs, mean, ssq = 0, 0.0, 0.0
+                first = i - window + 1 if i >= window else 0
+            else:
+                first = i
+            for k in range(first, i + 1):
+                val = values[k, j]
+                if not np.isnan(val):
+                    nobs += 1
+                    delta = val - mean
+                    mean += delta / nobs
+                    ssq += delta * (val - mean)
+            if i % window != 0 and i >= window:
+                val = values[i - window, j]
+                if not np.isnan(val):
+                    nobs -= 1
+                    if nobs:
+                        delta = val - mean
+                        mean -= delta / nobs
+                        ssq -= delta * (val - mean)
+                    else:
+                        mean, ssq = 0.0, 0.0
+            if nobs < min_periods or (stat == _STD and nobs <= ddof):
+                out[i, j] = np.nan
+            elif run >= nobs:
+                out[i, j] = prev * nobs if stat == _SUM else (prev if stat == _MEAN else 0.0)
+            elif stat == _SUM:
+                out[i, j] = mean * nobs
+            elif stat == _MEAN:
+                out[i, j] = mean
+            else:
+                out[i, j] = np.sqrt(max(ssq, 0.0) / (nobs - ddof))
+    return out
+
+
+_rolling_compiled = njit(cache=True)(_rolling_loop) if njit is not None else None
+
+
+def _rolling_windows(values, window, min_periods, ddof, stat, chunk_size=1 << 22):
+    """Same statistics as _rolling_loop, computed directly over every window in row chunks."""
+    n, m = values.shape
+    out = np.empty((n, m))
+    padded = np.concatenate([np.full((window - 1, m), np.nan), values])
+    view = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)  # (n, m, window)
+    step = max(1, chunk_size // max(1, m * window))
+    for a in range(0, n, step):
+        windows = view[a:a + step]
+        valid = ~np.isnan(windows)
+        count = valid.sum(axis=-1)
+        total = np.where(valid, windows, 0.0).sum(axis=-1)
+        flat = np.fmax.reduce(windows, axis=-1) == np.fmin.reduce(windows, axis=-1)
+        with np.errstate(all="ignore"):
+            mean = np.where(flat, np.fmax.reduce(windows, axis=-1), total / count)
+            if stat == _SUM:
+                result = np.where(flat, mean * count, total)
+            elif stat == _MEAN:
+                result = mean
+            else:
+                deviations = np.where(valid, windows - mean[..., None], 0.0)
+                result = np.sqrt((deviations * deviations).sum(axis=-1) / (count - ddof))
+                result = np.where(flat, 0.0, result)
+        ok = (count >= min_periods) & ((count > ddof) if stat == _STD else True)
+        out[a:a + step] = np.where(ok, result, np.nan)
+    return out
+
+
+def _rolling(values, window, min_periods, ddof, stat, use_numba):
+    values = as_panel(values)
+    values = np.ascontiguousarray(np.where(np.isinf(values), np.nan, values))  # pandas treats inf as missing
+    min_periods = max(window if min_periods is None else min_periods, 1)
+    if not len(values):
+        return values.copy()
+    if use_numba and _rolling_compiled is not None:
+        return _rolling_compiled(values, int(window), int(min_periods), int(ddof), stat)
+    return _rolling_windows(values, int(window), int(min_periods), int(ddof), stat)
+
+
+def rolling_mean(values, window: int, min_periods: int = None, use_numba: bool = True) -> np.ndarray:
+    """Column-wise ``rolling(window, min_periods).mean()``."""
+    return _rolling(values, window, min_periods, 0, _MEAN, use_numba)
+
+
+def rolling_sum(values, window: int, min_periods: int = None, use_numba: bool = True) -> np.ndarray:
+    """Column-wise ``rolling(window, min_periods).sum()``."""
+    return _rolling(values, window, min_periods, 0, _SUM, use_numba)
+
+
+def rolling_std(values, window: int, min_periods: int = None, ddof: int = 1, use_numba: bool = True) -> np.ndarray:
+    """Column-wise ``rolling(window, min_periods).std(ddof)``.
+
+    Runs as a numba-compiled Welford loop when numba is installed; otherwise
+    each window is reduced directly through a strided view.
+    """
+    return _rolling(values, window, min_periods, ddof, _STD, use_numba)
+
+
+def shift(values, periods: int = 1) -> np.ndarray:
+    """Column-wise ``shift(periods)`` with NaN fill."""
+    values = as_panel(values)
+    out = np.full(values.shape, np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """max(high - low, |high - prev close|, |low - prev close|), skipping the NaN gap on the first bar like pandas."""
+    prev_close = shift(close)
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+if __name__ == "__main__":
+    import time
+
+    import pandas as pd
+
+    rng = np.random.default_rng(7)
+    bars, symbols = 2_000, 300
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, symbols)), axis=0))
+    close[:rng.integers(0, bars // 2), 0] = np.nan  # One symbol with a shorter history
+    frame = pd.DataFrame(close)
+
+    started = time.perf_counter()
+    baseline = {"ewm": [frame[j].ewm(span=20, adjust=False).mean() for j in frame],
+                "std": [frame[j].rolling(20).std() for j in frame]}
+    pandas_s = time.perf_counter() - started
+
+    ewm(close[:2], span=20)  # compile
+    started = time.perf_counter()
+    batched = {"ewm": ewm(close, span=20), "std": rolling_std(close, 20)}
+    batch_s = time.perf_counter() - started
+    for name, columns in baseline.items():
+        assert np.allclose(batched[name], np.column_stack(columns), rtol=1e-9, equal_nan=True), f"{name} diverged from pandas"
+    assert np.allclose(ewm(close, span=20, use_numba=False), batched["ewm"], equal_nan=True)
+
+    print(f"EMA(20) + rolling std(20) over {bars} bars x {symbols} symbols")
+    print(f"  pandas, per symbol : {pandas_s * 1000:9.2f} ms")
+    print(f"  batched 2-D        : {batch_s * 1000:9.2f} ms  ({pandas_s / batch_s:6.1f}x)")
@@ -1,11 +1,24 @@
+import math
 import pandas as pd
 import numpy as np
-from .base import Indicator
+from .base import Indicator, RollingWindow, bar_value, divide
+from .batch import batch_field, rolling_mean, rolling_std
 
 
-class BollingerBands:
-   
-        def __init__(self, config, num_std=2.0): 
+class BollingerBands(Indicator):
+
+    def __init__(self, config, num_std=2.0):
+        """
+        Initializes Bollinger Bands.
+
+        Config can include:
+            - window: Lookback period for the moving average and standard deviation (default: 20).
+            - num_std: Band width in standard deviations (default: `num_std`, 2.0).
+        """
+        super().__init__(config)
+        self.window = config.get('window', 20)
+        self.num_std = config.get('num_std', num_std)
+        self.reset()
 
     def calculate(self, data: pd.DataFrame) -> pd.DataFrame:
         if not isinstance(data, pd.DataFrame):
@@ -37,3 +50,42 @@ class BollingerBands:
         }, index=data.index)
 
         return bollinger_bands_df
+
+    def calculate_batch(self, data) -> dict:
+        """calculate() for a (bars x symbols) close array; returns the same four columns as arrays."""
+        close = batch_field(data, 'close')
+        mavg = rolling_mean(close, self.window)
+        stddev = rolling_std(close, self.window)
+        upper_band = mavg + (self.num_std * stddev)
+        lower_band = mavg - (self.num_std * stddev)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent_b = ((close - lower_band) / (upper_band - lower_band)) * 100
+        return {
+            'bollinger_mavg': mavg,
+            'bollinger_upper': upper_band,
+            'bollinger_lower': lower_band,
+            'percent_b': percent_b
+        }
+
+    def update(self, bar) -> dict:
+        """Feeds one bar's close; returns the latest row of calculate() as a dict."""
+        close = bar_value(bar, 'close')
+        self._closes.push(close)
+        mavg = self._closes.mean()
+        stddev = self._closes.std(ddof=1)
+        upper_band = mavg + (self.num_std * stddev)
+        lower_band = mavg - (self.num_std * stddev)
+        self._current = {
+            'bollinger_mavg': mavg,
+            'bollinger_upper': upper_band,
+            'bollinger_lower': lower_band,
+            'percent_b': divide(close - lower_band, upper_band - lower_band) * 100
+        }
+        return self._current
+
+    def current(self) -> dict:
+        return self._current
+
+    def reset(self) -> None:
+        self._closes = RollingWindow(self.window)
+        self._current = dict.fromkeys(('bollinger_mavg', 'bollinger_upper', 'bollinger_lower', 'percent_b'), math.nan)
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""Shared asyncio websocket client for Bybit V5 public streams."""
+import asyncio
+import inspect
+import json
+import logging
+import random
+
+import aiohttp
+
+from orderbook import APPLY_SNAPSHOT, GAP, SKIP, SequenceTracker
+from wsdecode import decode_message
+
+PUBLIC_LINEAR_URL = "wss://stream.bybit.com/v5/public/linear"
+PUBLIC_SPOT_URL = "wss://stream.bybit.com/v5/public/spot"
+
+SUBSCRIBE_BATCH = 10  # Bybit caps args per subscribe request
+SNAPSHOT_RETRIES = 3  # Resubscribes for a missing snapshot before reconnecting
+
+
+class BybitStream:
+    """One websocket connection multiplexing many symbols and topics.
+
+    `subscribe(symbol, topics, handler)` registers a handler for a symbol's
+    topics (e.g. ``orderbook.50.BTCUSDT`` and ``publicTrade.BTCUSDT``); every
+    decoded push on those topics is passed to it as a dict, and handlers may be
+    plain functions or coroutines.  Handlers run on the event loop, in line
+    with frame reading and the heartbeat, so they must not block: order REST
+    calls and other slow I/O belong in ``asyncio.to_thread`` (as the bots'
+    execute_trade_signal does), or a stalled loop misses pings and every
+    multiplexed symbol freezes.  `run()` owns the connection inside the
+    event loop: it resubscribes everything on each (re)connect, sends Bybit's
+    ``{"op": "ping"}`` every `ping_interval` seconds, drops the connection when
+    nothing has arrived for two intervals, and reconnects with exponential
+    backoff plus jitter, capped at `max_backoff` seconds.  `loads` decodes each
+    text frame and defaults to wsdecode.decode_message (msgspec/orjson when
+    installed).  A wsrecord.FrameRecorder passed as `recorder` gets every raw
+    frame before it is decoded, and `feed()` is the entry point for replaying
+    such a recording through the same decode and dispatch path.
+
+    ``orderbook.*`` pushes are checked with a SequenceTracker per topic before
+    they reach handlers: stale deltas are dropped, and on a gap in the update
+    ids the topic is resubscribed so Bybit sends a fresh snapshot, with deltas
+    held back until it arrives.  Handlers therefore only see a clean
+    snapshot-then-consecutive-deltas sequence and must clear their book on
+    every snapshot.  A snapshot that has not arrived `snapshot_timeout`
+    seconds after a gap (or a reconnect) is requested again, and after
+    SNAPSHOT_RETRIES resubscribes the connection is dropped and rebuilt, so
+    a book can never stay frozen waiting for it.
+    """
+
+    def __init__(self, url=PUBLIC_LINEAR_URL, ping_interval=20, max_backoff=60.0, loads=decode_message, recorder=None,
+                 logger=None, snapshot_timeout=10.0):
+        self.url = url
+        self.ping_interval = ping_interval
+        self.snapshot_timeout = snapshot_timeout
+        self.max_backoff = max_backoff
+        self.loads = loads
+        self.recorder = recorder
+        self.logger = logger or logging.getLogger(__name__)
+        self._handlers = {}
+        self._topics = {}
+        self._sequences = {}
+        self._awaiting = {}  # topic -> (snapshot deadline, resubscribes so far)
+        self._ws = None
+        self._closed = False
+        self._attempt = 0
+        self._last_message = 0.0
+        self.reconnects = 0
+        self.resyncs = 0
+
+    def subscribe(self, symbol, topics, handler):
+        """Routes `topics` for `symbol` to `handler`, subscribing at once if connected."""
+        new = [topic for topic in topics if topic not in self._topics]
+        for topic in topics:
+            self._topics[topic] = symbol
+        self._handlers.setdefault(symbol, []).append(handler)
+        if new and self._ws is not None and not self._ws.closed:
+            asyncio.get_running_loop().create_task(self._send_op("subscribe", new))
+
+    def unsubscribe(self, symbol):
+        """Stops following `symbol`: drops its handlers and unsubscribes its topics."""
+        topics = [topic for topic, owner in self._topics.items() if owner == symbol]
+        for topic in topics:
+            del self._topics[topic]
+        self._handlers.pop(symbol, None)
+        if topics and self._ws is not None and not self._ws.closed:
+            asyncio.get_running_loop().create_task(self._send_op("unsubscribe", topics))
+
+    @property
+    def symbols(self):
+        return list(self._handlers)
+
+    async def run(self, *background):
+        """Keeps the connection alive until close(); `background` coroutines run alongside it."""
+        tasks = [asyncio.create_task(coro) for coro in background]
+        try:
+            async with aiohttp.ClientSession() as session:
+                while not self._closed:
+                    try:
+                        async with session.ws_connect(self.url, autoping=True, max_msg_size=0) as ws:
+                            await self._serve(ws)
+                    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                        self.logger.error(f"WebSocket connection error: {e}")
+                    if self._closed:
+                        break
+                    delay = self._backoff()
+                    self.reconnects += 1
+                    self.logger.warning(f"WebSocket disconnected, reconnecting in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def close(self):
+        """Stops run() after closing the current connection."""
+        self._closed = True
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+
+    def _backoff(self):
+        delay = min(self.max_backoff, 2 ** self._attempt)
+        self._attempt += 1
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _serve(self, ws):
+        self._ws = ws
+        loop = asyncio.get_running_loop()
+        self._last_message = loop.time()
+        self.logger.info(f"WebSocket connected to {self.url} ({len(self._topics)} topics)")
+        for tracker in self._sequences.values():
+            tracker.reset()  # Every subscription starts with a new snapshot
+        self._awaiting = {topic: (self._last_message + self.snapshot_timeout, 0) for topic in self._sequences}
+        heartbeat = asyncio.create_task(self._heartbeat(ws))
+        watchdog = asyncio.create_task(self._snapshot_watchdog(ws))
+        try:
+            if self._topics:
+                await self._send_op("subscribe", list(self._topics))
+            async for frame in ws:
+                if frame.type == aiohttp.WSMsgType.TEXT:
+                    self._last_message = loop.time()
+                    await self.feed(frame.data)
+                elif frame.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+        finally:
+            heartbeat.cancel()
+            watchdog.cancel()
+            self._ws = None
+
+    async def _heartbeat(self, ws):
+        loop = asyncio.get_running_loop()
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval)
+            if loop.time() - self._last_message > 2 * self.ping_interval:
+                self.logger.warning("WebSocket silent for two ping intervals, dropping connection")
+                await ws.close()
+                return
+            await ws.send_str(json.dumps({"op": "ping"}))
+
+    async def _snapshot_watchdog(self, ws):
+        """Re-requests overdue order-book snapshots, and reconnects when resubscribing does not bring them."""
+        loop = asyncio.get_running_loop()
+        while not ws.closed:
+            await asyncio.sleep(min(1.0, self.snapshot_timeout))
+            now = loop.time()
+            for topic, (deadline, attempts) in list(self._awaiting.items()):
+                if now < deadline:
+                    continue
+                if topic not in self._topics:
+                    del self._awaiting[topic]  # Unsubscribed meanwhile
+                    continue
+                if attempts >= SNAPSHOT_RETRIES:
+                    self.logger.error(f"No snapshot for {topic} after {attempts} resubscribes, reconnecting")
+                    await ws.close()
+                    return
+                self.logger.warning(f"No snapshot for {topic} within {self.snapshot_timeout}s, resubscribing")
+                self._awaiting[topic] = (now + self.snapshot_timeout, attempts + 1)
+                await self._resubscribe(topic)
+
+    async def _resubscribe(self, topic):
+        await self._send_op("unsubscribe", [topic])
+        await self._send_op("subscribe", [topic])
+
+    async def _send_op(self, op, topics):
+        if self._ws is None or self._ws.closed:
+            return  # Replaying, or the connection just dropped; run() resubscribes on reconnect
+        for start in range(0, len(topics), SUBSCRIBE_BATCH):
+            await self._ws.send_str(json.dumps({"op": op, "args": topics[start:start + SUBSCRIBE_BATCH]}))
+
+    async def feed(self, raw):
+        """Records, decodes and dispatches one raw text frame."""
+        if self.recorder is not None:
+            self.recorder.write(raw)
+        try:
+            msg = self.loads(raw)
+        except ValueError as e:
+            self.logger.error(f"Undecodable frame dropped: {e}")
+            return
+        await self._dispatch(msg)
+
+    async def _dispatch(self, msg):
+        topic = msg.get("topic")
+        if topic is None:
+            if msg.get("op") == "subscribe":
+                if msg.get("success") is False:
+                    self.logger.error(f"Subscription failed: {msg.get('ret_msg')}")
+                else:
+                    self._attempt = 0  # Connection is healthy again
+            return
+        if topic.startswith("orderbook."):
+            tracker = self._sequences.setdefault(topic, SequenceTracker())
+            action = tracker.check(msg.get("type"), msg.get("data") or {})
+            if action == GAP:
+                self.resyncs += 1
+                self.logger.warning(f"Gap in {topic} after u={tracker.last_u}, resubscribing for a fresh snapshot")
+                self._awaiting[topic] = (asyncio.get_running_loop().time() + self.snapshot_timeout, 1)
+                await self._resubscribe(topic)
+                return
+            if action == SKIP:
+                return
+            if action == APPLY_SNAPSHOT:
+                self._awaiting.pop(topic, None)
+        symbol = self._topics.get(topic)
+        for handler in self._handlers.get(symbol, ()):
+            try:
+                result = handler(msg)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.logger.exception(f"Handler for {topic} failed: {e}")
@@ -1,7 +1,8 @@
 # indicators/ema.py
 
 import pandas as pd
-from .base import Indicator
+from .base import Indicator, StreamingEMA, bar_value
+from .batch import batch_field, ewm
 
 class EMA(Indicator):
 
@@ -9,6 +10,7 @@ class EMA(Indicator):
         super().__init__(config)
         self.length_short = config.get('length_short', 20)
         self.length_long = config.get('length_long', 50)
+        self.reset()
 
     def calculate(self, data: pd.DataFrame) -> pd.DataFrame:
         """Calculates the Exponential Moving Average."""
@@ -20,5 +22,24 @@ class EMA(Indicator):
         """Calculates Exponential Moving Average."""
         return series.ewm(span=length, adjust=False).mean()
 
+    def calculate_batch(self, data) -> dict:
+        """calculate() for a (bars x symbols) close array; returns {'ema_short', 'ema_long'} arrays."""
+        close = batch_field(data, 'close')
+        return {'ema_short': ewm(close, span=self.length_short), 'ema_long': ewm(close, span=self.length_long)}
+
+    def update(self, bar) -> dict:
+        """Feeds one bar's close; returns {'ema_short', 'ema_long'}."""
+        close = bar_value(bar, 'close')
+        self._short.update(close)
+        self._long.update(close)
+        return self.current()
+
+    def current(self) -> dict:
+        return {'ema_short': self._short.value, 'ema_long': self._long.value}
+
+    def reset(self) -> None:
+        self._short = StreamingEMA(span=self.length_short)
+        self._long = StreamingEMA(span=self.length_long)
+
     def get_indicator_name(self) -> str:
         return "EMA"
\ No newline at end of file
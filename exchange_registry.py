@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Shared, thread-safe cache of ccxt exchange instances."""
+import logging
+import threading
+import time
+
+import ccxt
+
+MARKETS_TTL_SECONDS = 3600
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Entry:
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+
+def _build(exchange_id, market_type, api_key, api_secret):
+    params = {}
+    if api_key and api_secret:
+        params['apiKey'] = api_key
+        params['secret'] = api_secret
+    if market_type:
+        params['options'] = {'defaultType': market_type}
+    return getattr(ccxt, exchange_id)(params)
+
+
+def get_exchange(market_type=None, api_key=None, api_secret=None, exchange_id='bybit', ttl=MARKETS_TTL_SECONDS):
+    """Returns a cached exchange for (exchange, market type, credentials).
+
+    The first caller for a key builds the instance and loads its markets; later
+    callers reuse it.  Market metadata is reloaded once it is older than `ttl`
+    seconds.  A failed first load raises the ccxt error to the caller, while a
+    failed refresh keeps serving the previous markets.
+    """
+    key = (exchange_id, market_type, api_key, api_secret)
+    with _registry_lock:
+        entry = _registry.get(key)
+        if entry is None:
+            entry = _registry[key] = _Entry(_build(exchange_id, market_type, api_key, api_secret))
+
+    now = time.time()
+    if entry.loaded_at is None or now - entry.loaded_at > ttl:
+        with entry.lock:
+            if entry.loaded_at is None:
+                entry.exchange.load_markets()
+                entry.loaded_at = time.time()
+            elif now - entry.loaded_at > ttl:
+                try:
+                    entry.exchange.load_markets(reload=True)
+                except ccxt.BaseError as e:
+                    logging.warning(f"Market refresh failed for {exchange_id} ({market_type}), keeping cached markets: {e}")
+                entry.loaded_at = time.time()
+    return entry.exchange
+
+
+def clear_exchanges():
+    """Drops every cached exchange, forcing a cold start on next use."""
+    with _registry_lock:
+        _registry.clear()
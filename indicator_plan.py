@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""Dependency-ordered indicator evaluation over one NumPy view of an OHLCV frame."""
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from psar import parabolic_sar
+
+# A node in the evaluation graph.  `key` identifies the computation (operation
+# plus parameters) so that two indicators asking for the same intermediate share
+# one node; `fn` receives the values of `deps` in order.  Column nodes have no fn.
+Node = namedtuple("Node", "key deps fn")
+
+DEFAULT_PARAMS = {
+    "ema_short_period": 9,
+    "ema_long_period": 21,
+    "momentum_period": 10,
+    "momentum_ma_short": 12,
+    "momentum_ma_long": 26,
+    "volume_ma_period": 20,
+    "atr_period": 14,
+    "rsi_window": 14,
+    "stoch_window": 12,
+    "stoch_k_window": 3,
+    "stoch_d_window": 3,
+    "cci_window": 20,
+    "cci_constant": 0.015,
+    "wr_window": 14,
+    "mfi_window": 14,
+    "adx_window": 14,
+    "bb_period": 20,
+    "bb_std_dev": 2,
+    "macd_fast": 12,
+    "macd_slow": 26,
+    "macd_signal": 9,
+    "psar_acceleration": 0.02,
+    "psar_max_acceleration": 0.2,
+    "psar_ep_first": False,
+    "sma_window": 10,
+}
+
+
+# --- Array helpers ---
+def _shift(values, period):
+    out = np.full(values.shape[0], np.nan)
+    if period < values.shape[0]:
+        out[period:] = values[:values.shape[0] - period]
+    return out
+
+
+def _rolling(values, window, reduce):
+    """Applies `reduce` over trailing windows; NaN until the window is full or while it holds a NaN."""
+    out = np.full(values.shape[0], np.nan)
+    if values.shape[0] >= window:
+        out[window - 1:] = reduce(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def _std(windows, axis):
+    return windows.std(axis=axis, ddof=1)
+
+
+def _mean_dev(windows, axis):
+    return np.abs(windows - windows.mean(axis=axis, keepdims=True)).mean(axis=axis)
+
+
+def _ema(values, span):
+    """EMA with pandas' ewm(adjust=False) recursion, seeded from the first non-NaN value."""
+    alpha = 2.0 / (span + 1.0)
+    out = np.full(values.shape[0], np.nan)
+    started = False
+    last = 0.0
+    for i, value in enumerate(values.tolist()):
+        if value != value:  # NaN
+            if started:
+                out[i] = last
+            continue
+        last = alpha * value + (1.0 - alpha) * last if started else value
+        started = True
+        out[i] = last
+    return out
+
+
+def _cumsum_skipna(values):
+    """Cumulative sum that steps over NaNs and leaves them in place, like Series.cumsum()."""
+    missing = np.isnan(values)
+    out = np.cumsum(np.where(missing, 0.0, values))
+    out[missing] = np.nan
+    return out
+
+
+# --- Shared intermediates ---
+def column(name):
+    return Node(("column", name), (), None)
+
+
+def shift(source, period=1):
+    return Node(("shift", source.key, period), (source,), lambda v: _shift(v, period))
+
+
+def delta(period=1):
+    close = column("close")
+    return Node(("delta", period), (close, shift(close, period)), np.subtract)
+
+
+def true_range():
+    def fn(high, low, prev_close):
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return Node(("true_range",), (column("high"), column("low"), shift(column("close"))), fn)
+
+
+def typical_price():
+    return Node(("typical_price",), (column("high"), column("low"), column("close")),
+                lambda high, low, close: (high + low + close) / 3)
+
+
+def sma(source, window):
+    return Node(("sma", source.key, window), (source,), lambda v: _rolling(v, window, np.mean))
+
+
+def rolling_sum(source, window):
+    return Node(("rolling_sum", source.key, window), (source,), lambda v: _rolling(v, window, np.sum))
+
+
+def rolling_max(source, window):
+    return Node(("rolling_max", source.key, window), (source,), lambda v: _rolling(v, window, np.max))
+
+
+def rolling_min(source, window):
+    return Node(("rolling_min", source.key, window), (source,), lambda v: _rolling(v, window, np.min))
+
+
+def rolling_std(source, window):
+    return Node(("rolling_std", source.key, window), (source,), lambda v: _rolling(v, window, _std))
+
+
+def ema(source, span):
+    return Node(("ema", source.key, span), (source,), lambda v: _ema(v, span))
+
+
+# --- Indicators ---
+def rsi(window):
+    d = delta()
+    gain = Node(("gain",), (d,), lambda v: np.where(v > 0, v, 0.0))
+    loss = Node(("loss",), (d,), lambda v: np.where(v < 0, -v, 0.0))
+
+    def fn(avg_gain, avg_loss):
+        return np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + avg_gain / avg_loss)))
+    return Node(("rsi", window), (sma(gain, window), sma(loss, window)), fn)
+
+
+def stoch_rsi(rsi_window, stoch_window):
+    r = rsi(rsi_window)
+    return Node(("stoch_rsi", rsi_window, stoch_window),
+                (r, rolling_min(r, stoch_window), rolling_max(r, stoch_window)),
+                lambda v, lo, hi: (v - lo) / (hi - lo))
+
+
+def momentum(period):
+    close = column("close")
+    return Node(("momentum", period), (close, shift(close, period)),
+                lambda c, prev: (c - prev) / prev * 100)
+
+
+def williams_r(window):
+    return Node(("williams_r", window),
+                (rolling_max(column("high"), window), rolling_min(column("low"), window), column("close")),
+                lambda hi, lo, c: (hi - c) / (hi - lo) * -100)
+
+
+def cci(window, constant):
+    tp = typical_price()
+    mean_dev = Node(("mean_dev", tp.key, window), (tp,), lambda v: _rolling(v, window, _mean_dev))
+    return Node(("cci", window, constant), (tp, sma(tp, window), mean_dev),
+                lambda v, mean, dev: (v - mean) / (constant * dev))
+
+
+def mfi(window):
+    tp = typical_price()
+    money_flow = Node(("money_flow",), (tp, column("volume")), np.multiply)
+    prev_tp, prev_flow = shift(tp), shift(money_flow)
+
+    def flow(up):
+        def fn(v, prev, prev_mf):
+            # Bar i books the previous bar's money flow on the side of its move
+            out = np.where((v > prev) if up else (v < prev), prev_mf, 0.0)
+            out[:1] = np.nan
+            return out
+        return Node(("money_flow_up" if up else "money_flow_down",), (tp, prev_tp, prev_flow), fn)
+
+    return Node(("mfi", window), (rolling_sum(flow(True), window), rolling_sum(flow(False), window)),
+                lambda pos, neg: 100 - (100 / (1 + pos / neg)))
+
+
+def vwap():
+    return Node(("vwap",), (typical_price(), column("volume")),
+                lambda tp, v: np.cumsum(v * tp) / np.cumsum(v))
+
+
+def psar(acceleration, max_acceleration, ep_first):
+    return Node(("psar", acceleration, max_acceleration, ep_first), (column("high"), column("low")),
+                lambda h, l: parabolic_sar(h, l, acceleration, max_acceleration, ep_first=ep_first))
+
+
+def obv():
+    close = column("close")
+    return Node(("obv",), (close, shift(close), column("volume")),
+                lambda c, prev, v: np.cumsum(np.where(c > prev, v, np.where(c < prev, -v, 0.0))))
+
+
+def adi():
+    def fn(h, l, c, v):
+        return _cumsum_skipna(((c - l) - (h - c)) / (h - l) * v)
+    return Node(("adi",), (column("high"), column("low"), column("close"), column("volume")), fn)
+
+
+def fve():
+    return Node(("fve",), (delta(), column("volume")), lambda d, v: _cumsum_skipna(d * v))
+
+
+def adx(window):
+    high, low = column("high"), column("low")
+    moves = (high, shift(high), low, shift(low))
+    plus_dm = Node(("plus_dm",), moves,
+                   lambda h, ph, l, pl: np.where(h - ph > pl - l, np.maximum(h - ph, 0), 0.0))
+    minus_dm = Node(("minus_dm",), moves,
+                    lambda h, ph, l, pl: np.where(pl - l > h - ph, np.maximum(pl - l, 0), 0.0))
+
+    def fn(tr, pdm, mdm):
+        plus_di = 100 * (pdm / tr)
+        minus_di = 100 * (mdm / tr)
+        return 100 * (np.abs(plus_di - minus_di) / (plus_di + minus_di))
+    dx = Node(("dx", window),
+              (rolling_sum(true_range(), window), rolling_sum(plus_dm, window), rolling_sum(minus_dm, window)), fn)
+    return sma(dx, window)
+
+
+def macd(fast, slow, signal):
+    close = column("close")
+    line = Node(("macd", fast, slow), (ema(close, fast), ema(close, slow)), np.subtract)
+    signal_line = ema(line, signal)
+    histogram = Node(("macd_histogram", fast, slow, signal), (line, signal_line), np.subtract)
+    return line, signal_line, histogram
+
+
+def bollinger_bands(period, std_dev):
+    close = column("close")
+    mid, std = sma(close, period), rolling_std(close, period)
+    upper = Node(("bb_upper", period, std_dev), (mid, std), lambda m, s: m + s * std_dev)
+    lower = Node(("bb_lower", period, std_dev), (mid, std), lambda m, s: m - s * std_dev)
+    return upper, mid, lower
+
+
+def _macd_outputs(p):
+    line, signal_line, histogram = macd(p["macd_fast"], p["macd_slow"], p["macd_signal"])
+    return {"macd": line, "macd_signal": signal_line, "macd_histogram": histogram}
+
+
+def _bollinger_outputs(p):
+    upper, mid, lower = bollinger_bands(p["bb_period"], p["bb_std_dev"])
+    return {"bb_upper": upper, "bb_mid": mid, "bb_lower": lower}
+
+
+def _stoch_rsi_outputs(p):
+    raw = stoch_rsi(p["rsi_window"], p["stoch_window"])
+    k_line = sma(raw, p["stoch_k_window"])
+    return {"stoch_rsi": raw, "stoch_k": k_line, "stoch_d": sma(k_line, p["stoch_d_window"])}
+
+
+def _momentum_ma_outputs(p):
+    mom = delta(p["momentum_period"])
+    return {"momentum_ma_short": sma(mom, p["momentum_ma_short"]),
+            "momentum_ma_long": sma(mom, p["momentum_ma_long"])}
+
+
+# Indicator name (as used in config["indicators"]) -> named output nodes
+INDICATORS = {
+    "ema_alignment": lambda p: {"ema_short": ema(column("close"), p["ema_short_period"]),
+                                "ema_long": ema(column("close"), p["ema_long_period"])},
+    "momentum": lambda p: {"momentum": momentum(p["momentum_period"])},
+    "momentum_ma": _momentum_ma_outputs,
+    "volume_confirmation": lambda p: {"volume_ma": sma(column("volume"), p["volume_ma_period"])},
+    "rsi": lambda p: {"rsi": rsi(p["rsi_window"])},
+    "stoch_rsi": _stoch_rsi_outputs,
+    "macd": _macd_outputs,
+    "bollinger_bands": _bollinger_outputs,
+    "cci": lambda p: {"cci": cci(p["cci_window"], p["cci_constant"])},
+    "wr": lambda p: {"wr": williams_r(p["wr_window"])},
+    "mfi": lambda p: {"mfi": mfi(p["mfi_window"])},
+    "adx": lambda p: {"adx": adx(p["adx_window"])},
+    "vwap": lambda p: {"vwap": vwap()},
+    "obv": lambda p: {"obv": obv()},
+    "adi": lambda p: {"adi": adi()},
+    "fve": lambda p: {"fve": fve()},
+    "psar": lambda p: {"psar": psar(p["psar_acceleration"], p["psar_max_acceleration"], p["psar_ep_first"])},
+    "sma_10": lambda p: {"sma_10": sma(column("close"), p["sma_window"])},
+    "atr": lambda p: {"atr": sma(true_range(), p["atr_period"])},
+}
+
+
+class IndicatorPlan:
+    """Evaluates a set of indicators as one dependency graph.
+
+    Every requested indicator is expanded into nodes keyed by operation and
+    parameters, so shared intermediates (close.diff(), true range, typical
+    price, rolling highs/lows, the RSI feeding Stoch RSI, ...) appear once.
+    The graph is topologically sorted when the plan is built; `evaluate()` then
+    walks it over float64 views of the frame's columns, computing each node
+    exactly once.  Outputs follow the pandas formulas the analyzers used and are
+    aligned with the frame's rows (NaN during warm-up).
+    """
+
+    def __init__(self, indicators, params=None):
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.outputs = {}
+        for name in indicators:
+            build = INDICATORS.get(name)
+            if build is not None:  # e.g. "divergence" has no series of its own
+                self.outputs.update(build(self.params))
+        self.steps = self._order(self.outputs.values())
+
+    @classmethod
+    def from_config(cls, config, params=None, extra=(), indicators=None):
+        """Plan for the indicators enabled in `config["indicators"]`, plus any `extra` names.
+
+        Pass `indicators` to plan an explicit set instead of the enabled ones.
+        Parameters present in both DEFAULT_PARAMS and `config` are taken from the
+        config; `params` overrides both.
+        """
+        merged = {key: config[key] for key in DEFAULT_PARAMS if key in config}
+        merged.update(params or {})
+        if indicators is None:
+            names = [name for name, enabled in config.get("indicators", {}).items() if enabled]
+        else:
+            names = list(indicators)
+        names += [name for name in extra if name not in names]
+        return cls(names, merged)
+
+    @staticmethod
+    def _order(targets):
+        order, seen = [], set()
+
+        def visit(node):
+            if node.key in seen:
+                return
+            for dep in node.deps:
+                visit(dep)
+            seen.add(node.key)
+            order.append(node)
+
+        for node in targets:
+            visit(node)
+        return order
+
+    def evaluate(self, df):
+        """Returns {output name: ndarray} for every planned output. Raises KeyError on a missing column."""
+        values = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for node in self.steps:
+                if node.fn is None:
+                    values[node.key] = df[node.key[1]].to_numpy(dtype=np.float64)
+                else:
+                    values[node.key] = node.fn(*(values[dep.key] for dep in node.deps))
+        return {name: values[node.key] for name, node in self.outputs.items()}
+
+    def __len__(self):
+        return len(self.steps)
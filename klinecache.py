@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Per-(symbol, interval) candle cache that only fetches new bars."""
+import logging
+import threading
+
+import pandas as pd
+
+
+class KlineCache:
+    """Keeps a rolling OHLCV frame per (symbol, interval) up to date.
+
+    `fetch_klines` is the caller's REST helper with the signature
+    ``fetch_klines(symbol, interval, limit=..., logger=..., start=...)`` and
+    returns a frame with a ``start_time`` column.  The first call for a key
+    pulls `limit` bars; after that only bars from the last cached open time
+    onwards are requested, so the still-open candle is replaced and any
+    closed ones are appended.  If the incremental page does not reach back to
+    the cached tail (e.g. after a long pause) the key is refetched in full.
+
+    With a `store` (an ohlcvstore.OHLCVStore) the cache is seeded from disk
+    on first use, so a restarted bot only fetches the bars it missed, and
+    every refreshed frame is appended back to the store.  A frame that starts
+    after the newest stored bar (the refetch after a hole) is not appended,
+    since that would persist the hole; the store stays behind until the gap
+    is backfilled, e.g. with klinedownload.
+    """
+
+    def __init__(self, fetch_klines, limit=200, store=None):
+        self.fetch_klines = fetch_klines
+        self.limit = limit
+        self.store = store
+        self._frames = {}
+        self._gaps = set()  # Keys whose refreshed frames no longer join the store
+        self._lock = threading.Lock()
+
+    def get(self, symbol, interval, logger=None):
+        """Returns an ascending OHLCV frame for `symbol`/`interval`, or an empty frame."""
+        key = (symbol, interval)
+        with self._lock:
+            cached = self._frames.get(key)
+        if (cached is None or cached.empty) and self.store is not None:
+            cached = self.store.frame(symbol, interval, limit=self.limit)
+        if cached is None or cached.empty:
+            frame = self._full(symbol, interval, logger)
+        else:
+            frame = self._extend(cached, symbol, interval, logger)
+        if frame.empty:
+            return frame
+        with self._lock:
+            self._frames[key] = frame
+        if self.store is not None:
+            if self._joins_store(symbol, interval, frame):
+                self.store.append(symbol, interval, frame)
+                self._gaps.discard(key)
+            elif key not in self._gaps:
+                self._gaps.add(key)
+                (logger or logging.getLogger(__name__)).warning(
+                    f"Not storing {symbol} {interval} candles: they start after the stored history, "
+                    f"backfill the gap with klinedownload")
+        return frame.copy()
+
+    def _joins_store(self, symbol, interval, frame):
+        """True when `frame` overlaps the stored bars (or none are stored), so appending it leaves no hole."""
+        last = self.store.last_timestamp(symbol, interval)
+        return last is None or int(pd.Timestamp(frame["start_time"].iloc[0]).value // 1_000_000) <= last
+
+    def invalidate(self, symbol=None, interval=None):
+        """Drops cached candles for one key, or everything when no key is given."""
+        with self._lock:
+            if symbol is None:
+                self._frames.clear()
+            else:
+                self._frames.pop((symbol, interval), None)
+
+    def _full(self, symbol, interval, logger):
+        df = self.fetch_klines(symbol, interval, limit=self.limit, logger=logger)
+        return self._sorted(df)
+
+    def _extend(self, cached, symbol, interval, logger):
+        last_open = cached["start_time"].iloc[-1]
+        start_ms = int(pd.Timestamp(last_open).value // 1_000_000)
+        new = self.fetch_klines(symbol, interval, limit=self.limit, logger=logger, start=start_ms)
+        if new.empty:
+            return cached
+        new = self._sorted(new)
+        if new["start_time"].iloc[0] > last_open:
+            # Page does not overlap the cache, so there may be a hole
+            return self._full(symbol, interval, logger)
+        kept = cached[cached["start_time"] < new["start_time"].iloc[0]]
+        merged = pd.concat([kept, new], ignore_index=True)
+        return merged.tail(self.limit).reset_index(drop=True)
+
+    @staticmethod
+    def _sorted(df):
+        if df.empty:
+            return df
+        return df.sort_values("start_time").drop_duplicates("start_time", keep="last").reset_index(drop=True)
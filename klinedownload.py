@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""Bulk historical kline download into the local OHLCV store, fetching pages in parallel."""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from ohlcvstore import INTERVAL_ALIASES, get_store, store_key
+from ratelimit import get_limiter
+
+BYBIT_REST_API_URL = "https://api.bybit.com"
+KLINE_ENDPOINT = "/v5/market/kline"
+PAGE_LIMIT = 1000  # Largest page /v5/market/kline returns
+MAX_RETRIES = 5
+FLUSH_PAGES = 50  # Pages buffered per store append
+MERGE_PAGES = 1000  # Pages buffered before a backfill is merged under newer stored bars
+
+INTERVAL_MS = {
+    "1": 60_000, "3": 180_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000, "360": 21_600_000, "720": 43_200_000,
+    "D": 86_400_000, "W": 604_800_000,
+}
+_BYBIT_INTERVALS = {timeframe: interval for interval, timeframe in INTERVAL_ALIASES.items()}
+
+
+def bybit_interval(interval):
+    """'1h' or '60' -> '60'; raises ValueError for intervals without a fixed length (monthly)."""
+    interval = _BYBIT_INTERVALS.get(str(interval), str(interval))
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Interval '{interval}' cannot be split into pages; use one of {', '.join(INTERVAL_MS)}")
+    return interval
+
+
+def to_ms(value):
+    """Milliseconds from an int (already ms), a datetime or a 'YYYY-MM-DD[ HH:MM]' string (UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    return int(stamp.value // 1_000_000)
+
+
+def page_windows(start_ms, end_ms, step_ms, page_limit=PAGE_LIMIT):
+    """[(first open time, last open time)] of consecutive pages covering [start_ms, end_ms]."""
+    first = start_ms - start_ms % step_ms
+    span = step_ms * page_limit
+    return [(lo, min(lo + span - step_ms, end_ms)) for lo in range(first, end_ms + 1, span)]
+
+
+class KlineDownloader:
+    """Fills a store with every bar of a symbol/interval between two dates.
+
+    The range is split into PAGE_LIMIT-bar windows, and pages are fetched
+    concurrently by `workers` threads.  Every request goes through the shared
+    ratelimit.RateLimiter, so the pool never outruns Bybit's market-data limit,
+    and 429s or network errors are retried with backoff.  Windows the store
+    already holds completely are skipped, which is what makes an interrupted
+    download resumable: rerun the same command and only missing pages are
+    fetched.  Closed windows are also recorded in the store as covered once
+    written, so ranges with no bars to give (before listing, maintenance
+    gaps) are not requested again.  (The still-open newest window is always
+    refetched.)
+
+    Pages past the newest stored bar are written oldest first in batches of
+    FLUSH_PAGES, which the store takes as cheap tail appends.  Pages that land
+    under bars already stored would each force the store to rewrite its
+    columns, so they are buffered and merged in one append (per MERGE_PAGES).
+    Overlaps are deduplicated by the store, newest data winning.
+    """
+
+    def __init__(self, store=None, workers=8, category="linear", base_url=BYBIT_REST_API_URL,
+                 limiter=None, logger=None):
+        self.store = store if store is not None else get_store()
+        self.workers = workers
+        self.category = category
+        self.base_url = base_url
+        self.limiter = limiter or get_limiter()
+        self.logger = logger or logging.getLogger(__name__)
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def missing_windows(self, symbol, interval, start_ms, end_ms):
+        """Page windows in the range that the store does not fully cover yet."""
+        step = INTERVAL_MS[interval]
+        windows = page_windows(start_ms, end_ms, step)
+        starts = self.store.columns(symbol, interval)["start"]
+        covered = self.store.covered(symbol, interval)
+        if not len(starts) and not len(covered):
+            return windows
+        lows = np.array([lo for lo, _ in windows], dtype=np.int64)
+        highs = np.array([hi for _, hi in windows], dtype=np.int64)
+        have = np.searchsorted(starts, highs, side="right") - np.searchsorted(starts, lows, side="left")
+        full = have >= (highs - lows) // step + 1
+        if len(covered):
+            full |= ((lows[:, None] >= covered[:, 0]) & (highs[:, None] <= covered[:, 1])).any(axis=1)
+        now_ms = int(time.time() * 1000)
+        return [window for window, done in zip(windows, full, strict=True) if not done or window[1] + step > now_ms]
+
+    def fetch_page(self, symbol, interval, window):
+        """One page of bars as an (n, 7) float64 array [start, open, high, low, close, volume, turnover]."""
+        symbol = store_key(symbol, interval)[0]  # 'BTC/USDT' -> 'BTCUSDT', the id Bybit expects
+        params = {"category": self.category, "symbol": symbol, "interval": interval,
+                  "start": window[0], "end": window[1], "limit": PAGE_LIMIT}
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire(KLINE_ENDPOINT)
+            try:
+                response = self._session().get(self.base_url + KLINE_ENDPOINT, params=params, timeout=10)
+            except requests.exceptions.RequestException as e:
+                self.logger.warning(f"Kline page {window} for {symbol} failed ({e}), retry {attempt + 1}/{MAX_RETRIES}")
+            else:
+                try:
+                    data = response.json()
+                except ValueError:
+                    data = {}
+                if self.limiter.observe(KLINE_ENDPOINT, response.headers, response.status_code, data.get("retCode")):
+                    continue  # The limiter now holds the group until Bybit's reset time
+                if response.status_code == 200 and data.get("retCode") == 0:
+                    rows = data["result"].get("list") or []
+                    return np.array(rows, dtype=np.float64).reshape(len(rows), 7)
+                if response.status_code < 500 and data:
+                    raise ValueError(f"Kline page {window} for {symbol} rejected: {data.get('retMsg')}")
+                self.logger.warning(f"Kline page {window} for {symbol} got HTTP {response.status_code}, "
+                                    f"retry {attempt + 1}/{MAX_RETRIES}")
+            time.sleep(min(30, 2 ** attempt) * random.uniform(0.5, 1.0))
+        raise RuntimeError(f"Kline page {window} for {symbol} failed after {MAX_RETRIES} retries")
+
+    def download(self, symbol, interval, start, end=None):
+        """Downloads [start, end] (default: now) and returns the number of bars written."""
+        symbol, interval = store_key(symbol, interval)[0], bybit_interval(interval)
+        start_ms, end_ms = to_ms(start), to_ms(end) or int(time.time() * 1000)
+        windows = self.missing_windows(symbol, interval, start_ms, end_ms)
+        total = len(page_windows(start_ms, end_ms, INTERVAL_MS[interval]))
+        self.logger.info(f"{symbol} {interval}: {len(windows)} of {total} pages to fetch with {self.workers} workers")
+        last = self.store.last_timestamp(symbol, interval)
+        fetched_ms = int(time.time() * 1000)
+        written, started = 0, time.monotonic()
+        tail, backfill = ([], []), ([], [])  # (pages, windows) past / under the newest stored bar
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # map() yields in submission order, so pages are flushed oldest first
+            for done, page in enumerate(pool.map(lambda w: self.fetch_page(symbol, interval, w), windows), 1):
+                window = windows[done - 1]
+                pages, fetched = backfill if last is not None and window[0] <= last else tail
+                pages.append(page)
+                fetched.append(window)
+                if len(backfill[0]) >= MERGE_PAGES:
+                    written += self._flush(symbol, interval, *backfill, fetched_ms)
+                    backfill = ([], [])
+                if len(tail[0]) >= FLUSH_PAGES or done == len(windows):
+                    written += self._flush(symbol, interval, *tail, fetched_ms)
+                    tail = ([], [])
+                    self.logger.info(f"{symbol} {interval}: {done}/{len(windows)} pages, {written:,} bars "
+                                     f"({time.monotonic() - started:.1f}s)")
+        written += self._flush(symbol, interval, *backfill, fetched_ms)
+        return written
+
+    def _flush(self, symbol, interval, pages, windows, fetched_ms):
+        """Appends the pages, then marks the windows that had closed when fetched as covered."""
+        rows = [page for page in pages if len(page)]
+        if rows:
+            rows = np.concatenate(rows)
+            self.store.append(symbol, interval, rows)
+        step = INTERVAL_MS[interval]
+        self.store.add_covered(symbol, interval, [w for w in windows if w[1] + step <= fetched_ms], step)
+        return len(rows)
+
+
+def download(symbol, interval, start, end=None, workers=8, store=None, logger=None):
+    """KlineDownloader(...).download() for one symbol/interval."""
+    return KlineDownloader(store=store, workers=workers, logger=logger).download(symbol, interval, start, end)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ohlcvstore import OHLCVStore
+
+    parser = argparse.ArgumentParser(description="Download Bybit klines into the local history store.")
+    parser.add_argument("symbol")
+    parser.add_argument("interval", help="Bybit interval (1, 60, D) or ccxt timeframe (1m, 1h, 1d)")
+    parser.add_argument("start", help="YYYY-MM-DD (UTC)")
+    parser.add_argument("end", nargs="?", default=None, help="YYYY-MM-DD (UTC), default now")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--category", default="linear")
+    parser.add_argument("--root", default=None, help="store directory (default $BYBIT_HISTORY_DIR or ./history)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    store = OHLCVStore(args.root) if args.root else get_store()
+    downloader = KlineDownloader(store=store, workers=args.workers, category=args.category)
+    started = time.monotonic()
+    bars = downloader.download(args.symbol, args.interval, args.start, args.end)
+    symbol, interval = store_key(args.symbol, args.interval)
+    print(f"{bars:,} bars written in {time.monotonic() - started:.1f}s; "
+          f"{store.rows(symbol, interval):,} stored for {symbol} {interval}")
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""In-memory candle frame kept current from Bybit kline/tickers websocket messages."""
+import threading
+
+import pandas as pd
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume", "turnover"]
+
+BAR_CLOSE = "bar_close"
+PRICE_MOVE = "price_move"
+
+
+class LiveCandles:
+    """Applies ``kline.{interval}.{symbol}`` and ``tickers.{symbol}`` pushes to an OHLCV frame.
+
+    The frame is seeded from REST (``start_time`` plus OHLCV columns, ascending)
+    and then only changes through `on_message`: an update for the open candle
+    overwrites the last row and a new start time appends a row, keeping at
+    most `limit` rows.  `on_message` returns why an analysis should run, if
+    it should: `BAR_CLOSE` when Bybit confirms a candle, or `PRICE_MOVE` when
+    the last price has moved `price_move_pct` percent away from the price
+    recorded by the last `mark_analyzed` call (0 disables price triggers).
+    """
+
+    def __init__(self, df, symbol, interval, price_move_pct=0.0, limit=200):
+        self.symbol = symbol
+        self.interval = interval
+        self.price_move_pct = float(price_move_pct or 0.0)
+        self.limit = limit
+        self._df = df.reset_index(drop=True).copy()
+        for col in OHLCV_COLUMNS:
+            if col not in self._df.columns:
+                self._df[col] = 0.0
+        self._lock = threading.Lock()
+        self.last_price = float(self._df["close"].iloc[-1]) if not self._df.empty else None
+        self._anchor_price = self.last_price
+
+    @property
+    def topics(self):
+        return [f"kline.{self.interval}.{self.symbol}", f"tickers.{self.symbol}"]
+
+    def frame(self):
+        """Returns a copy of the current candles, safe to hand to an analyzer."""
+        with self._lock:
+            return self._df.copy()
+
+    def reseed(self, df):
+        """Replaces the candles with a fresh REST frame, e.g. after a reconnect."""
+        with self._lock:
+            self._df = df.tail(self.limit).reset_index(drop=True).copy()
+            self.last_price = float(self._df["close"].iloc[-1])
+
+    def mark_analyzed(self, price=None):
+        """Re-anchors the price-move trigger at `price` (default: the last price)."""
+        with self._lock:
+            self._anchor_price = float(price) if price is not None else self.last_price
+
+    def on_message(self, message):
+        """Applies one decoded websocket message and returns BAR_CLOSE, PRICE_MOVE or None."""
+        topic = message.get("topic", "")
+        data = message.get("data")
+        if not data:
+            return None
+        if topic.startswith("kline."):
+            return self._on_kline(data if isinstance(data, list) else [data])
+        if topic.startswith("tickers."):
+            price = data.get("lastPrice")
+            if price is not None:
+                return self._on_price(float(price))
+        return None
+
+    def _on_kline(self, candles):
+        reason = None
+        with self._lock:
+            for candle in candles:
+                start = pd.to_datetime(int(candle["start"]), unit="ms")
+                row = [float(candle.get(col, 0.0) or 0.0) for col in OHLCV_COLUMNS]
+                if not self._df.empty and start == self._df["start_time"].iloc[-1]:
+                    self._df.iloc[-1, [self._df.columns.get_loc(col) for col in OHLCV_COLUMNS]] = row
+                elif self._df.empty or start > self._df["start_time"].iloc[-1]:
+                    new = pd.DataFrame([[start] + row], columns=["start_time"] + OHLCV_COLUMNS)
+                    self._df = pd.concat([self._df, new], ignore_index=True).tail(self.limit).reset_index(drop=True)
+                else:
+                    continue  # Out-of-order push for an older candle
+                self.last_price = row[3]
+                if candle.get("confirm"):
+                    reason = BAR_CLOSE
+        if reason is None and self.last_price is not None:
+            return self._on_price(self.last_price)
+        return reason
+
+    def _on_price(self, price):
+        with self._lock:
+            self.last_price = price
+            if self._anchor_price is None:
+                self._anchor_price = price
+                return None
+            if self.price_move_pct <= 0:
+                return None
+            moved = abs(price - self._anchor_price) / self._anchor_price * 100
+            return PRICE_MOVE if moved >= self.price_move_pct else None
@@ -2,9 +2,9 @@
 
 import pandas as pd
 from typing import Dict, Any
-from .base import Indicator
+from .base import Indicator, StreamingEMA, bar_value
 
-class MACD:
+class MACD(Indicator):
     def __init__(self, config: Dict[str, Any]) -> None:
         """
         Initializes the MACD indicator.
@@ -18,6 +18,7 @@ class MACD:
         self.fast_length = self.config.get("fast_length", 12)
         self.slow_length = self.config.get("slow_length", 26)
         self.signal_length = self.config.get("signal_length", 9)
+        self.reset()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -31,3 +32,20 @@ class MACD:
         df["macd_signal"] = df["macd"].ewm(span=self.signal_length, adjust=False).mean()  # Lowercase
         df["macd_hist"] = df["macd"] - df["macd_signal"]  # Lowercase
         return df
+
+    def update(self, bar) -> Dict[str, float]:
+        """Feeds one bar's close; returns {'macd', 'macd_signal', 'macd_hist'}."""
+        close = bar_value(bar, "close")
+        macd = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(macd)
+        self._current = {"macd": macd, "macd_signal": signal, "macd_hist": macd - signal}
+        return self._current
+
+    def current(self) -> Dict[str, float]:
+        return self._current
+
+    def reset(self) -> None:
+        self._fast = StreamingEMA(span=self.fast_length)
+        self._slow = StreamingEMA(span=self.slow_length)
+        self._signal = StreamingEMA(span=self.signal_length)
+        self._current = {"macd": float("nan"), "macd_signal": float("nan"), "macd_hist": float("nan")}
@@ -1,6 +1,9 @@
+import math
+from collections import deque
 import pandas as pd
 import numpy as np
-from .base import Indicator
+from .base import Indicator, RollingWindow, StreamingEMA, bar_value
+from .batch import batch_field, ewm, rolling_mean, rolling_std, shift
 
 class Momentum(Indicator):
     """
@@ -16,6 +19,7 @@ class Momentum(Indicator):
         self.length = config.get('length', 10)  # Length for standard momentum calculation
         self.ema_length = config.get('ema_length', 20) # Length for EMA smoothing of momentum
         self.zscore_window = config.get('zscore_window', 30) # Window for Z-score normalization
+        self.reset()
 
 
     def calculate(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -60,5 +64,47 @@ class Momentum(Indicator):
         return zscore_momentum
 
 
+    def calculate_batch(self, data) -> dict:
+        """calculate() for a (bars x symbols) close array; returns the same three columns as arrays."""
+        close = batch_field(data, 'close')
+        momentum = close - shift(close, self.length)
+        min_periods = self.zscore_window // 2
+        rolling_std_ = rolling_std(momentum, self.zscore_window, min_periods, ddof=0)
+        rolling_std_safe = np.where(rolling_std_ == 0, 1e-9, rolling_std_) # Same zero guard as calculate()
+        return {
+            'momentum': momentum,
+            'momentum_ema': ewm(momentum, span=self.ema_length),
+            'momentum_zscore': (momentum - rolling_mean(momentum, self.zscore_window, min_periods)) / rolling_std_safe,
+        }
+
+    def update(self, bar) -> dict:
+        """Feeds one bar's close; returns {'momentum', 'momentum_ema', 'momentum_zscore'}."""
+        self._closes.append(bar_value(bar, 'close'))
+        momentum = self._closes[-1] - self._closes[0] if len(self._closes) > self.length else math.nan
+        momentum_ema = self._ema.update(momentum)
+        if math.isnan(momentum):
+            momentum_zscore = math.nan
+        else:
+            # Momentum is only NaN during warm-up, so windowing the valid values matches the rolling window
+            self._window.push(momentum)
+            rolling_std = self._window.std(ddof=0)
+            rolling_std = 1e-9 if rolling_std == 0 else rolling_std # Same zero guard as calculate()
+            momentum_zscore = (momentum - self._window.mean()) / rolling_std
+        self._current = {
+            'momentum': momentum,
+            'momentum_ema': momentum_ema,
+            'momentum_zscore': momentum_zscore,
+        }
+        return self._current
+
+    def current(self) -> dict:
+        return self._current
+
+    def reset(self) -> None:
+        self._closes = deque(maxlen=self.length + 1)
+        self._ema = StreamingEMA(span=self.ema_length)
+        self._window = RollingWindow(self.zscore_window, min_periods=self.zscore_window // 2)
+        self._current = {'momentum': math.nan, 'momentum_ema': math.nan, 'momentum_zscore': math.nan}
+
     def get_indicator_name(self) -> str:
         return "Enhanced Momentum"
\ No newline at end of file
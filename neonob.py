@@ -1,20 +1,21 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import json
 import logging
 import os
 import sys
 import time
-import threading
 import hashlib
 import hmac
 import requests
-import websocket
-import pandas as pd
-import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
-from collections import OrderedDict
 from colorama import Fore, Style, init
+from bybitws import BybitStream
+from wsrecord import FrameRecorder
+from orderbook import BookSide
+from ticks import InstrumentSteps
+from tradetape import StreamingCMI, TradeTape
 
 init(autoreset=True)
 load_dotenv()
@@ -39,11 +40,13 @@ class Config:
         self.imbalance_threshold_short = 0.6
         self.cmi_period = 20
         self.ws_ping_interval = 20
+        self.order_timeout = 10  # Seconds per order POST
         self.trade_size_usd = 5
         self.take_profit_percent = 0.01
         self.stop_loss_percent = 0.005
         self.qty_step = 0.001
         self.min_qty = 0.001
+        self.steps = InstrumentSteps()
 
 BYBIT_REST_API_URL = "https://api.bybit.com"
 BYBIT_WS_URL = "wss://stream.bybit.com/v5/public/linear"
@@ -90,13 +93,16 @@ def initialize_config():
     lot_size_filter = symbol_info.get('lotSizeFilter', {})
     config.qty_step = float(lot_size_filter.get('qtyStep', '0.001'))
     config.min_qty = float(lot_size_filter.get('minOrderQty', '0.001'))
+    config.steps = InstrumentSteps.from_instrument(symbol_info)
     return config
 
 config = initialize_config()
 
 
-trades = pd.DataFrame(columns=["price", "size", "timestamp", "side"])
+trades = TradeTape(config.trades_window)
+cmi = StreamingCMI(config.cmi_period)
 current_position = {"side": None, "entry_price": None, "size": 0}
+order_task = None  # asyncio.Task opening a position off the event loop, while one is in flight
 SESSION = requests.Session()
 WS_APP = None
 
@@ -138,44 +144,34 @@ setup_logging()
 
 class OrderBook:
     def __init__(self):
-        self.bids = OrderedDict()
-        self.asks = OrderedDict()
+        self.bids = BookSide(descending=True, depth=config.imbalance_levels)
+        self.asks = BookSide(depth=config.imbalance_levels)
         self.last_update_time = None
 
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+
     def update(self, data):
         try:
             self.last_update_time = data.get("ts", time.time()) / 1000
             if "b" in data:
-                self._update_side(self.bids, data["b"], is_bid=True)
+                self._update_side(self.bids, data["b"])
             if "a" in data:
-                self._update_side(self.asks, data["a"], is_bid=False)
+                self._update_side(self.asks, data["a"])
         except KeyError as e:
             logging.error(f"Key error processing order book update: {e}")
 
-    def _update_side(self, side, updates, is_bid):
+    def _update_side(self, side, updates):
         try:
-            for price, size in updates:
-                price = float(price)
-                size = float(size)
-                if size == 0:
-                    side.pop(price, None)
-                else:
-                    side[price] = size
-
-            items = sorted(side.items(), key=lambda x: (-x[0] if is_bid else x[0]))
-            side.clear()
-            for price, size in items:
-                side[price] = size
+            side.apply(updates)
         except Exception as e:
             logging.error(f"Error updating order book side: {e}")
 
     def calculate_imbalance(self):
         try:
-            bid_levels = list(self.bids.items())[:config.imbalance_levels]
-            ask_levels = list(self.asks.items())[:config.imbalance_levels]
-
-            bid_sum = sum(size for _, size in bid_levels)
-            ask_sum = sum(size for _, size in ask_levels)
+            bid_sum = self.bids.top_sum(config.imbalance_levels)
+            ask_sum = self.asks.top_sum(config.imbalance_levels)
 
             if ask_sum <= 0:
                 return 0 if bid_sum <= 0 else float('inf')
@@ -186,8 +182,8 @@ class OrderBook:
 
     def get_midpoint(self):
         try:
-            best_bid = next(iter(self.bids)) if self.bids else None
-            best_ask = next(iter(self.asks)) if self.asks else None
+            best_bid = self.bids.best()
+            best_ask = self.asks.best()
             if best_bid and best_ask:
                 return (best_bid + best_ask) / 2
             return None
@@ -195,8 +191,9 @@ class OrderBook:
             logging.error(f"Error getting midpoint: {e}")
             return None
 
-    def generate_signal(self):
-        imbalance = self.calculate_imbalance()
+    def generate_signal(self, imbalance=None):
+        if imbalance is None:
+            imbalance = self.calculate_imbalance()
         if imbalance > config.imbalance_threshold_long:
             return "LONG"
         elif imbalance < config.imbalance_threshold_short:
@@ -205,17 +202,14 @@ class OrderBook:
 
 order_book = OrderBook()
 
-def on_message(ws, message):
+def handle_message(msg):
     try:
-        msg = json.loads(message)
         if "topic" in msg:
             logging.debug(f"Received message on topic: {msg['topic']}")
             if "orderbook" in msg["topic"]:
                 process_orderbook_message(msg)
             elif "publicTrade" in msg["topic"]:
                 process_trade_message(msg)
-        elif "event" in msg and msg["event"] == "pong":
-            logging.debug("Pong received")
     except Exception as e:
         logging.error(f"Error processing message: {e}")
 
@@ -223,6 +217,7 @@ def process_orderbook_message(msg):
     try:
         if msg["type"] == "snapshot":
             logging.debug("Processing orderbook snapshot")
+            order_book.clear()
             order_book.update(msg["data"])
         elif msg["type"] == "delta":
             logging.debug("Processing orderbook delta")
@@ -233,54 +228,57 @@ def process_orderbook_message(msg):
         if midpoint is not None:
             logging.info(f"Order Book Midpoint: {midpoint:.4f}, Imbalance: {imbalance:.2f}")
 
-        signal = order_book.generate_signal()
+        signal = order_book.generate_signal(imbalance)
         if signal:
             logging.info(f"Generated {signal} signal at {datetime.now()}")
-            mid_price = order_book.get_midpoint()
-            if mid_price:
-                execute_trade_signal(signal, mid_price)
+            if midpoint:
+                execute_trade_signal(signal, midpoint)
     except Exception as e:
         logging.error(f"Error processing order book message: {e}")
 
 def process_trade_message(msg):
-    global trades
     try:
-        new_trades = []
         for trade in msg["data"]:
-            new_trades.append({
-                "price": float(trade["p"]),
-                "size": float(trade["v"]),
-                "timestamp": float(trade["T"]) / 1000,
-                "side": trade["S"].lower()
-            })
-        update_trades(new_trades)
-    except Exception as e:
-        logging.error(f"Error processing trade message: {e}")
-
-def update_trades(new_trades):
-    global trades
-    try:
-        new_df = pd.DataFrame(new_trades)
-        trades = pd.concat([trades, new_df]).drop_duplicates("timestamp").tail(config.trades_window)
+            price = float(trade["p"])
+            if trades.append(
+                trade.get("i"),
+                price,
+                float(trade["v"]),
+                float(trade["T"]) / 1000,
+                trade["S"].lower(),
+            ):
+                cmi.update(price)
         logging.debug(f"Updated trades. Current count: {len(trades)}")
     except Exception as e:
-        logging.error(f"Error updating trades: {e}")
+        logging.error(f"Error processing trade message: {e}")
 
 def execute_trade_signal(signal, current_price):
-    global current_position
-    global SESSION
-
+    # Runs inside the stream's event loop: the blocking order POST goes to a worker thread
+    global order_task
     if current_position["side"]:
         logging.warning("Existing position active. No new trades.")
         return
+    if order_task is not None and not order_task.done():
+        logging.debug("Order already in flight. Signal ignored.")
+        return
+    order_task = asyncio.get_running_loop().create_task(asyncio.to_thread(open_position, signal, current_price))
+    order_task.add_done_callback(log_order_failure)
+
+def log_order_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Order placement failed: {task.exception()}", exc_info=task.exception())
 
-    amount = calculate_order_size(config.symbol, current_price)
-    if not amount:
+def open_position(signal, current_price):
+    global current_position
+
+    lots = calculate_order_size(config.symbol, current_price)
+    if not lots:
         return
 
+    amount = config.steps.lots_to_qty(lots)
     logging.debug(f"Calculated order amount: {amount}")
     side = "Buy" if signal == "LONG" else "Sell"
-    order = execute_market_order(config.symbol, side, amount)
+    order = execute_market_order(config.symbol, side, lots)
 
     if order and order.get("orderId"):
         current_position.update({
@@ -297,15 +295,12 @@ def calculate_order_size(symbol, price):
             logging.error("Invalid price for order size calculation")
             return None
 
-        raw_qty = config.trade_size_usd / price
-        rounded_qty = round(raw_qty / config.qty_step) * config.qty_step
-
-        if rounded_qty < config.min_qty:
-            logging.error(f"Quantity {rounded_qty} below minimum {config.min_qty}")
+        lots = config.steps.lots_for_notional(config.trade_size_usd, price)
+        if not lots:
+            logging.error(f"Order of {config.trade_size_usd} USD at {price} is below minimum {config.min_qty}")
             return None
 
-        precision = int(round(-np.log10(config.qty_step))) if config.qty_step < 1 else 3
-        return round(rounded_qty, precision)
+        return lots
 
     except Exception as e:
         logging.error(f"Error calculating order size: {e}")
@@ -316,7 +311,7 @@ def generate_bybit_signature(api_secret, params):
     hash = hmac.new(api_secret.encode("utf-8"), param_str.encode("utf-8"), hashlib.sha256)
     return hash.hexdigest()
 
-def execute_market_order(symbol, side, amount):
+def execute_market_order(symbol, side, lots):
     global SESSION
 
     endpoint = "/v5/order/create"
@@ -328,7 +323,7 @@ def execute_market_order(symbol, side, amount):
         "symbol": symbol,
         "side": side,
         "orderType": "Market",
-        "qty": str(amount),
+        "qty": config.steps.format_qty(lots),
         "timeInForce": "GTC",
         "api_key": os.getenv("BYBIT_API_KEY"),
         "timestamp": timestamp,
@@ -340,7 +335,7 @@ def execute_market_order(symbol, side, amount):
 
     for _ in range(3):
         try:
-            response = SESSION.post(url, data=params, headers=headers)
+            response = SESSION.post(url, data=params, headers=headers, timeout=config.order_timeout)
             response.raise_for_status()
             order_response = response.json()
             if order_response['retCode'] == 0:
@@ -361,23 +356,8 @@ def execute_market_order(symbol, side, amount):
     logging.error(f"Failed {side} order after 3 attempts")
     return None
 
-def safe_division(numerator, denominator):
-    return numerator / denominator if denominator != 0 else 0
-
-def calculate_cmi(trades_df):
-    try:
-        if len(trades_df) < config.cmi_period:
-            return np.nan
-
-        price_diff = trades_df["price"].diff()
-        sum_up = price_diff.where(price_diff > 0, 0).rolling(config.cmi_period).sum()
-        sum_down = (-price_diff).where(price_diff < 0, 0).rolling(config.cmi_period).sum()
-
-        total = sum_up + sum_down
-        return safe_division((sum_up - sum_down), total) * 100
-    except Exception as e:
-        logging.error(f"Error calculating CMI: {e}")
-        return np.nan
+def calculate_cmi():
+    return cmi.value
 
 def initialize_exchange():
     global SESSION
@@ -402,48 +382,18 @@ def run_bot():
     global SESSION, WS_APP
     SESSION, WS_APP = initialize_exchange()
 
-    WS_APP = websocket.WebSocketApp(
-        BYBIT_WS_URL,
-        on_open=lambda ws: on_open(ws, config.symbol),
-        on_message=on_message,
-        on_error=lambda ws, e: logging.error(f"WebSocket Error: {e}", exc_info=True),
-        on_close=on_close,
-        on_ping=lambda ws, __: ws.send("ping")
-    )
-
-    threading.Thread(target=keep_alive, args=(WS_APP,), daemon=True).start()
-    threading.Thread(target=periodic_health_check, daemon=True).start()
-
-    WS_APP.run_forever(ping_interval=config.ws_ping_interval)
-
-def on_open(ws, symbol):
-    logging.info(f"WebSocket connection opened for symbol: {symbol}")
-    ws.send(json.dumps({
-        "op": "subscribe",
-        "args": [
-            f"orderbook.{config.order_book_depth}.{symbol}",
-            f"publicTrade.{symbol}"
-        ]
-    }))
-
-def on_close(ws, close_status_code, close_msg):
-    logging.info(f"WebSocket connection closed, status code: {close_status_code}, message: {close_msg}")
-
-def keep_alive(ws_app):
-    while True:
-        time.sleep(config.ws_ping_interval)
-        try:
-            ws_app.send(json.dumps({"op": "ping"}))
-            logging.debug("Ping sent to WebSocket server")
-        except Exception as e:
-            logging.error(f"Error sending ping, attempting to reconnect: {e}")
-            break
+    WS_APP = BybitStream(BYBIT_WS_URL, ping_interval=config.ws_ping_interval, recorder=FrameRecorder.from_env())
+    WS_APP.subscribe(config.symbol, [
+        f"orderbook.{config.order_book_depth}.{config.symbol}",
+        f"publicTrade.{config.symbol}"
+    ], handle_message)
+    asyncio.run(WS_APP.run(periodic_health_check()))
 
-def periodic_health_check():
+async def periodic_health_check():
     while True:
-        logging.info(f"Health Check - Trades Data Size: {trades.memory_usage().sum() / 1024:.2f} KB, Position Side: {current_position['side']}")
+        logging.info(f"Health Check - Trades Data Size: {trades.nbytes / 1024:.2f} KB, Position Side: {current_position['side']}")
         logging.debug(f"Order Book Bid Depth: {len(order_book.bids)}, Ask Depth: {len(order_book.asks)}")
-        time.sleep(60)
+        await asyncio.sleep(60)
 
 if __name__ == "__main__":
     logging.info(f"{Fore.CYAN}Starting requests-based Bybit USDT Futures trading bot...{Style.RESET_ALL}")
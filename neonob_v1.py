@@ -1,18 +1,18 @@
 """Simplified Bybit Futures Trading Bot - No Symbol Validation - Colorized"""
 
-import json
 import logging
 import os
 import sys
 import time
-import threading
-import websocket
+import asyncio
 import pandas as pd
 import ccxt
 from dotenv import load_dotenv
 from collections import OrderedDict
 from datetime import datetime
 from colorama import Fore, Style, init
+from bybitws import BybitStream
+from wsrecord import FrameRecorder
 
 init(autoreset=True)
 
@@ -83,10 +83,10 @@ class OrderBook:
         self.asks = OrderedDict()
         self.last_update = None
 
-    def update(self, data):
+    def update(self, data, snapshot=False):
         """Update order book with new data."""
         try:
-            if data.get("type") == "snapshot":
+            if snapshot:
                 self.bids.clear()
                 self.asks.clear()
 
@@ -132,68 +132,30 @@ class OrderBook:
             logging.error(f"Mid price calculation error: {e}")
             return None
 
-class WebSocketManager(threading.Thread):
-    """Manages WebSocket connection and message processing."""
+class WebSocketManager:
+    """Manages the stream subscription and message processing."""
     def __init__(self, order_book, symbol):
-        super().__init__(daemon=True)
-        self.ws = None
-        self.running = True
         self.order_book = order_book
         self.symbol = symbol
-        self.connect()
-
-    def connect(self):
-        """Establish WebSocket connection."""
-        self.ws = websocket.WebSocketApp(
-            BYBIT_WS_URL,
-            on_open=self.on_open,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close
-        )
+        self.stream = BybitStream(BYBIT_WS_URL, ping_interval=config.ws_ping_interval, recorder=FrameRecorder.from_env())
+        self.stream.subscribe(symbol, [
+            f"orderbook.{config.order_book_depth}.{symbol}",
+            f"publicTrade.{symbol}"
+        ], self.on_message)
 
     def run(self):
-        """Main WebSocket loop with automatic reconnection."""
-        while self.running:
-            try:
-                self.ws.run_forever(ping_interval=config.ws_ping_interval, ping_timeout=10)
-            except Exception as e:
-                logging.error(f"WebSocket error: {e}")
-            if self.running:
-                logging.info("Attempting to reconnect...")
-                time.sleep(5)
-                self.connect()
-
-    def on_open(self, ws):
-        """Handle WebSocket connection opening."""
-        logging.info("WebSocket connected")
-        self.subscribe_to_feeds()
+        """Main stream loop; heartbeats and reconnection happen inside the event loop."""
+        logging.info(f"Subscribing to market data feeds for {self.symbol}")
+        asyncio.run(self.stream.run())
 
-    def subscribe_to_feeds(self):
-        """Subscribe to market data feeds."""
+    def on_message(self, data):
+        """Process decoded stream messages."""
         try:
-            subscribe_msg = {
-                "op": "subscribe",
-                "args": [
-                    f"orderbook.{config.order_book_depth}.{self.symbol}",
-                    f"publicTrade.{self.symbol}"
-                ]
-            }
-            self.ws.send(json.dumps(subscribe_msg))
-            logging.info(f"Subscribed to market data feeds for {self.symbol}")
-        except Exception as e:
-            logging.error(f"Subscription error: {e}")
-
-    def on_message(self, ws, message):
-        """Process incoming WebSocket messages."""
-        try:
-            data = json.loads(message)
-            if "topic" in data:
-                if "orderbook" in data["topic"]:
-                    self.order_book.update(data["data"])
-                    self.check_trading_signals()
-                elif "trade" in data["topic"]:
-                    self.process_trade(data["data"])
+            if "orderbook" in data["topic"]:
+                self.order_book.update(data["data"], snapshot=data.get("type") == "snapshot")
+                self.check_trading_signals()
+            elif "trade" in data["topic"]:
+                self.process_trade(data["data"])
         except Exception as e:
             logging.error(f"Message processing error: {e}")
 
@@ -257,12 +219,6 @@ class WebSocketManager(threading.Thread):
         except Exception as e:
             logging.error(f"Trade processing error: {e}")
 
-    def on_error(self, ws, error):
-        logging.error(f"WebSocket error: {error}")
-
-    def on_close(self, ws, close_code, close_msg):
-        logging.info(f"WebSocket closed (code: {close_code}, message: {close_msg or 'None'})")
-
 def initialize_exchange():
     """Initialize exchange connection with API credentials."""
     global BYBIT
@@ -311,11 +267,7 @@ def main():
         # Initialize order book and WebSocket manager
         order_book = OrderBook()
         ws_manager = WebSocketManager(order_book, config.symbol)
-        ws_manager.start()
-        
-        # Keep main thread alive
-        while True:
-            time.sleep(1)
+        ws_manager.run()
             
     except KeyboardInterrupt:
         logging.info("Shutting down gracefully...")
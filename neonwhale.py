@@ -11,12 +11,24 @@ import time
 from dotenv import load_dotenv
 from typing import Dict, Tuple, List, Union, Optional
 from zoneinfo import ZoneInfo
-from decimal import Decimal, getcontext
 import json
+import asyncio
+import functools
+import threading
+from collections import deque
+from types import SimpleNamespace
 from logging.handlers import RotatingFileHandler
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import ccxt
+from exchange_registry import get_exchange
+from klinecache import KlineCache
+from ohlcvstore import get_store
+from indicator_plan import IndicatorPlan
+from scanner import rank, scan
+from ratelimit import get_limiter
+from psar import parabolic_sar
+from ticks import InstrumentSteps
 
 # Neon Color Scheme
 NEON_GREEN = Fore.LIGHTGREEN_EX
@@ -33,9 +45,6 @@ init(autoreset=True)
 # Load environment variables
 load_dotenv()
 
-# Set Decimal Precision
-getcontext().prec = 10
-
 # API Keys from Environment Variables
 API_KEY = os.getenv("BYBIT_API_KEY")
 API_SECRET = os.getenv("BYBIT_API_SECRET")
@@ -63,6 +72,17 @@ VALID_INTERVALS = ["1m", "3m", "5m", "15m", "30m", "60m", "120m", "240m", "1D",
 
 # HTTP Retry Error Codes
 RETRY_ERROR_CODES = [429, 500, 502, 503, 504]
+SERVER_ERROR_CODES = [500, 502, 503, 504] # 429s are left to the rate limiter
+
+# Connection Pool Settings
+HTTP_POOL_SIZE = int(os.getenv("BYBIT_HTTP_POOL_SIZE", "10"))
+LATENCY_SAMPLE_SIZE = 1000
+
+# Multi-symbol scanner settings
+SCAN_CONCURRENCY = int(os.getenv("BYBIT_SCAN_CONCURRENCY", "8"))
+
+# Indicator settings that are not read from the config file
+INDICATOR_PLAN_PARAMS = {"psar_acceleration": 0.01}
 
 # Ensure Log Directory Exists
 os.makedirs(LOG_DIRECTORY, exist_ok=True)
@@ -169,19 +189,48 @@ def load_config(filepath: str) -> dict:
 CONFIG = load_config(CONFIG_FILE)
 
 
-def create_session() -> requests.Session:
-    """Creates a session with retry mechanism for API requests."""
+def create_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """Creates a keep-alive session with a connection pool and retry mechanism."""
     session = requests.Session()
     retries = Retry(
         total=MAX_API_RETRIES,
         backoff_factor=0.5,
-        status_forcelist=RETRY_ERROR_CODES,
+        status_forcelist=SERVER_ERROR_CODES,
         allowed_methods=["GET", "POST"]
     )
-    session.mount('https://', HTTPAdapter(max_retries=retries))
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
     return session
 
 
+HTTP_SESSION: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+REQUEST_LATENCIES = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+
+def get_session() -> requests.Session:
+    """Returns the shared pooled session, creating it on first use."""
+    global HTTP_SESSION
+    if HTTP_SESSION is None:
+        with _session_lock:
+            if HTTP_SESSION is None:
+                HTTP_SESSION = create_session()
+    return HTTP_SESSION
+
+
+def latency_stats() -> dict:
+    """Summarizes recent Bybit request latencies in milliseconds."""
+    if not REQUEST_LATENCIES:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0}
+    samples = np.fromiter(REQUEST_LATENCIES, dtype=float) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+    }
+
+
 def setup_logger(symbol: str) -> logging.Logger:
     """Sets up a logger for the given symbol."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -205,50 +254,65 @@ def setup_logger(symbol: str) -> logging.Logger:
 
 
 def bybit_request(method: str, endpoint: str, params: Optional[dict] = None, logger: Optional[logging.Logger] = None) -> Optional[dict]:
-    """Sends a signed request to Bybit API with retries."""
-    session = create_session()
+    """Sends a signed request to Bybit API over the shared session, paced by the shared rate limiter."""
+    session = get_session()
+    limiter = get_limiter()
+    params = params or {}
     try:
-        params = params or {}
-        timestamp = str(int(datetime.now(TIMEZONE).timestamp() * 1000))
-        signature_params = params.copy()
-        signature_params['timestamp'] = timestamp
-        param_str = "&".join(f"{key}={value}" for key, value in sorted(signature_params.items()))
-        signature = hmac.new(API_SECRET.encode(), param_str.encode(), hashlib.sha256).hexdigest()
-        headers = {
-            "X-BAPI-API-KEY": API_KEY,
-            "X-BAPI-TIMESTAMP": timestamp,
-            "X-BAPI-SIGN": signature,
-            "Content-Type": "application/json"
-        }
-        url = f"{BASE_URL}{endpoint}"
-        request_kwargs = {
-            'method': method,
-            'url': url,
-            'headers': headers,
-            'timeout': 10
-        }
-        if method == "GET":
-            request_kwargs['params'] = params
-        elif method == "POST":
-            request_kwargs['json'] = params
-
-        response = session.request(**request_kwargs)
-        response.raise_for_status()
-        json_response = response.json()
-        if json_response and json_response.get("retCode") == 0:
-            return json_response
-        else:
+        for attempt in range(MAX_API_RETRIES + 1):
+            waited = limiter.acquire(endpoint)
+            timestamp = str(int(datetime.now(TIMEZONE).timestamp() * 1000))
+            signature_params = params.copy()
+            signature_params['timestamp'] = timestamp
+            param_str = "&".join(f"{key}={value}" for key, value in sorted(signature_params.items()))
+            signature = hmac.new(API_SECRET.encode(), param_str.encode(), hashlib.sha256).hexdigest()
+            headers = {
+                "X-BAPI-API-KEY": API_KEY,
+                "X-BAPI-TIMESTAMP": timestamp,
+                "X-BAPI-SIGN": signature,
+                "Content-Type": "application/json"
+            }
+            url = f"{BASE_URL}{endpoint}"
+            request_kwargs = {
+                'method': method,
+                'url': url,
+                'headers': headers,
+                'timeout': 10
+            }
+            if method == "GET":
+                request_kwargs['params'] = params
+            elif method == "POST":
+                request_kwargs['json'] = params
+
+            started = time.perf_counter()
+            response = session.request(**request_kwargs)
+            elapsed = time.perf_counter() - started
+            REQUEST_LATENCIES.append(elapsed)
+            if logger:
+                logger.debug(f"{method} {endpoint} took {elapsed * 1000:.1f} ms (queued {waited * 1000:.1f} ms)")
+            json_response = response.json() if response.ok else None
+            ret_code = json_response.get("retCode") if json_response else None
+            if limiter.observe(endpoint, response.headers, response.status_code, ret_code):
+                if logger:
+                    logger.warning(f"{NEON_YELLOW}Rate limited on {endpoint}. Retry {attempt + 1}/{MAX_API_RETRIES} once the limit resets...{RESET}")
+                continue
+            response.raise_for_status()
+            if json_response and ret_code == 0:
+                return json_response
             if logger:
-                logger.error(f"{NEON_RED}Bybit API error: {json_response.get('retCode')} - {json_response.get('retMsg')}{RESET}")
+                logger.error(f"{NEON_RED}Bybit API error: {ret_code} - {json_response.get('retMsg') if json_response else response.text}{RESET}")
             return None
 
     except requests.exceptions.RequestException as e:
         if logger:
             logger.error(f"{NEON_RED}API request failed: {e}{RESET}")
         return None
+    if logger:
+        logger.error(f"{NEON_RED}Max retries exceeded for endpoint: {endpoint}{RESET}")
+    return None
 
 
-def fetch_current_price(symbol: str, logger: logging.Logger) -> Union[Decimal, None]:
+def fetch_current_price(symbol: str, logger: logging.Logger) -> Union[float, None]:
     """Fetches the current price for a given symbol."""
     endpoint = "/v5/market/tickers"
     params = {"category": "linear", "symbol": symbol}
@@ -264,7 +328,7 @@ def fetch_current_price(symbol: str, logger: logging.Logger) -> Union[Decimal, N
                 logger.error(f"{NEON_RED}No lastPrice in ticker data{RESET}")
                 return None
             try:
-                return Decimal(last_price_str)
+                return float(last_price_str)
             except Exception as e:
                 logger.error(f"{NEON_RED}Error parsing last price: {e}{RESET}")
                 return None
@@ -272,11 +336,13 @@ def fetch_current_price(symbol: str, logger: logging.Logger) -> Union[Decimal, N
     return None
 
 
-def fetch_klines(symbol: str, interval: str, limit: int = 200, logger: logging.Logger = None) -> pd.DataFrame:
+def fetch_klines(symbol: str, interval: str, limit: int = 200, logger: logging.Logger = None, start: Optional[int] = None) -> pd.DataFrame:
     """Fetches kline data for a symbol and interval."""
     try:
         endpoint = "/v5/market/kline"
         params = {"symbol": symbol, "interval": interval, "limit": limit, "category": "linear"}
+        if start is not None:
+            params["start"] = start
         response = bybit_request("GET", endpoint, params, logger)
         if (
             response
@@ -312,12 +378,15 @@ def fetch_klines(symbol: str, interval: str, limit: int = 200, logger: logging.L
         return pd.DataFrame()
 
 
+KLINE_CACHE = KlineCache(fetch_klines, limit=250, store=get_store())
+
+
 def fetch_orderbook(symbol: str, limit: int, logger: logging.Logger) -> Optional[dict]:
-    """Fetches orderbook data for a symbol using ccxt."""
+    """Fetches orderbook data for a symbol using the shared ccxt exchange."""
     retry_count = 0
-    exchange = ccxt.bybit()
     while retry_count <= MAX_API_RETRIES:
         try:
+            exchange = get_exchange()
             orderbook_data = exchange.fetch_order_book(symbol, limit=limit)
             if orderbook_data:
                 return orderbook_data
@@ -345,14 +414,10 @@ def fetch_orderbook(symbol: str, limit: int, logger: logging.Logger) -> Optional
     return None
 
 
-def get_account_balance(api_key: str, api_secret: str, logger: logging.Logger) -> Optional[Decimal]:
+def get_account_balance(api_key: str, api_secret: str, logger: logging.Logger) -> Optional[float]:
     """Fetches account balance from Bybit."""
-    exchange = ccxt.bybit({
-        'apiKey': api_key,
-        'secret': api_secret,
-        'options': {'defaultType': 'spot'}
-    })
     try:
+        exchange = get_exchange('spot', api_key, api_secret)
         balance = exchange.fetch_balance()
         return balance['USDT']['total']
     except ccxt.ExchangeError as e:
@@ -366,24 +431,36 @@ def get_account_balance(api_key: str, api_secret: str, logger: logging.Logger) -
         return None
 
 
-def calculate_position_size(account_balance: Decimal, atr_value: float, price_change_threshold: float, account_risk_percent: float, current_price_decimal: Decimal) -> Decimal:
-    """Calculates position size based on account balance and risk parameters."""
-    if not atr_value or atr_value == 0:
-        return Decimal('0')
+INSTRUMENT_STEPS: Dict[str, InstrumentSteps] = {}
 
-    risk_amount = account_balance * Decimal(str(account_risk_percent))
-    stop_loss_distance = Decimal(str(price_change_threshold * atr_value))
-    if stop_loss_distance == 0:
-        return Decimal('0')
 
-    position_size = risk_amount / stop_loss_distance
-    position_size_contracts = position_size / current_price_decimal
+def fetch_instrument_steps(symbol: str, logger: logging.Logger) -> InstrumentSteps:
+    """Tick size and lot step for a linear symbol, fetched once per process."""
+    steps = INSTRUMENT_STEPS.get(symbol)
+    if steps is not None:
+        return steps
+    response = bybit_request("GET", "/v5/market/instruments-info", {"category": "linear", "symbol": symbol}, logger)
+    items = (response or {}).get("result", {}).get("list", [])
+    if not items:
+        logger.warning(f"{NEON_YELLOW}No instrument info for {symbol}, sizing with a 0.001 lot step.{RESET}")
+        return InstrumentSteps()
+    steps = INSTRUMENT_STEPS[symbol] = InstrumentSteps.from_instrument(items[0])
+    return steps
 
-    # Consider adjusting contract size based on minimum trade sizes and contract details for the exchange
-    return position_size_contracts.quantize(Decimal('0.001')) # Example quantization
+
+def calculate_position_size(account_balance: float, atr_value: float, price_change_threshold: float, account_risk_percent: float, current_price: float, steps: Optional[InstrumentSteps] = None) -> float:
+    """Calculates position size based on account balance and risk parameters, in whole lots of the instrument."""
+    stop_loss_distance = price_change_threshold * atr_value if atr_value else 0.0
+    if not stop_loss_distance or np.isnan(stop_loss_distance):
+        return 0.0
+
+    risk_amount = float(account_balance) * account_risk_percent
+    steps = steps or InstrumentSteps()
+    lots = steps.lots_for_notional(risk_amount / stop_loss_distance, float(current_price))
+    return steps.lots_to_qty(lots)
 
 
-def analyze_orderbook_imbalance(orderbook_data: dict, price_change_threshold: float, order_book_wall_threshold_multiplier: float, order_book_depth_to_check: int, current_price: Decimal, logger: logging.Logger) -> float:
+def analyze_orderbook_imbalance(orderbook_data: dict, price_change_threshold: float, order_book_wall_threshold_multiplier: float, order_book_depth_to_check: int, current_price: float, logger: logging.Logger) -> float:
     """Analyzes order book imbalance for signal confirmation."""
     try:
         bids = orderbook_data['bids'][:order_book_depth_to_check]
@@ -407,8 +484,11 @@ def confirm_signal_with_orderbook(signal, current_price, orderbook_data, config:
     """Confirms or rejects a signal based on orderbook conditions."""
     order_book_wall_threshold_multiplier = config['order_book_wall_threshold_multiplier']
     order_book_depth_to_check = config['order_book_depth_to_check']
+    if not orderbook_data or not orderbook_data.get('bids') or not orderbook_data.get('asks'):
+        return signal  # Nothing to confirm against
     bids = orderbook_data['bids'][:order_book_depth_to_check]
     asks = orderbook_data['asks'][:order_book_depth_to_check]
+    current_price = float(current_price)
 
     # Check for resistance wall for SELL signals
     resistance_level = current_price * (1 + 0.001)
@@ -430,6 +510,25 @@ def confirm_signal_with_orderbook(signal, current_price, orderbook_data, config:
 class TradingAnalyzer:
     """Analyzes trading data and generates scalping signals."""
 
+    # Indicator plan output -> key reported in indicator_values
+    PLAN_VALUE_KEYS = {
+        "ema_short": "EMA_short",
+        "ema_long": "EMA_long",
+        "momentum": "Momentum",
+        "cci": "CCI",
+        "wr": "Williams_R",
+        "mfi": "MFI",
+        "vwap": "VWAP",
+        "psar": "PSAR",
+        "sma_10": "SMA_10",
+        "stoch_k": "StochRSI_K",
+        "stoch_d": "StochRSI_D",
+        "rsi": "RSI",
+        "bb_upper": "BB_Upper",
+        "bb_mid": "BB_Middle",
+        "bb_lower": "BB_Lower",
+    }
+
     def __init__(self, df: pd.DataFrame, logger: logging.Logger, config: dict, symbol: str, interval: str):
         """Initializes TradingAnalyzer with OHLCV data, logger, and configuration."""
         self.df = df
@@ -439,11 +538,31 @@ class TradingAnalyzer:
         self.config = config
         self.signal = None
         self.weight_sets = config["weight_sets"]
-        self.user_defined_weights = self.weight_sets["scalping"]
+        self.user_defined_weights = SimpleNamespace(**self.weight_sets["scalping"])
         self.symbol = symbol
         self.interval = interval
         self.indicator_values = {}
+        self.indicator_series = {}
         self.scalping_signals = {"BUY": 0, "SELL": 0}
+        self.signal_score = 0.0
+
+    def calculate_indicators(self) -> Dict[str, np.ndarray]:
+        """Calculates every enabled indicator (plus ATR for sizing) in one pass over the frame."""
+        plan = IndicatorPlan.from_config(self.config, params=INDICATOR_PLAN_PARAMS, extra=("atr",))
+        try:
+            self.indicator_series = plan.evaluate(self.df)
+        except KeyError as e:
+            self.logger.error(f"{NEON_RED}Indicator calculation error: Missing column {e}{RESET}")
+            self.indicator_series = {}
+            return self.indicator_series
+
+        for name, key in self.PLAN_VALUE_KEYS.items():
+            values = self.indicator_series.get(name)
+            if values is not None and len(values):
+                self.indicator_values[key] = values[-1]
+        if "volume_ma" in self.indicator_series:
+            self.df["volume_ma"] = self.indicator_series["volume_ma"]
+        return self.indicator_series
 
     def calculate_sma(self, window: int) -> pd.Series:
         """Calculates Simple Moving Average (SMA)."""
@@ -457,18 +576,12 @@ class TradingAnalyzer:
 
     def calculate_ema_alignment(self) -> float:
         """Calculates EMA alignment score."""
-        ema_short = self.calculate_ema(self.config["ema_short_period"])
-        ema_long = self.calculate_ema(self.config["ema_long_period"])
-        if ema_short.empty or ema_long.empty:
-            return 0.0
-
-        latest_short_ema = ema_short.iloc[-1]
-        latest_long_ema = ema_long.iloc[-1]
+        if "EMA_short" not in self.indicator_values:
+            self.calculate_indicators()
+        latest_short_ema = self.indicator_values.get("EMA_short", np.nan)
+        latest_long_ema = self.indicator_values.get("EMA_long", np.nan)
         current_price = self.df["close"].iloc[-1]
 
-        self.indicator_values["EMA_short"] = latest_short_ema
-        self.indicator_values["EMA_long"] = latest_long_ema
-
         if latest_short_ema > latest_long_ema and current_price > latest_short_ema:
             return 1.0
         elif latest_short_ema < latest_long_ema and current_price < latest_short_ema:
@@ -587,38 +700,8 @@ class TradingAnalyzer:
 
     def _calculate_psar(self, acceleration=0.01, max_acceleration=0.2) -> pd.Series:
         """Internal PSAR calculation."""
-        psar = pd.Series(index=self.df.index, dtype="float64")
-        psar.iloc[0] = self.df["low"].iloc[0]
-
-        trend = 1
-        ep = self.df["high"].iloc[0]
-        af = acceleration
-
-        for i in range(1, len(self.df)):
-            if trend == 1:
-                psar.iloc[i] = psar.iloc[i-1] + af * (ep - psar.iloc[i-1])
-                if self.df["low"].iloc[i] < psar.iloc[i]:
-                    trend = -1
-                    psar.iloc[i] = ep
-                    ep = self.df["low"].iloc[i]
-                    af = acceleration
-                else:
-                    if self.df["high"].iloc[i] > ep:
-                        ep = self.df["high"].iloc[i]
-                        af = min(af + acceleration, max_acceleration)
-
-            elif trend == -1:
-                psar.iloc[i] = psar.iloc[i-1] + af * (ep - psar.iloc[i-1])
-                if self.df["high"].iloc[i] > psar.iloc[i]:
-                    trend = 1
-                    psar.iloc[i] = ep
-                    ep = self.df["high"].iloc[i]
-                    af = acceleration
-                else:
-                    if self.df["low"].iloc[i] < ep:
-                        ep = self.df["low"].iloc[i]
-                        af = min(af + acceleration, max_acceleration)
-        return psar
+        psar = parabolic_sar(self.df["high"], self.df["low"], acceleration, max_acceleration)
+        return pd.Series(psar, index=self.df.index)
 
     def calculate_sma_10(self) -> pd.Series:
         """Calculates 10-period Simple Moving Average (SMA_10)."""
@@ -709,7 +792,7 @@ class TradingAnalyzer:
             self.logger.error(f"{NEON_RED}Bollinger Bands calculation error: {e}{RESET}")
             return pd.DataFrame()
 
-    def _generate_scalping_signal(self, current_price: Decimal, orderbook_data: dict) -> str:
+    def _generate_scalping_signal(self, current_price: float, orderbook_data: dict) -> str:
         """Generates scalping signals based on indicators and orderbook."""
         signal_score = 0
 
@@ -724,7 +807,7 @@ class TradingAnalyzer:
 
         # Momentum Check
         if self.config["indicators"]["momentum"]:
-            momentum_val = self.calculate_momentum().iloc[-1]
+            momentum_val = self.indicator_values.get("Momentum", np.nan)
             if momentum_val > 0:
                 signal_score += self.user_defined_weights.momentum
                 self.scalping_signals["BUY"] += 1
@@ -818,6 +901,7 @@ class TradingAnalyzer:
                 signal_score -= self.user_defined_weights.vwap
                 self.scalping_signals["SELL"] += 1
 
+        self.signal_score = signal_score
         if signal_score >= self.config["scalping_signal_threshold"]:
             return "BUY"
         elif signal_score <= -self.config["scalping_signal_threshold"]:
@@ -825,7 +909,7 @@ class TradingAnalyzer:
         else:
             return "HOLD"
 
-    def generate_trading_signal(self, current_price: Decimal, orderbook_data: dict) -> str:
+    def generate_trading_signal(self, current_price: float, orderbook_data: dict) -> str:
         """Generates trading signal and confirms with orderbook."""
         self.scalping_signals = {"BUY": 0, "SELL": 0}
         scalping_signal = self._generate_scalping_signal(current_price, orderbook_data)
@@ -841,7 +925,7 @@ def analyze_symbol(symbol: str, config: dict):
     klines_interval = config['interval']
     analysis_interval = str(config['analysis_interval'])
 
-    klines = fetch_klines(symbol, klines_interval, limit=250, logger=logger)
+    klines = KLINE_CACHE.get(symbol, klines_interval, logger)
     if klines.empty:
         logger.error(f"{NEON_RED}Failed to fetch klines for {symbol}. Aborting analysis.{RESET}")
         return
@@ -852,53 +936,28 @@ def analyze_symbol(symbol: str, config: dict):
 
     analyzer = TradingAnalyzer(klines.copy(), logger, config, symbol, klines_interval)
 
-    # Calculate indicators
-    analyzer.df["typical_price"] = (analyzer.df["high"] + analyzer.df["low"] + analyzer.df["close"]) / 3
-    analyzer.df["volume_ma"] = analyzer.calculate_sma(analyzer.config["volume_ma_period"], series=analyzer.df["volume"])
-
-    if config['indicators']['ema_alignment']:
-        analyzer.calculate_ema_alignment()
-    if config['indicators']['momentum']:
-        analyzer.calculate_momentum()
-    if config['indicators']['cci']:
-        analyzer.calculate_cci()
-    if config['indicators']['wr']:
-        analyzer.calculate_williams_r()
-    if config['indicators']['mfi']:
-        analyzer.calculate_mfi()
-    if config['indicators']['vwap']:
-        # Add typical_price calculation before VWAP
-        analyzer.df["typical_price"] = (analyzer.df["high"] + analyzer.df["low"] + analyzer.df["close"]) / 3
-        analyzer.calculate_vwap()
-    if config['indicators']['psar']:
-        analyzer.calculate_psar()
-    if config['indicators']['sma_10']:
-        analyzer.calculate_sma_10()
-    if config['indicators']['stoch_rsi']:
-        analyzer.calculate_stoch_rsi()
-    if config['indicators']['rsi']:
-        analyzer.calculate_rsi()
-    if config['indicators']['bollinger_bands']:
-        analyzer.calculate_bollinger_bands()
-
-    current_price_decimal = fetch_current_price(symbol, logger)
-    if current_price_decimal is None:
+    # Calculate all enabled indicators in one pass, sharing intermediates
+    analyzer.calculate_indicators()
+
+    current_price = fetch_current_price(symbol, logger)
+    if current_price is None:
         logger.error(f"{NEON_RED}Failed to fetch current price for {symbol}. Using last close price for signal generation.{RESET}")
-        current_price_decimal = Decimal(str(klines['close'].iloc[-1]))
+        current_price = float(klines['close'].iloc[-1])
 
-    trading_signal = analyzer.generate_trading_signal(current_price_decimal, orderbook_data)
+    trading_signal = analyzer.generate_trading_signal(current_price, orderbook_data)
 
     account_balance = get_account_balance(API_KEY, API_SECRET, logger) # Fetch account balance
     if account_balance is None:
         logger.error(f"{NEON_RED}Could not fetch account balance, position sizing disabled.{RESET}")
-        position_size = Decimal('0')
+        position_size = 0.0
     else:
-        atr_value = analyzer.calculate_atr(window=analyzer.config['atr_period']).iloc[-1]
-        position_size = calculate_position_size(account_balance, atr_value, config['price_change_threshold'], config['account_risk_percent'], current_price_decimal)
+        atr_value = analyzer.indicator_series["atr"][-1] if "atr" in analyzer.indicator_series else np.nan
+        steps = fetch_instrument_steps(symbol, logger)
+        position_size = calculate_position_size(account_balance, atr_value, config['price_change_threshold'], config['account_risk_percent'], current_price, steps)
 
     output_message = (
         f"\n{NEON_BLUE}--- Scalping Analysis for {symbol} ({klines_interval}) ---{RESET}\n"
-        f"Current Price (JST): {NEON_GREEN}{current_price_decimal}{RESET} - {datetime.now(TIMEZONE).strftime('%Y-%m-%d %H:%M:%S %Z%z')}\n"
+        f"Current Price (JST): {NEON_GREEN}{current_price}{RESET} - {datetime.now(TIMEZONE).strftime('%Y-%m-%d %H:%M:%S %Z%z')}\n"
         f"Scalping Signal: {NEON_GREEN}{trading_signal}{RESET}\n"
         f"Calculated Position Size: {NEON_YELLOW}{position_size} Contracts{RESET}\n"  # Output position size
     )
@@ -911,10 +970,98 @@ def analyze_symbol(symbol: str, config: dict):
     print(output_message)
     logger.info(output_message)
 
+    stats = latency_stats()
+    logger.info(
+        f"HTTP latency over {stats['count']} requests: mean {stats['mean_ms']:.1f} ms, "
+        f"p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms"
+    )
+
+
+def fetch_linear_symbols(logger: logging.Logger, quote_coin: str = "USDT") -> List[str]:
+    """Lists every trading linear perpetual settled in `quote_coin`."""
+    symbols, cursor = [], None
+    while True:
+        params = {"category": "linear", "limit": 1000}
+        if cursor:
+            params["cursor"] = cursor
+        response = bybit_request("GET", "/v5/market/instruments-info", params, logger)
+        if not response:
+            break
+        result = response.get("result", {})
+        symbols += [
+            item["symbol"] for item in result.get("list", [])
+            if item.get("quoteCoin") == quote_coin and item.get("status") == "Trading"
+            and item.get("contractType") == "LinearPerpetual"
+        ]
+        cursor = result.get("nextPageCursor")
+        if not cursor:
+            break
+    return symbols
+
+
+def fetch_symbol_data(symbol: str, config: dict, logger: logging.Logger) -> Optional[tuple]:
+    """Blocking REST fetches for one symbol: (klines, orderbook, current price), or None without klines."""
+    klines = KLINE_CACHE.get(symbol, config['interval'], logger)
+    if klines.empty:
+        logger.error(f"{NEON_RED}Failed to fetch klines for {symbol}.{RESET}")
+        return None
+    orderbook_data = fetch_orderbook(symbol, limit=config['orderbook_limit'], logger=logger)
+    current_price = fetch_current_price(symbol, logger)
+    if current_price is None:
+        current_price = float(klines['close'].iloc[-1])
+    return klines, orderbook_data, current_price
+
+
+def score_symbol(symbol: str, payload: tuple, config: dict) -> dict:
+    """CPU side of a scan: runs TradingAnalyzer on fetched data (executes in a worker process)."""
+    klines, orderbook_data, current_price = payload
+    analyzer = TradingAnalyzer(klines, logging.getLogger(symbol), config, symbol, config['interval'])
+    analyzer.calculate_indicators()
+    signal = analyzer.generate_trading_signal(current_price, orderbook_data)
+    return {
+        "symbol": symbol,
+        "price": current_price,
+        "signal": signal,
+        "score": analyzer.signal_score,
+        "buy": analyzer.scalping_signals["BUY"],
+        "sell": analyzer.scalping_signals["SELL"],
+    }
+
+
+def format_scan_result(result: dict) -> str:
+    if result.get("error"):
+        return f"{NEON_RED}{result['symbol']:<14} error: {result['error']}{RESET}"
+    color = {"BUY": NEON_GREEN, "SELL": NEON_RED}.get(result["signal"], NEON_YELLOW)
+    return (
+        f"{result['symbol']:<14} {color}{result['signal']:<5}{RESET} score {result['score']:+6.2f}  "
+        f"price {result['price']}  (buy {result['buy']} / sell {result['sell']})"
+    )
+
+
+async def scan_symbols(symbols: List[str], config: dict, concurrency: int = SCAN_CONCURRENCY) -> List[dict]:
+    """Scans many symbols concurrently, printing each signal as it lands and returning them ranked."""
+    logger = setup_logger("scanner")
+    results = []
+    started = time.perf_counter()
+    async for result in scan(
+        symbols,
+        lambda symbol: fetch_symbol_data(symbol, config, logger),
+        functools.partial(score_symbol, config=config),
+        concurrency=concurrency,
+    ):
+        results.append(result)
+        print(f"[{len(results)}/{len(symbols)}] {format_scan_result(result)}")
+
+    ranked = rank(results)
+    print(f"\n{NEON_BLUE}--- Ranked signals ({len(symbols)} symbols in {time.perf_counter() - started:.1f}s) ---{RESET}")
+    for position, result in enumerate(ranked, 1):
+        print(f"{position:>3}. {format_scan_result(result)}")
+    return ranked
+
 
 async def main():
     """Main function to run scalping analysis."""
-    symbol = input(f"{NEON_YELLOW}Enter symbol to analyze (e.g., BTCUSDT): {RESET}").upper()
+    symbol = input(f"{NEON_YELLOW}Enter symbol(s) to analyze (e.g., BTCUSDT, or BTCUSDT,ETHUSDT / ALL to scan): {RESET}").upper()
     interval = input(f"{NEON_YELLOW}Enter interval (e.g., 1m, 5m, 15m): {RESET}").lower()
 
     if interval not in VALID_INTERVALS:
@@ -922,8 +1069,18 @@ async def main():
         return
 
     CONFIG['interval'] = interval
-    CONFIG['symbol'] = symbol  # Set symbol in config
-    symbols = [symbol]
+    if symbol.strip() == "ALL":
+        symbols = fetch_linear_symbols(setup_logger("scanner"))
+    else:
+        symbols = [s.strip() for s in symbol.split(",") if s.strip()]
+    if not symbols:
+        print(f"{NEON_RED}No symbols to analyze.{RESET}")
+        return
+    if len(symbols) > 1:
+        print(f"{NEON_CYAN}--- Scanning {len(symbols)} symbols ---{RESET}")
+        await scan_symbols(symbols, CONFIG)
+        return
+    CONFIG['symbol'] = symbols[0]  # Set symbol in config
 
     print(f"{NEON_CYAN}--- Neonta Scalping Bot v1.1 ---{RESET}")  # Version update
     print(f"{NEON_CYAN}--- Analyzing market for scalping opportunities ---{RESET}\n")
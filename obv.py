@@ -1,16 +1,39 @@
 # indicators/obv.py
+import math
 import pandas as pd
-from .base import Indicator
+from .base import Indicator, bar_value
 
 class OBV(Indicator):
     def __init__(self, config: dict = None):
-        super().__init__("obv", config)
+        super().__init__(config or {})
+        self.reset()
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculates the On-Balance Volume (OBV)."""
         df["price_change"] = df["close"].diff()
-        df["volume_change"] = 0
+        df["volume_change"] = 0.0
         df.loc[df["price_change"] > 0, "volume_change"] = df["volume"]
         df.loc[df["price_change"] < 0, "volume_change"] = -df["volume"]
         df["obv"] = df["volume_change"].cumsum()
-        return df[["obv"]].fillna(0) # Return only OBV column and handle initial NaN
\ No newline at end of file
+        return df[["obv"]].fillna(0) # Return only OBV column and handle initial NaN
+
+    def update(self, bar) -> float:
+        """Feeds one bar ('close', 'volume') and returns the running OBV."""
+        close, volume = bar_value(bar, "close"), bar_value(bar, "volume")
+        if self._prev_close is not None:
+            if close > self._prev_close:
+                self._obv += volume
+            elif close < self._prev_close:
+                self._obv -= volume
+        self._prev_close = close
+        return self._obv
+
+    def current(self) -> float:
+        return self._obv if self._prev_close is not None else math.nan
+
+    def reset(self) -> None:
+        self._prev_close = None
+        self._obv = 0.0
+
+    def get_indicator_name(self) -> str:
+        return "OBV"
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""On-disk columnar OHLCV history, appended incrementally and read through np.memmap."""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+HISTORY_ENV = "BYBIT_HISTORY_DIR"
+DEFAULT_ROOT = "history"
+
+COLUMNS = ("open", "high", "low", "close", "volume", "turnover")
+JOURNAL = "journal.npz"
+COVERED = "covered.i8"
+
+# Bybit V5 kline intervals -> ccxt timeframes, so bots and terminals share files
+INTERVAL_ALIASES = {
+    "1": "1m", "3": "3m", "5": "5m", "15": "15m", "30": "30m",
+    "60": "1h", "120": "2h", "240": "4h", "360": "6h", "720": "12h",
+    "D": "1d", "W": "1w", "M": "1M",
+}
+
+
+def store_key(symbol, interval):
+    """('BTC/USDT:USDT', '60') -> ('BTCUSDT', '1h')."""
+    return symbol.split(":")[0].replace("/", "").upper(), INTERVAL_ALIASES.get(str(interval), str(interval))
+
+
+def _to_columns(data):
+    """(start ms int64, {column: float64}) from a kline frame or ccxt rows, sorted with the last duplicate kept."""
+    if isinstance(data, pd.DataFrame):
+        if "start_time" in data.columns:
+            stamps = data["start_time"]
+        elif "timestamp" in data.columns:
+            stamps = data["timestamp"]
+        else:
+            stamps = data.index.to_series()
+        if pd.api.types.is_datetime64_any_dtype(stamps):
+            starts = pd.DatetimeIndex(stamps).as_unit("ms").asi8
+        else:
+            starts = stamps.to_numpy(dtype=np.int64)
+        columns = {col: data[col].to_numpy(dtype=np.float64) if col in data.columns
+                   else np.full(len(data), np.nan) for col in COLUMNS}
+    else:
+        rows = np.asarray(data, dtype=np.float64).reshape(len(data), -1)
+        starts = rows[:, 0].astype(np.int64)
+        columns = {col: rows[:, i + 1] if i + 1 < rows.shape[1] else np.full(len(rows), np.nan)
+                   for i, col in enumerate(COLUMNS)}
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    keep = np.ones(len(starts), dtype=bool)
+    keep[:-1] = starts[1:] != starts[:-1]
+    return starts[keep], {col: np.ascontiguousarray(values[order][keep]) for col, values in columns.items()}
+
+
+def _union(old_starts, old_columns, new_starts, new_columns):
+    """Sorted union of two column sets; rows in the new set win on equal start times."""
+    starts = np.concatenate([new_starts, old_starts])
+    unique, first = np.unique(starts, return_index=True)
+    return unique, {col: np.concatenate([new_columns[col], old_columns[col]])[first] for col in COLUMNS}
+
+
+class OHLCVStore:
+    """Per-symbol/interval candle history as raw little-endian column files.
+
+    Each key lives in ``<root>/<SYMBOL>/<interval>/`` with ``start.i8`` (open
+    time in ms) and one ``<column>.f8`` float64 file per COLUMNS entry; a row's
+    position is its index in every file.  Raw files (rather than .npy) are used
+    because appending then needs no header rewrite, and the row count is just
+    the file size.  Reads map the files with np.memmap, so opening years of 1m
+    candles costs nothing until the rows are touched.
+
+    `append` accepts a kline frame (``start_time`` column, as fetch_klines
+    returns) or ccxt ``fetch_ohlcv`` rows.  Bars newer than the stored tail are
+    appended; bars overlapping the tail (e.g. the still-open candle) are
+    rewritten in place; bars falling inside the history are merged by
+    rewriting the key's files.  Files only ever grow in place, so arrays
+    returned by `columns` stay valid, though their last rows may be updated.
+
+    Writes are crash-consistent.  A pure append is safe by construction: the
+    row count is the shortest column, so a half-finished append is simply
+    not there (and is trimmed on the next write).  Any write that changes
+    stored rows first saves its rows to ``journal.npz`` (written to a temp
+    file and renamed, so it is either complete or absent), applies them, and
+    deletes the journal; a journal found on the next access is replayed, so
+    a crash mid-write never leaves columns torn between old and new rows.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv(HISTORY_ENV) or DEFAULT_ROOT
+        self._lock = threading.RLock()
+
+    def _dir(self, symbol, interval):
+        symbol, interval = store_key(symbol, interval)
+        return os.path.join(self.root, symbol, interval)
+
+    def _length(self, path):
+        sizes = [os.path.getsize(os.path.join(path, name)) // 8
+                 for name in ["start.i8"] + [f"{col}.f8" for col in COLUMNS]
+                 if os.path.exists(os.path.join(path, name))]
+        return min(sizes) if len(sizes) == len(COLUMNS) + 1 else 0
+
+    def _map(self, path, name, dtype, rows):
+        if not rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(path, name), dtype=dtype, mode="r", shape=(rows,))
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+    def keys(self):
+        """(symbol, interval) pairs that have stored candles."""
+        if not os.path.isdir(self.root):
+            return
+        for symbol in sorted(os.listdir(self.root)):
+            symbol_dir = os.path.join(self.root, symbol)
+            if os.path.isdir(symbol_dir):
+                for interval in sorted(os.listdir(symbol_dir)):
+                    if self._length(os.path.join(symbol_dir, interval)):
+                        yield symbol, interval
+
+    def rows(self, symbol, interval):
+        return self._length(self._dir(symbol, interval))
+
+    def first_timestamp(self, symbol, interval):
+        """Open time (ms) of the oldest stored bar, or None."""
+        starts = self.columns(symbol, interval)["start"]
+        return int(starts[0]) if len(starts) else None
+
+    def last_timestamp(self, symbol, interval):
+        """Open time (ms) of the newest stored bar, or None."""
+        starts = self.columns(symbol, interval)["start"]
+        return int(starts[-1]) if len(starts) else None
+
+    def covered(self, symbol, interval):
+        """(n, 2) int64 [first, last] open-time ranges (ms) known to be complete, bars or not.
+
+        Bulk downloads record the windows they fetched here, so ranges the
+        exchange has no bars for (before listing, maintenance gaps) are not
+        requested again.
+        """
+        file = os.path.join(self._dir(symbol, interval), COVERED)
+        if not os.path.exists(file):
+            return np.empty((0, 2), dtype=np.int64)
+        return np.fromfile(file, dtype="<i8").reshape(-1, 2)
+
+    def add_covered(self, symbol, interval, ranges, step):
+        """Merges [first, last] ranges into `covered`; ranges `step` ms apart or closer are joined."""
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+        if not len(ranges):
+            return
+        path = self._dir(symbol, interval)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            ranges = np.concatenate([self.covered(symbol, interval), ranges])
+            ranges = ranges[np.argsort(ranges[:, 0], kind="stable")]
+            merged = [list(ranges[0])]
+            for lo, hi in ranges[1:].tolist():
+                if lo <= merged[-1][1] + step:
+                    merged[-1][1] = max(merged[-1][1], hi)
+                else:
+                    merged.append([lo, hi])
+            file = os.path.join(path, COVERED)
+            np.asarray(merged, dtype="<i8").tofile(file + ".tmp")
+            os.replace(file + ".tmp", file)
+
+    def columns(self, symbol, interval, start=None, end=None):
+        """Read-only memmaps {'start', *COLUMNS} for bars opening in [start, end] (ms, inclusive)."""
+        path = self._dir(symbol, interval)
+        if os.path.exists(os.path.join(path, JOURNAL)):
+            with self._lock:
+                self._recover(path)
+        rows = self._length(path)
+        starts = self._map(path, "start.i8", np.int64, rows)
+        lo = 0 if start is None else int(np.searchsorted(starts, start, side="left"))
+        hi = rows if end is None else int(np.searchsorted(starts, end, side="right"))
+        out = {"start": starts[lo:hi]}
+        for col in COLUMNS:
+            out[col] = self._map(path, f"{col}.f8", np.float64, rows)[lo:hi]
+        return out
+
+    def frame(self, symbol, interval, start=None, end=None, limit=None):
+        """Stored bars as a kline frame (``start_time`` plus COLUMNS), optionally only the last `limit`."""
+        data = self.columns(symbol, interval, start, end)
+        if limit is not None:
+            data = {name: values[-limit:] for name, values in data.items()}
+        df = pd.DataFrame({col: np.array(data[col]) for col in COLUMNS})
+        df.insert(0, "start_time", pd.to_datetime(np.array(data["start"]), unit="ms"))
+        return df
+
+    def ohlcv(self, symbol, interval, limit=None, start=None, end=None):
+        """Stored bars as ccxt ``fetch_ohlcv`` rows: [timestamp ms, open, high, low, close, volume]."""
+        data = self.columns(symbol, interval, start, end)
+        sl = slice(-limit, None) if limit else slice(None)
+        table = np.column_stack([data["start"][sl].astype(np.float64)] + [data[col][sl] for col in COLUMNS[:5]])
+        rows = table.tolist()
+        for row in rows:
+            row[0] = int(row[0])
+        return rows
+
+    def append(self, symbol, interval, data):
+        """Adds or replaces bars for a key and returns the number of stored rows."""
+        if data is None or not len(data):
+            return self.rows(symbol, interval)
+        new_starts, new_columns = _to_columns(data)
+        path = self._dir(symbol, interval)
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            self._recover(path)
+            rows = self._length(path)
+            self._repair(path, rows)
+            starts = self._map(path, "start.i8", np.int64, rows)
+            if rows and new_starts[0] <= starts[-1] and new_starts[-1] < starts[-1]:
+                return self._rewrite(path, rows, new_starts, new_columns)
+            # Everything from the first new bar on is replaced by the union with the new bars
+            cut = int(np.searchsorted(starts, new_starts[0], side="left"))
+            if cut == rows:
+                self._write_rows(path, cut, new_starts, new_columns)
+                return cut + len(new_starts)
+            old = self.columns(symbol, interval, start=int(starts[cut]))
+            new_starts, new_columns = _union(np.array(old["start"]), {c: np.array(old[c]) for c in COLUMNS},
+                                             new_starts, new_columns)
+            self._journal(path, cut, new_starts, new_columns, replace=False)
+            return cut + len(new_starts)
+
+    def _repair(self, path, rows):
+        """Trims columns left longer than the rest by an interrupted append."""
+        for name in ["start.i8"] + [f"{col}.f8" for col in COLUMNS]:
+            file = os.path.join(path, name)
+            if os.path.exists(file) and os.path.getsize(file) != rows * 8:
+                os.truncate(file, rows * 8)
+
+    @staticmethod
+    def _write_at(path, name, row, values):
+        file = os.path.join(path, name)
+        with open(file, "r+b" if os.path.exists(file) else "wb") as f:
+            f.seek(row * 8)
+            f.write(np.ascontiguousarray(values, dtype="<i8" if name.endswith(".i8") else "<f8").tobytes())
+            f.truncate()  # Rows after the written block are replaced too
+
+    def _write_rows(self, path, row, starts, columns):
+        self._write_at(path, "start.i8", row, starts)
+        for col in COLUMNS:
+            self._write_at(path, f"{col}.f8", row, columns[col])
+
+    def _rewrite(self, path, rows, new_starts, new_columns):
+        old = {name: np.array(self._map(path, f"{name}.f8", np.float64, rows)) for name in COLUMNS}
+        starts, columns = _union(np.array(self._map(path, "start.i8", np.int64, rows)), old, new_starts, new_columns)
+        self._journal(path, 0, starts, columns, replace=True)
+        return len(starts)
+
+    def _journal(self, path, row, starts, columns, replace):
+        """Saves rows [row:] as the journal, applies them and drops the journal."""
+        tmp = os.path.join(path, JOURNAL + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, row=np.int64(row), replace=np.bool_(replace), start=starts, **columns)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(path, JOURNAL))
+        self._recover(path)
+
+    def _recover(self, path):
+        """Applies (or re-applies, after a crash) a pending journal; every step is idempotent."""
+        journal = os.path.join(path, JOURNAL)
+        if not os.path.exists(journal):
+            return
+        with np.load(journal) as saved:
+            row, replace = int(saved["row"]), bool(saved["replace"])
+            starts, columns = saved["start"], {col: saved[col] for col in COLUMNS}
+        if replace:
+            # Write side files and swap them in, so existing memmaps keep the old inode
+            for name, values in [("start.i8", starts)] + [(f"{col}.f8", columns[col]) for col in COLUMNS]:
+                file = os.path.join(path, name)
+                values.astype("<i8" if name.endswith(".i8") else "<f8").tofile(file + ".tmp")
+                os.replace(file + ".tmp", file)
+        else:
+            self._write_rows(path, row, starts, columns)
+        os.remove(journal)
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_store():
+    """Returns the process-wide store rooted at $BYBIT_HISTORY_DIR (default ./history)."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = OHLCVStore()
+        return _default_store
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    bars = 1_000_000
+    rng = np.random.default_rng(5)
+    close = 30_000 * np.exp(np.cumsum(rng.normal(0, 0.0008, bars)))
+    df = pd.DataFrame({"start_time": pd.date_range("2023-01-01", periods=bars, freq="1min"),
+                       "open": close, "high": close * 1.001, "low": close * 0.999, "close": close,
+                       "volume": rng.uniform(1, 10, bars), "turnover": np.nan})
+    with tempfile.TemporaryDirectory() as root:
+        store = OHLCVStore(root)
+        started = time.perf_counter()
+        for chunk in range(0, bars, 100_000):
+            store.append("BTCUSDT", "1", df.iloc[chunk:chunk + 100_000])
+        write_s = time.perf_counter() - started
+
+        # Still-open candle replaced in place, then a late page merged into the middle
+        store.append("BTCUSDT", "1", df.tail(1).assign(close=1.0))
+        assert store.columns("BTCUSDT", "1m")["close"][-1] == 1.0 and store.rows("BTCUSDT", "1") == bars
+        store.append("BTCUSDT", "1", df.iloc[10:20].assign(volume=-1.0))
+        assert (store.frame("BTCUSDT", "1").volume.iloc[10:20] == -1).all() and store.rows("BTCUSDT", "1") == bars
+
+        started = time.perf_counter()
+        closes = store.columns("BTCUSDT", "1")["close"]
+        open_s = time.perf_counter() - started
+        started = time.perf_counter()
+        mean = float(closes.mean())
+        scan_s = time.perf_counter() - started
+        started = time.perf_counter()
+        tail = store.ohlcv("BTCUSDT", "1m", limit=1000)
+        tail_s = time.perf_counter() - started
+        print(f"wrote {bars:,} bars in {write_s * 1e3:.0f} ms; memmap open {open_s * 1e3:.2f} ms, "
+              f"full close scan {scan_s * 1e3:.1f} ms (mean {mean:,.0f}), last 1000 rows {tail_s * 1e3:.2f} ms, "
+              f"{len(tail)} rows")
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Grid and random parameter search over backtest strategies on a process pool."""
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import STRATEGIES, run_backtest
+
+# Search spaces for the built-in strategies; every value is a list of candidates
+DEFAULT_SPACES = {
+    "ema": {"fast": list(range(5, 31, 1)), "slow": list(range(20, 201, 5))},
+    "macd": {"fast": list(range(6, 21, 2)), "slow": list(range(20, 61, 4)), "signal": [5, 7, 9, 12]},
+    "rsi": {"period": [7, 10, 14, 21, 28], "lower": [20, 25, 30, 35], "upper": [65, 70, 75, 80]},
+    "ma_rsi": {"fast": [5, 10, 20], "slow": [30, 50, 100, 200], "rsi_period": [7, 14, 21],
+               "overbought": [60, 65, 70, 75], "oversold": [25, 30, 35, 40]},
+}
+
+SUMMARY_KEYS = ("tot_ret_perc", "max_dd_perc", "sharpe", "n_trades", "win_rate_perc")
+
+
+def param_grid(space):
+    """Every combination of a {name: [candidates]} space, as a list of dicts."""
+    names = list(space)
+    return [dict(zip(names, values, strict=True)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_params(space, n, seed=None):
+    """`n` distinct random combinations from the space (the whole grid if it is smaller)."""
+    grid_size = int(np.prod([len(values) for values in space.values()]))
+    if n >= grid_size:
+        return param_grid(space)
+    rng = random.Random(seed)
+    picks = set()
+    while len(picks) < n:
+        picks.add(tuple(rng.choice(values) for values in space.values()))
+    return [dict(zip(space, values, strict=True)) for values in picks]
+
+
+def best_params(table, space):
+    """Top row of an optimize() table as a params dict, with the space's own value types."""
+    row = table.iloc[0]
+    return {name: type(values[0])(row[name]) for name, values in space.items()}
+
+
+# --- Worker side: the OHLCV frame is attached once per process from shared memory ---
+
+_FRAME = None
+_BLOCKS = []
+
+
+def _attach(block_name, shape, columns, index_name):
+    global _FRAME
+    block = shared_memory.SharedMemory(name=block_name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    index = None
+    if index_name:
+        index_block = shared_memory.SharedMemory(name=index_name)
+        index = pd.DatetimeIndex(np.ndarray(shape[0], dtype="datetime64[ns]", buffer=index_block.buf))
+        _BLOCKS.append(index_block)
+    _BLOCKS.append(block)  # The views above are only valid while the blocks stay open
+    _FRAME = pd.DataFrame(values, columns=columns, index=index, copy=False)
+
+
+def _evaluate(task):
+    strategy, params, options = task
+    try:
+        result = run_backtest(_FRAME, strategy, params, **options)
+    except ValueError as e:
+        return {**params, "error": str(e)}
+    return {**params, **{key: result[key] for key in SUMMARY_KEYS}}
+
+
+def _share(values):
+    block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+    return block
+
+
+def optimize(df, strategy="ema", space=None, n_random=None, metric="sharpe", workers=None,
+             out=None, seed=None, **options):
+    """Backtests `strategy` for every parameter set in `space` and returns them ranked by `metric`.
+
+    `space` maps parameter names to candidate lists (DEFAULT_SPACES for the
+    built-in strategies); with `n_random` only that many random combinations are
+    tried instead of the full grid.  The OHLCV columns are copied once into a
+    shared-memory block that every worker maps, so tasks carry only their
+    parameters.  A custom strategy must be a module-level function so workers
+    can import it.  `options` are passed to run_backtest (fee, slippage, rm,
+    ...).  With `out` the ranked table is also written as CSV.
+    """
+    if space is None:
+        if not isinstance(strategy, str) or strategy not in DEFAULT_SPACES:
+            raise ValueError("A parameter space is required for custom strategies.")
+        space = DEFAULT_SPACES[strategy]
+    candidates = random_params(space, n_random, seed) if n_random else param_grid(space)
+    # A fast period at or above the slow one is the same crossover mirrored; skip it
+    candidates = [p for p in candidates if not ("fast" in p and "slow" in p and p["fast"] >= p["slow"])]
+
+    columns = [col for col in ("open", "high", "low", "close", "volume") if col in df.columns]
+    values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64))
+    blocks = [_share(values)]
+    index_name = None
+    if isinstance(df.index, pd.DatetimeIndex):
+        blocks.append(_share(df.index.as_unit("ns").asi8))
+        index_name = blocks[-1].name
+    options.setdefault("with_trades", True)
+    tasks = [(strategy, params, options) for params in candidates]
+    workers = workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(blocks[0].name, values.shape, columns, index_name)) as pool:
+            rows = list(pool.map(_evaluate, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    table = pd.DataFrame(rows)
+    if metric in table.columns:
+        table = table.sort_values(metric, ascending=(metric == "max_dd_perc"), na_position="last")
+    table = table.reset_index(drop=True)
+    if out:
+        table.to_csv(out, index=False)
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Rank strategy parameters by backtest.")
+    parser.add_argument("--strategy", default="ema", choices=list(STRATEGIES))
+    parser.add_argument("--csv", help="OHLCV CSV with timestamp,open,high,low,close,volume (default: synthetic)")
+    parser.add_argument("--bars", type=int, default=200_000, help="synthetic bars when no --csv is given")
+    parser.add_argument("--random", type=int, default=None, help="random combinations instead of the full grid")
+    parser.add_argument("--metric", default="sharpe", choices=list(SUMMARY_KEYS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="write the ranked table to this CSV")
+    args = parser.parse_args()
+
+    if args.csv:
+        df = pd.read_csv(args.csv)
+        unit = "ms" if np.issubdtype(df["timestamp"].dtype, np.number) else None
+        df = df.set_index(pd.to_datetime(df.pop("timestamp"), unit=unit))
+    else:
+        rng = np.random.default_rng(3)
+        close = 30_000 * np.exp(np.cumsum(rng.normal(0, 0.004, args.bars)))
+        df = pd.DataFrame({"close": close}, index=pd.date_range("2015-01-01", periods=args.bars, freq="1h"))
+
+    started = time.perf_counter()
+    ranked = optimize(df, args.strategy, n_random=args.random, metric=args.metric, workers=args.workers, out=args.out)
+    elapsed = time.perf_counter() - started
+    print(f"{len(ranked)} parameter sets over {len(df):,} bars in {elapsed:.1f}s "
+          f"({args.workers or os.cpu_count()} workers)")
+    print(ranked.head(10).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
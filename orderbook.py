@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""Sorted price-level storage shared by the order-book bots."""
+from bisect import bisect_left
+
+
+class BookSide:
+    """One side of an order book kept sorted best-first.
+
+    Prices live in a sorted key list (negated for bids so index 0 is always the
+    best level) with sizes in a parallel list.  Deltas are applied with bisect
+    insert/delete, so the side never needs a full re-sort.
+
+    When `depth` is given, the total size of the best `depth` levels is kept as
+    a running sum that is adjusted on every delta, so reading it is O(1).  The
+    sum is rebuilt from the sizes once every `depth` adjustments so rounding
+    error cannot accumulate over a long session.
+
+    Keys stay floats: Bybit sends each price as the same decimal string every
+    time, so float() of it compares exactly, and the apply loop stays as cheap
+    as a float parse.  Tick/lot integers (ticks.InstrumentSteps) belong at
+    the order boundary, not here.
+    """
+
+    def __init__(self, descending=False, depth=None):
+        self.descending = descending
+        self.depth = depth
+        self._keys = []
+        self._sizes = []
+        self._depth_sum = 0.0
+        self._adjustments = 0
+
+    def _key(self, price):
+        price = float(price)
+        return -price if self.descending else price
+
+    def _price(self, key):
+        return -key if self.descending else key
+
+    def set_level(self, price, size):
+        """Insert, update or (size == 0) remove a single price level."""
+        self._set_key(self._key(price), size)
+
+    def _set_key(self, key, size):
+        i = bisect_left(self._keys, key)
+        found = i < len(self._keys) and self._keys[i] == key
+        depth = self.depth
+        in_top = depth is not None and i < depth
+        if size == 0:
+            if found:
+                if in_top:
+                    self._depth_sum -= self._sizes[i]
+                del self._keys[i]
+                del self._sizes[i]
+                if in_top and len(self._sizes) >= depth:
+                    # The level just below the window moves up into it
+                    self._depth_sum += self._sizes[depth - 1]
+                if not self._keys:
+                    self._depth_sum = 0.0
+        elif found:
+            if in_top:
+                self._depth_sum += size - self._sizes[i]
+            self._sizes[i] = size
+        else:
+            self._keys.insert(i, key)
+            self._sizes.insert(i, size)
+            if in_top:
+                self._depth_sum += size
+                if len(self._sizes) > depth:
+                    # The old last level of the window is pushed out
+                    self._depth_sum -= self._sizes[depth]
+        if in_top:
+            self._adjustments += 1
+            if self._adjustments >= depth:
+                self._resync()
+
+    def _resync(self):
+        self._depth_sum = sum(self._sizes[:self.depth])
+        self._adjustments = 0
+
+    def apply(self, updates):
+        """Apply [price, size] pairs as sent by Bybit, or an (n, 2) float64 array from wsdecode."""
+        if hasattr(updates, "tolist"):
+            updates = updates.tolist()
+        # Keys are computed inline: this loop runs for every level of every push
+        set_key = self._set_key
+        sign = -1.0 if self.descending else 1.0
+        for price, size in updates:
+            set_key(sign * float(price), float(size))
+
+    def clear(self):
+        self._keys.clear()
+        self._sizes.clear()
+        self._depth_sum = 0.0
+        self._adjustments = 0
+
+    def best(self):
+        """Best price on this side, or None when empty."""
+        if not self._keys:
+            return None
+        return self._price(self._keys[0])
+
+    def top_sum(self, levels):
+        """Total size resting on the best `levels` price levels."""
+        if levels == self.depth:
+            return self._depth_sum
+        return sum(self._sizes[:levels])
+
+    def items(self):
+        """(price, size) pairs, best level first."""
+        return [(self._price(k), s) for k, s in zip(self._keys, self._sizes, strict=True)]
+
+    def get(self, price, default=None):
+        key = self._key(price)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._sizes[i]
+        return default
+
+    def __iter__(self):
+        return (self._price(k) for k in self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __bool__(self):
+        return bool(self._keys)
+
+
+APPLY_SNAPSHOT = "snapshot"
+APPLY_DELTA = "delta"
+SKIP = "skip"
+GAP = "gap"
+
+
+class SequenceTracker:
+    """Checks Bybit orderbook pushes for one topic against their update id.
+
+    A snapshot resets the book and the expected id; each delta must carry
+    ``u`` equal to the previous ``u + 1``.  `check` says what to do with a
+    push: APPLY_SNAPSHOT (clear the book first), APPLY_DELTA, SKIP (duplicate
+    or stale delta, or a delta while waiting for a snapshot) or GAP (a delta
+    was lost; the book can no longer be trusted and a fresh snapshot must be
+    requested, e.g. by resubscribing).  Deltas are skipped until that
+    snapshot arrives.
+    """
+
+    def __init__(self):
+        self.last_u = None
+        self.last_seq = None
+        self.synced = False
+        self.gaps = 0
+
+    def check(self, msg_type, data):
+        u = data.get("u")
+        if msg_type == "snapshot":
+            self.last_u = u
+            self.last_seq = data.get("seq")
+            self.synced = True
+            return APPLY_SNAPSHOT
+        if not self.synced or u is None:
+            return SKIP
+        if u <= self.last_u:
+            return SKIP
+        if u != self.last_u + 1:
+            self.synced = False
+            self.gaps += 1
+            return GAP
+        self.last_u = u
+        self.last_seq = data.get("seq", self.last_seq)
+        return APPLY_DELTA
+
+    def reset(self):
+        """Forgets the sequence, e.g. after a reconnect; deltas wait for the next snapshot."""
+        self.last_u = None
+        self.last_seq = None
+        self.synced = False
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Parabolic SAR kernel shared by the TradingAnalyzer implementations."""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+
+def _psar_loop(high, low, acceleration, max_acceleration, ep_first):
+    n = high.shape[0]
+    psar = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return psar
+    psar[0] = low[0]
+    trend = 1
+    ep = high[0]
+    af = acceleration
+    for i in range(1, n):
+        prev = psar[i - 1]
+        value = prev + af * (ep - prev)
+        if trend == 1:
+            if ep_first and high[i] > ep:
+                ep = high[i]
+                af = min(af + acceleration, max_acceleration)
+            if low[i] < value:
+                trend = -1
+                value = ep
+                ep = low[i]
+                af = acceleration
+            elif not ep_first and high[i] > ep:
+                ep = high[i]
+                af = min(af + acceleration, max_acceleration)
+        else:
+            if ep_first and low[i] < ep:
+                ep = low[i]
+                af = min(af + acceleration, max_acceleration)
+            if high[i] > value:
+                trend = 1
+                value = ep
+                ep = high[i]
+                af = acceleration
+            elif not ep_first and low[i] < ep:
+                ep = low[i]
+                af = min(af + acceleration, max_acceleration)
+        psar[i] = value
+    return psar
+
+
+_psar_compiled = njit(cache=True)(_psar_loop) if njit is not None else None
+
+
+def parabolic_sar(high, low, acceleration=0.02, max_acceleration=0.2, ep_first=False, use_numba=True):
+    """Parabolic SAR over high/low arrays, seeded from the first bar's low.
+
+    With `ep_first=False` a bar is checked for a reversal before the extreme
+    point is extended (neonwhale / anylze behaviour); with `ep_first=True` the
+    extreme point is extended first (whalebot behaviour).  The numba-compiled
+    loop is used when numba is installed, otherwise the same loop runs over
+    plain NumPy arrays.
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    kernel = _psar_compiled if use_numba and _psar_compiled is not None else _psar_loop
+    return kernel(high, low, float(acceleration), float(max_acceleration), bool(ep_first))
+
+
+def _psar_iloc(df, acceleration=0.01, max_acceleration=0.2):
+    """Original pandas .iloc loop, kept as the benchmark baseline."""
+    import pandas as pd
+
+    psar = pd.Series(index=df.index, dtype="float64")
+    psar.iloc[0] = df["low"].iloc[0]
+    trend = 1
+    ep = df["high"].iloc[0]
+    af = acceleration
+    for i in range(1, len(df)):
+        psar.iloc[i] = psar.iloc[i - 1] + af * (ep - psar.iloc[i - 1])
+        if trend == 1:
+            if df["low"].iloc[i] < psar.iloc[i]:
+                trend = -1
+                psar.iloc[i] = ep
+                ep = df["low"].iloc[i]
+                af = acceleration
+            elif df["high"].iloc[i] > ep:
+                ep = df["high"].iloc[i]
+                af = min(af + acceleration, max_acceleration)
+        else:
+            if df["high"].iloc[i] > psar.iloc[i]:
+                trend = 1
+                psar.iloc[i] = ep
+                ep = df["high"].iloc[i]
+                af = acceleration
+            elif df["low"].iloc[i] < ep:
+                ep = df["low"].iloc[i]
+                af = min(af + acceleration, max_acceleration)
+    return psar
+
+
+if __name__ == "__main__":
+    import time
+
+    import pandas as pd
+
+    rng = np.random.default_rng(7)
+    bars = 10_000
+    close = 100 + np.cumsum(rng.normal(0, 0.5, bars))
+    spread = np.abs(rng.normal(0, 0.3, bars))
+    df = pd.DataFrame({"high": close + spread, "low": close - spread})
+
+    started = time.perf_counter()
+    baseline = _psar_iloc(df)
+    iloc_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    plain = parabolic_sar(df["high"], df["low"], 0.01, 0.2, use_numba=False)
+    numpy_s = time.perf_counter() - started
+    assert np.array_equal(plain, baseline.to_numpy()), "NumPy kernel diverged from the iloc loop"
+
+    print(f"PSAR over {bars} bars")
+    print(f"  pandas .iloc loop : {iloc_s * 1000:9.2f} ms")
+    print(f"  NumPy array loop  : {numpy_s * 1000:9.2f} ms  ({iloc_s / numpy_s:6.1f}x)")
+    if _psar_compiled is not None:
+        parabolic_sar(df["high"], df["low"], 0.01, 0.2)  # compile
+        started = time.perf_counter()
+        compiled = parabolic_sar(df["high"], df["low"], 0.01, 0.2)
+        numba_s = time.perf_counter() - started
+        assert np.array_equal(compiled, baseline.to_numpy()), "numba kernel diverged from the iloc loop"
+        print(f"  numba kernel      : {numba_s * 1000:9.2f} ms  ({iloc_s / numba_s:6.1f}x)")
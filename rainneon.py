@@ -2,22 +2,22 @@
 # PLEASE DO NOT EDIT THIS FILE, IT IS GENERATED AND WILL BE OVERWRITTEN:
 # https://github.com/ccxt/ccxt/blob/master/CONTRIBUTING.md#how-to-contribute-code
 
+import asyncio
 import json
 import logging
 import os
 import sys
 import time
-import threading
 import hashlib
 import hmac
 import requests
-import websocket
-import pandas as pd
-import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
-from collections import OrderedDict
 from colorama import Fore, Style, init
+from bybitws import BybitStream
+from wsrecord import FrameRecorder
+from orderbook import BookSide
+from tradetape import StreamingCMI, TradeTape
 
 init(autoreset=True)
 
@@ -46,6 +46,7 @@ class Config:
         self.imbalance_threshold_short = 0.6
         self.cmi_period = 20
         self.ws_ping_interval = 20  # Seconds
+        self.order_timeout = 10  # Seconds per order POST
         self.trade_size_usd = 5
         self.take_profit_percent = 0.01
         self.stop_loss_percent = 0.005
@@ -65,10 +66,12 @@ BYBIT_REST_API_URL = "https://api.bybit.com"
 BYBIT_WS_URL = "wss://stream.bybit.com/v5/public/linear"
 
 # --- Data Structures ---
-trades = pd.DataFrame(columns=["price", "size", "timestamp", "side"])
+trades = TradeTape(config.trades_window)
+cmi = StreamingCMI(config.cmi_period)
 current_position = {"side": None, "entry_price": None, "size": 0}
+order_task = None  # asyncio.Task opening a position off the event loop, while one is in flight
 SESSION = requests.Session()  # Initialize requests Session globally for REST
-WS_APP = None  # Initialize WebSocketApp globally
+WS_APP = None  # BybitStream, created in run_bot
 
 # --- Logging Setup ---
 class ColorStreamHandler(logging.StreamHandler):
@@ -113,47 +116,38 @@ setup_logging()
 class OrderBook:
     """Maintains real-time order book state and generates signals."""
     def __init__(self):
-        self.bids = OrderedDict()
-        self.asks = OrderedDict()
+        self.bids = BookSide(descending=True, depth=config.imbalance_levels)
+        self.asks = BookSide(depth=config.imbalance_levels)
         self.last_update_time = None
 
+    def clear(self):
+        """Drop every level, before applying a snapshot."""
+        self.bids.clear()
+        self.asks.clear()
+
     def update(self, data):
         """Update order book from WebSocket data."""
         try:
             self.last_update_time = data.get("ts", time.time()) / 1000
             if "b" in data:
-                self._update_side(self.bids, data["b"], is_bid=True)
+                self._update_side(self.bids, data["b"])
             if "a" in data:
-                self._update_side(self.asks, data["a"], is_bid=False)
+                self._update_side(self.asks, data["a"])
         except KeyError as e:
             logging.error(f"Key error processing order book update: {e}")
 
-    def _update_side(self, side, updates, is_bid):
+    def _update_side(self, side, updates):
         """Update bid or ask side of the order book."""
         try:
-            for price, size in updates:
-                price = float(price)
-                size = float(size)
-                if size == 0:
-                    side.pop(price, None)
-                else:
-                    side[price] = size
-
-            items = sorted(side.items(), key=lambda x: (-x[0] if is_bid else x[0]))
-            side.clear()
-            for price, size in items:
-                side[price] = size
+            side.apply(updates)
         except Exception as e:
             logging.error(f"Error updating order book side: {e}")
 
     def calculate_imbalance(self):
         """Calculates bid/ask imbalance with error handling."""
         try:
-            bid_levels = list(self.bids.items())[:config.imbalance_levels]
-            ask_levels = list(self.asks.items())[:config.imbalance_levels]
-
-            bid_sum = sum(size for _, size in bid_levels)
-            ask_sum = sum(size for _, size in ask_levels)
+            bid_sum = self.bids.top_sum(config.imbalance_levels)
+            ask_sum = self.asks.top_sum(config.imbalance_levels)
 
             if ask_sum <= 0:
                 return 0 if bid_sum <= 0 else float('inf')
@@ -165,8 +159,8 @@ class OrderBook:
     def get_midpoint(self):
         """Calculate current midpoint price."""
         try:
-            best_bid = next(iter(self.bids)) if self.bids else None
-            best_ask = next(iter(self.asks)) if self.asks else None
+            best_bid = self.bids.best()
+            best_ask = self.asks.best()
             if best_bid and best_ask:
                 return (best_bid + best_ask) / 2
             return None
@@ -174,9 +168,10 @@ class OrderBook:
             logging.error(f"Error getting midpoint: {e}")
             return None
 
-    def generate_signal(self):
+    def generate_signal(self, imbalance=None):
         """Generates trade signal based on current imbalance."""
-        imbalance = self.calculate_imbalance()
+        if imbalance is None:
+            imbalance = self.calculate_imbalance()
         if imbalance > config.imbalance_threshold_long:
             return "LONG"
         elif imbalance < config.imbalance_threshold_short:
@@ -186,18 +181,15 @@ class OrderBook:
 order_book = OrderBook()
 
 # --- WebSocket Handlers ---
-def on_message(ws, message):
-    """Handle WebSocket messages and dispatch to appropriate processors."""
+def handle_message(msg):
+    """Dispatch a decoded stream message to the order book or trade processor."""
     try:
-        msg = json.loads(message)
         if "topic" in msg:
             logging.debug(f"Received message on topic: {msg['topic']}")
             if "orderbook" in msg["topic"]:
                 process_orderbook_message(msg)
             elif "publicTrade" in msg["topic"]:
                 process_trade_message(msg)
-        elif "event" in msg and msg["event"] == "pong":
-            logging.debug("Pong received")
     except Exception as e:
         logging.error(f"Error processing message: {e}")
 
@@ -206,6 +198,7 @@ def process_orderbook_message(msg):
     try:
         if msg["type"] == "snapshot":
             logging.debug("Processing orderbook snapshot")
+            order_book.clear()
             order_book.update(msg["data"])
         elif msg["type"] == "delta":
             logging.debug("Processing orderbook delta")
@@ -216,50 +209,52 @@ def process_orderbook_message(msg):
         if midpoint is not None:
             logging.info(f"Order Book Midpoint: {midpoint:.4f}, Imbalance: {imbalance:.2f}")
 
-        signal = order_book.generate_signal()
+        signal = order_book.generate_signal(imbalance)
         if signal:
             logging.info(f"Generated {signal} signal at {datetime.now()}")
-            mid_price = order_book.get_midpoint()
-            if mid_price:
-                execute_trade_signal(signal, mid_price)
+            if midpoint:
+                execute_trade_signal(signal, midpoint)
     except Exception as e:
         logging.error(f"Error processing order book message: {e}")
 
 def process_trade_message(msg):
     """Process trade messages from WebSocket."""
-    global trades
     try:
-        new_trades = []
         for trade in msg["data"]:
-            new_trades.append({
-                "price": float(trade["p"]),
-                "size": float(trade["v"]),
-                "timestamp": float(trade["T"]) / 1000,
-                "side": trade["S"].lower()
-            })
-        update_trades(new_trades)
-    except Exception as e:
-        logging.error(f"Error processing trade message: {e}")
-
-def update_trades(new_trades):
-    """Update trades dataframe with new trades."""
-    global trades
-    try:
-        new_df = pd.DataFrame(new_trades)
-        trades = pd.concat([trades, new_df]).drop_duplicates("timestamp").tail(config.trades_window)
+            price = float(trade["p"])
+            if trades.append(
+                trade.get("i"),
+                price,
+                float(trade["v"]),
+                float(trade["T"]) / 1000,
+                trade["S"].lower(),
+            ):
+                cmi.update(price)
         logging.debug(f"Updated trades. Current count: {len(trades)}")
     except Exception as e:
-        logging.error(f"Error updating trades: {e}")
+        logging.error(f"Error processing trade message: {e}")
 
 # --- Trading Execution and Position Management ---
 def execute_trade_signal(signal, current_price):
-    """Execute trade with position and risk management using requests REST API."""
-    global current_position
-    global SESSION
-
+    """Hands a signal to open_position in a worker thread, so order I/O never blocks the stream's event loop."""
+    global order_task
     if current_position["side"]:
         logging.warning("Existing position active. No new trades.")
         return
+    if order_task is not None and not order_task.done():
+        logging.debug("Order already in flight. Signal ignored.")
+        return
+    order_task = asyncio.get_running_loop().create_task(asyncio.to_thread(open_position, signal, current_price))
+    order_task.add_done_callback(log_order_failure)
+
+def log_order_failure(task):
+    """Done-callback for order_task: surfaces exceptions the worker thread raised."""
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Order placement failed: {task.exception()}", exc_info=task.exception())
+
+def open_position(signal, current_price):
+    """Execute trade with position and risk management using requests REST API."""
+    global current_position
 
     amount = calculate_order_size(config.symbol, current_price)
     if not amount:
@@ -314,7 +309,7 @@ def execute_market_order(symbol, side, amount):
 
     for _ in range(3):
         try:
-            response = SESSION.post(url, data=params, headers=headers)
+            response = SESSION.post(url, data=params, headers=headers, timeout=config.order_timeout)
             response.raise_for_status()
             order_response = response.json()
             if order_response['ret_code'] == 0:
@@ -333,28 +328,13 @@ def execute_market_order(symbol, side, amount):
     return None
 
 # --- Indicator Calculations ---
-def safe_division(numerator, denominator):
-    return numerator / denominator if denominator != 0 else 0
-
-def calculate_cmi(trades_df):
+def calculate_cmi():
     """Calculate Chande Momentum Oscillator (CMI)."""
-    try:
-        if len(trades_df) < config.cmi_period:
-            return np.nan
-
-        price_diff = trades_df["price"].diff()
-        sum_up = price_diff.where(price_diff > 0, 0).rolling(config.cmi_period).sum()
-        sum_down = (-price_diff).where(price_diff < 0, 0).rolling(config.cmi_period).sum()
-
-        total = sum_up + sum_down
-        return safe_division((sum_up - sum_down), total) * 100
-    except Exception as e:
-        logging.error(f"Error calculating CMI: {e}")
-        return np.nan
+    return cmi.value
 
 # --- Exchange Initialization ---
 def initialize_exchange():
-    """Initialize and authenticate Bybit exchange using requests and websocket-client."""
+    """Initialize and authenticate Bybit exchange using requests."""
     global SESSION
     global WS_APP
     load_dotenv()
@@ -379,52 +359,19 @@ def run_bot():
     global SESSION, WS_APP
     SESSION, WS_APP = initialize_exchange()
 
-    WS_APP = websocket.WebSocketApp(
-        BYBIT_WS_URL,
-        on_open=lambda ws: on_open(ws, config.symbol),
-        on_message=on_message,
-        on_error=lambda ws, e: logging.error(f"WebSocket Error: {e}", exc_info=True),
-        on_close=on_close,
-        on_ping=lambda ws, __: ws.send("ping")
-    )
-
-    threading.Thread(target=keep_alive, args=(WS_APP,), daemon=True).start()
-    threading.Thread(target=periodic_health_check, daemon=True).start()
-
-    WS_APP.run_forever(ping_interval=config.ws_ping_interval)
-
-def on_open(ws, symbol):
-    """WebSocket on_open handler to subscribe to orderbook and trades."""
-    logging.info(f"WebSocket connection opened for symbol: {symbol}")
-    ws.send(json.dumps({
-        "op": "subscribe",
-        "args": [
-            f"orderbook.{config.order_book_depth}.{symbol}",
-            f"publicTrade.{symbol}"
-        ]
-    }))
-
-def on_close(ws, close_status_code, close_msg):
-    """WebSocket on_close handler."""
-    logging.info(f"WebSocket connection closed, status code: {close_status_code}, message: {close_msg}")
-
-def keep_alive(ws_app):
-    """Sends periodic pings to maintain WebSocket connection."""
-    while True:
-        time.sleep(config.ws_ping_interval)
-        try:
-            ws_app.send(json.dumps({"op": "ping"}))
-            logging.debug("Ping sent to WebSocket server")
-        except Exception as e:
-            logging.error(f"Error sending ping, attempting to reconnect: {e}")
-            break
+    WS_APP = BybitStream(BYBIT_WS_URL, ping_interval=config.ws_ping_interval, recorder=FrameRecorder.from_env())
+    WS_APP.subscribe(config.symbol, [
+        f"orderbook.{config.order_book_depth}.{config.symbol}",
+        f"publicTrade.{config.symbol}"
+    ], handle_message)
+    asyncio.run(WS_APP.run(periodic_health_check()))
 
-def periodic_health_check():
+async def periodic_health_check():
     """Example of a periodic health check function."""
     while True:
-        logging.info(f"Health Check - Trades Data Size: {trades.memory_usage().sum() / 1024:.2f} KB, Position Side: {current_position['side']}")
+        logging.info(f"Health Check - Trades Data Size: {trades.nbytes / 1024:.2f} KB, Position Side: {current_position['side']}")
         logging.debug(f"Order Book Bid Depth: {len(order_book.bids)}, Ask Depth: {len(order_book.asks)}")
-        time.sleep(60)
+        await asyncio.sleep(60)
 
 if __name__ == "__main__":
     logging.info(f"{Fore.CYAN}Starting requests-based Bybit USDT Futures trading bot...{Style.RESET_ALL}")
@@ -9,12 +9,13 @@ import hashlib
 import hmac
 import requests
 import websocket
-import pandas as pd
-import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
-from collections import OrderedDict
 from colorama import Fore, Style, init
+from orderbook import GAP, SKIP, BookSide, SequenceTracker
+from tradetape import StreamingCMI, TradeTape
+from wsdecode import decode_message
+from wsrecord import FrameRecorder
 
 init(autoreset=True)
 load_dotenv()
@@ -56,7 +57,8 @@ config = initialize_config()
 BYBIT_REST_API_URL = "https://api.bybit.com"
 BYBIT_WS_URL = "wss://stream.bybit.com/v5/public/linear"
 
-trades = pd.DataFrame(columns=["price", "size", "timestamp", "side"])
+trades = TradeTape(config.trades_window)
+cmi = StreamingCMI(config.cmi_period)
 current_position = {"side": None, "entry_price": None, "size": 0}
 SESSION = requests.Session()
 WS_APP = None
@@ -99,44 +101,34 @@ setup_logging()
 
 class OrderBook:
     def __init__(self):
-        self.bids = OrderedDict()
-        self.asks = OrderedDict()
+        self.bids = BookSide(descending=True, depth=config.imbalance_levels)
+        self.asks = BookSide(depth=config.imbalance_levels)
         self.last_update_time = None
 
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+
     def update(self, data):
         try:
             self.last_update_time = data.get("ts", time.time()) / 1000
             if "b" in data:
-                self._update_side(self.bids, data["b"], is_bid=True)
+                self._update_side(self.bids, data["b"])
             if "a" in data:
-                self._update_side(self.asks, data["a"], is_bid=False)
+                self._update_side(self.asks, data["a"])
         except KeyError as e:
             logging.error(f"Key error processing order book update: {e}")
 
-    def _update_side(self, side, updates, is_bid):
+    def _update_side(self, side, updates):
         try:
-            for price, size in updates:
-                price = float(price)
-                size = float(size)
-                if size == 0:
-                    side.pop(price, None)
-                else:
-                    side[price] = size
-
-            items = sorted(side.items(), key=lambda x: (-x[0] if is_bid else x[0]))
-            side.clear()
-            for price, size in items:
-                side[price] = size
+            side.apply(updates)
         except Exception as e:
             logging.error(f"Error updating order book side: {e}")
 
     def calculate_imbalance(self):
         try:
-            bid_levels = list(self.bids.items())[:config.imbalance_levels]
-            ask_levels = list(self.asks.items())[:config.imbalance_levels]
-
-            bid_sum = sum(size for _, size in bid_levels)
-            ask_sum = sum(size for _, size in ask_levels)
+            bid_sum = self.bids.top_sum(config.imbalance_levels)
+            ask_sum = self.asks.top_sum(config.imbalance_levels)
 
             if ask_sum <= 0:
                 return 0 if bid_sum <= 0 else float('inf')
@@ -147,8 +139,8 @@ class OrderBook:
 
     def get_midpoint(self):
         try:
-            best_bid = next(iter(self.bids)) if self.bids else None
-            best_ask = next(iter(self.asks)) if self.asks else None
+            best_bid = self.bids.best()
+            best_ask = self.asks.best()
             if best_bid and best_ask:
                 return (best_bid + best_ask) / 2
             return None
@@ -156,8 +148,9 @@ class OrderBook:
             logging.error(f"Error getting midpoint: {e}")
             return None
 
-    def generate_signal(self):
-        imbalance = self.calculate_imbalance()
+    def generate_signal(self, imbalance=None):
+        if imbalance is None:
+            imbalance = self.calculate_imbalance()
         if imbalance > config.imbalance_threshold_long:
             return "LONG"
         elif imbalance < config.imbalance_threshold_short:
@@ -165,14 +158,24 @@ class OrderBook:
         return None
 
 order_book = OrderBook()
+book_sequence = SequenceTracker()
+RECORDER = FrameRecorder.from_env()  # Set BYBIT_WS_RECORD=path.gz to capture frames for replay
 
 def on_message(ws, message):
+    if RECORDER is not None:
+        RECORDER.write(message)
     try:
-        msg = json.loads(message)
+        msg = decode_message(message)
         if "topic" in msg:
             logging.debug(f"Received message on topic: {msg['topic']}")
             if "orderbook" in msg["topic"]:
-                process_orderbook_message(msg)
+                action = book_sequence.check(msg["type"], msg["data"])
+                if action == GAP:
+                    logging.warning(f"Order book gap after u={book_sequence.last_u}, resubscribing for a fresh snapshot")
+                    ws.send(json.dumps({"op": "unsubscribe", "args": [msg["topic"]]}))
+                    ws.send(json.dumps({"op": "subscribe", "args": [msg["topic"]]}))
+                elif action != SKIP:
+                    process_orderbook_message(msg)
             elif "publicTrade" in msg["topic"]:
                 process_trade_message(msg)
         elif "event" in msg and msg["event"] == "pong":
@@ -184,6 +187,7 @@ def process_orderbook_message(msg):
     try:
         if msg["type"] == "snapshot":
             logging.debug("Processing orderbook snapshot")
+            order_book.clear()
             order_book.update(msg["data"])
         elif msg["type"] == "delta":
             logging.debug("Processing orderbook delta")
@@ -194,38 +198,29 @@ def process_orderbook_message(msg):
         if midpoint is not None:
             logging.info(f"Order Book Midpoint: {midpoint:.4f}, Imbalance: {imbalance:.2f}")
 
-        signal = order_book.generate_signal()
+        signal = order_book.generate_signal(imbalance)
         if signal:
             logging.info(f"Generated {signal} signal at {datetime.now()}")
-            mid_price = order_book.get_midpoint()
-            if mid_price:
-                execute_trade_signal(signal, mid_price)
+            if midpoint:
+                execute_trade_signal(signal, midpoint)
     except Exception as e:
         logging.error(f"Error processing order book message: {e}")
 
 def process_trade_message(msg):
-    global trades
     try:
-        new_trades = []
         for trade in msg["data"]:
-            new_trades.append({
-                "price": float(trade["p"]),
-                "size": float(trade["v"]),
-                "timestamp": float(trade["T"]) / 1000,
-                "side": trade["S"].lower()
-            })
-        update_trades(new_trades)
-    except Exception as e:
-        logging.error(f"Error processing trade message: {e}")
-
-def update_trades(new_trades):
-    global trades
-    try:
-        new_df = pd.DataFrame(new_trades)
-        trades = pd.concat([trades, new_df]).drop_duplicates("timestamp").tail(config.trades_window)
+            price = float(trade["p"])
+            if trades.append(
+                trade.get("i"),
+                price,
+                float(trade["v"]),
+                float(trade["T"]) / 1000,
+                trade["S"].lower(),
+            ):
+                cmi.update(price)
         logging.debug(f"Updated trades. Current count: {len(trades)}")
     except Exception as e:
-        logging.error(f"Error updating trades: {e}")
+        logging.error(f"Error processing trade message: {e}")
 
 def execute_trade_signal(signal, current_price):
     global current_position
@@ -303,23 +298,8 @@ def execute_market_order(symbol, side, amount):
     logging.error(f"Failed {side} order after 3 attempts")
     return None
 
-def safe_division(numerator, denominator):
-    return numerator / denominator if denominator != 0 else 0
-
-def calculate_cmi(trades_df):
-    try:
-        if len(trades_df) < config.cmi_period:
-            return np.nan
-
-        price_diff = trades_df["price"].diff()
-        sum_up = price_diff.where(price_diff > 0, 0).rolling(config.cmi_period).sum()
-        sum_down = (-price_diff).where(price_diff < 0, 0).rolling(config.cmi_period).sum()
-
-        total = sum_up + sum_down
-        return safe_division((sum_up - sum_down), total) * 100
-    except Exception as e:
-        logging.error(f"Error calculating CMI: {e}")
-        return np.nan
+def calculate_cmi():
+    return cmi.value
 
 def initialize_exchange():
     global SESSION
@@ -360,6 +340,7 @@ def run_bot():
 
 def on_open(ws, symbol):
     logging.info(f"WebSocket connection opened for symbol: {symbol}")
+    book_sequence.reset()
     ws.send(json.dumps({
         "op": "subscribe",
         "args": [
@@ -383,7 +364,7 @@ def keep_alive(ws_app):
 
 def periodic_health_check():
     while True:
-        logging.info(f"Health Check - Trades Data Size: {trades.memory_usage().sum() / 1024:.2f} KB, Position Side: {current_position['side']}")
+        logging.info(f"Health Check - Trades Data Size: {trades.nbytes / 1024:.2f} KB, Position Side: {current_position['side']}")
         logging.debug(f"Order Book Bid Depth: {len(order_book.bids)}, Ask Depth: {len(order_book.asks)}")
         time.sleep(60)
 
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Client-side Bybit V5 rate limiting: per-endpoint-group token buckets with priority queueing."""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_MARKET = 2
+
+# Bybit allows 600 requests per 5 s window per IP across all HTTP endpoints.
+# A bucket of 100 tokens refilling at 100/s can never exceed that in any window.
+IP_RATE = 100
+IP_CAPACITY = 100
+
+# (path prefix, group, requests per second, priority); first match wins, so
+# more specific prefixes come first.  Per-UID limits from Bybit's V5
+# rate-limit table for linear contracts; market data is only IP-limited.
+BYBIT_ENDPOINT_GROUPS = [
+    ("/v5/order/create-batch", "order_batch", 10, PRIORITY_ORDER),
+    ("/v5/order/amend-batch", "order_batch", 10, PRIORITY_ORDER),
+    ("/v5/order/cancel-batch", "order_batch", 10, PRIORITY_ORDER),
+    ("/v5/order/cancel-all", "order_cancel_all", 10, PRIORITY_ORDER),
+    ("/v5/order/create", "order_create", 10, PRIORITY_ORDER),
+    ("/v5/order/amend", "order_amend", 10, PRIORITY_ORDER),
+    ("/v5/order/cancel", "order_cancel", 10, PRIORITY_ORDER),
+    ("/v5/order/realtime", "order_query", 50, PRIORITY_ACCOUNT),
+    ("/v5/order/history", "order_query", 50, PRIORITY_ACCOUNT),
+    ("/v5/execution/", "execution", 50, PRIORITY_ACCOUNT),
+    ("/v5/position/list", "position_query", 50, PRIORITY_ACCOUNT),
+    ("/v5/position/", "position_write", 10, PRIORITY_ORDER),
+    ("/v5/account/", "account", 50, PRIORITY_ACCOUNT),
+    ("/v5/asset/", "asset", 5, PRIORITY_ACCOUNT),
+    ("/v5/market/", "market", IP_RATE, PRIORITY_MARKET),
+]
+DEFAULT_GROUP = ("default", 10, PRIORITY_ACCOUNT)
+
+RATE_LIMIT_STATUS = (429, 403)
+RATE_LIMIT_RET_CODES = (10006, 10018)
+DEFAULT_PENALTY_SECONDS = 1.0
+
+
+class _Bucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until one token is available (0 when it already is)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """Thread-safe scheduler that spaces requests to stay under Bybit's limits.
+
+    Every request takes one token from the IP-wide bucket and one from its
+    endpoint group's bucket.  Waiting callers are served in priority order
+    (orders, then account/position reads, then market data) and FIFO within a
+    priority; a caller whose group is exhausted does not hold up callers from
+    other groups.  `observe()` feeds each response back: the
+    ``X-Bapi-Limit``/``X-Bapi-Limit-Status`` headers resize the group bucket
+    and clamp its tokens to what Bybit reports as remaining, and an exhausted
+    quota or a rate-limit rejection pauses the group until
+    ``X-Bapi-Limit-Reset-Timestamp``.
+    """
+
+    def __init__(self, groups=BYBIT_ENDPOINT_GROUPS, ip_rate=IP_RATE, ip_capacity=IP_CAPACITY, logger=None):
+        self.groups = list(groups)
+        self.logger = logger or logging.getLogger(__name__)
+        self._ip = _Bucket(ip_rate, ip_capacity)
+        self._buckets = {}
+        for _, group, rate, _ in self.groups:
+            self._buckets.setdefault(group, _Bucket(rate))
+        self._buckets.setdefault(DEFAULT_GROUP[0], _Bucket(DEFAULT_GROUP[1]))
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+
+    def classify(self, endpoint):
+        """Returns (group, priority) for an endpoint path."""
+        for prefix, group, _, priority in self.groups:
+            if endpoint.startswith(prefix):
+                return group, priority
+        return DEFAULT_GROUP[0], DEFAULT_GROUP[2]
+
+    def acquire(self, endpoint, priority=None, timeout=None):
+        """Blocks until `endpoint` may be called and takes its tokens.
+
+        Returns the seconds spent waiting.  Raises TimeoutError if `timeout`
+        seconds pass first.
+        """
+        group, default_priority = self.classify(endpoint)
+        ticket = (default_priority if priority is None else priority, next(self._sequence), group)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._ip.refill(now)
+                    for bucket in self._buckets.values():
+                        bucket.refill(now)
+                    if self._next_ready(now) == ticket:
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        self._ip.tokens -= 1
+                        self._buckets[group].tokens -= 1
+                        self._cond.notify_all()
+                        return now - started
+                    delay = max(self._ip.wait_time(now), self._buckets[group].wait_time(now), 0.001)
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise TimeoutError(f"Rate limiter wait for {endpoint} timed out")
+                        delay = min(delay, deadline - now)
+                    self._cond.wait(delay)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def _next_ready(self, now):
+        """Highest-priority waiting ticket whose group can go now, if the IP bucket allows one."""
+        if self._ip.wait_time(now) > 0:
+            return None
+        for ticket in sorted(self._waiting):
+            if self._buckets[ticket[2]].wait_time(now) == 0:
+                return ticket
+        return None
+
+    def observe(self, endpoint, headers=None, status_code=None, ret_code=None):
+        """Adapts the endpoint's bucket to a response and returns True if it was rate limited."""
+        group, _ = self.classify(endpoint)
+        headers = headers or {}
+        limited = status_code in RATE_LIMIT_STATUS or ret_code in RATE_LIMIT_RET_CODES
+        limit = _header_int(headers, "X-Bapi-Limit")
+        remaining = _header_int(headers, "X-Bapi-Limit-Status")
+        reset_ms = _header_int(headers, "X-Bapi-Limit-Reset-Timestamp")
+        with self._cond:
+            now = time.monotonic()
+            bucket = self._ip if status_code == 403 else self._buckets[group]
+            bucket.refill(now)
+            if limit and bucket is not self._ip and limit != bucket.capacity:
+                bucket.rate = bucket.capacity = float(limit)
+            if remaining is not None:
+                bucket.tokens = min(bucket.tokens, float(remaining))
+            if limited or remaining == 0:
+                pause = DEFAULT_PENALTY_SECONDS
+                if reset_ms:
+                    pause = max(0.0, reset_ms / 1000.0 - time.time())
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.blocked_until = max(bucket.blocked_until, now + pause)
+                if limited:
+                    self.logger.warning(f"Rate limited on {endpoint} ({group}); pausing the group for {pause:.2f}s")
+            self._cond.notify_all()
+        return limited
+
+
+def _header_int(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def get_limiter():
+    """Returns the process-wide limiter shared by every Bybit REST helper."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
+
+
+if __name__ == "__main__":
+    limiter = RateLimiter()
+    calls = 300
+    started = time.monotonic()
+    order_done = []
+
+    def market():
+        limiter.acquire("/v5/market/kline")
+
+    def order():
+        limiter.acquire("/v5/order/create")
+        order_done.append(time.monotonic() - started)
+
+    threads = [threading.Thread(target=market) for _ in range(calls)]
+    threads += [threading.Thread(target=order) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    print(f"{calls} market + 20 order requests admitted in {elapsed:.2f}s "
+          f"(burst of {IP_CAPACITY}, then {IP_RATE}/s)")
+    print(f"orders admitted by {max(order_done):.2f}s despite the market backlog (10/s group limit)")
+
+    limiter.observe("/v5/order/create", {"X-Bapi-Limit": "10", "X-Bapi-Limit-Status": "0",
+                                         "X-Bapi-Limit-Reset-Timestamp": str(int((time.time() + 0.5) * 1000))})
+    waited = limiter.acquire("/v5/order/create")
+    print(f"after X-Bapi-Limit-Status: 0 the next order waited {waited:.2f}s for the reset")
@@ -1,15 +1,32 @@
+import math
+
+import numpy as np
 import pandas as pd
 from colorama import Fore, Style
 
+from .base import Indicator, RollingWindow, StreamingEMA, bar_value, divide
+from .batch import batch_field, ewm, rolling_mean, shift
+
 
-class RSI:
+class RSI(Indicator):
     """Calculates the Relative Strength Index (RSI)."""
 
     def __init__(self, config):
-        """Initializes the RSI with a given length."""
+        """Initializes the RSI with a given length.
+
+        Config can include:
+            - length: Averaging period (default: 14).
+            - smoothing: "sma" for a rolling mean of gains/losses (default) or
+              "wilder" for Wilder's smoothing (EMA with alpha = 1/length).
+        """
+        super().__init__(config)
         self.length = config.get(
             "length", 14
         )  # Default to 14 if length is not provided
+        self.smoothing = config.get("smoothing", "sma")
+        if self.smoothing not in ("sma", "wilder"):
+            raise ValueError(f"Invalid 'smoothing' in config: {self.smoothing}. Must be 'sma' or 'wilder'.")
+        self.reset()
 
     def calculate(self, df):
         """Calculates the RSI for a given DataFrame.
@@ -62,15 +79,16 @@ class RSI:
         gains = delta.where(delta > 0, 0)
         losses = -delta.where(delta < 0, 0)
 
-        # Calculate average gains and average losses using rolling mean
-        avg_gains = gains.rolling(window=self.length, min_periods=1).mean()
-        avg_losses = losses.rolling(window=self.length, min_periods=1).mean()
+        # Calculate average gains and average losses
+        if self.smoothing == "wilder":
+            avg_gains = gains.ewm(alpha=1 / self.length, adjust=False, min_periods=self.length).mean()
+            avg_losses = losses.ewm(alpha=1 / self.length, adjust=False, min_periods=self.length).mean()
+        else:
+            avg_gains = gains.rolling(window=self.length, min_periods=1).mean()
+            avg_losses = losses.rolling(window=self.length, min_periods=1).mean()
 
-        # Calculate relative strength (RS)
-        with pd.option_context(
-            "mode.use_inf_as_na", True
-        ):  # set inf as nan for division handling
-            rs = avg_gains / avg_losses
+        # Calculate relative strength (RS); a zero average loss gives inf, i.e. RSI 100
+        rs = avg_gains / avg_losses
 
         # Calculate RSI
         rsi = 100 - (100 / (1 + rs))
@@ -78,6 +96,78 @@ class RSI:
             [float("inf"), float("-inf")], pd.NA
         ).dropna()  # Remove inf / nan values
 
+    def calculate_batch(self, data):
+        """calculate() for a (bars x symbols) close array, with NaN on the rows calculate() drops.
+
+        Returns {'rsi': array}.
+        """
+        close = batch_field(data, "close")
+        delta = close - shift(close)
+        # calculate() drops NaN deltas before averaging, so each column's valid
+        # deltas are packed to the bottom in order and the RSI scattered back
+        order = np.argsort(~np.isnan(delta), axis=0, kind="stable")
+        delta = np.take_along_axis(delta, order, axis=0)
+        gains = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+        losses = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+        if self.smoothing == "wilder":
+            avg_gains = ewm(gains, alpha=1 / self.length, min_periods=self.length)
+            avg_losses = ewm(losses, alpha=1 / self.length, min_periods=self.length)
+        else:
+            avg_gains = rolling_mean(gains, self.length, min_periods=1)
+            avg_losses = rolling_mean(losses, self.length, min_periods=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + avg_gains / avg_losses))
+        out = np.empty_like(rsi)
+        np.put_along_axis(out, order, np.where(np.isfinite(rsi), rsi, np.nan), axis=0)
+        return {"rsi": out}
+
+    def update(self, bar):
+        """Feeds one bar's close and returns the latest RSI.
+
+        NaN for the first bar and wherever calculate() would drop the row
+        (undefined RS), so the non-NaN outputs line up with calculate().
+        """
+        close = bar_value(bar, "close")
+        if math.isnan(close):
+            return self._current
+        if self._prev_close is None:
+            self._prev_close = close
+            self._current = math.nan
+            return self._current
+        delta = close - self._prev_close
+        self._prev_close = close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if self.smoothing == "wilder":
+            self._count += 1
+            avg_gain = self._avg_gain.update(gain)
+            avg_loss = self._avg_loss.update(loss)
+            if self._count < self.length:
+                self._current = math.nan
+                return self._current
+        else:
+            self._gains.push(gain)
+            self._losses.push(loss)
+            avg_gain = self._gains.mean()
+            avg_loss = self._losses.mean()
+        self._current = 100 - divide(100, 1 + divide(avg_gain, avg_loss))
+        return self._current
+
+    def current(self):
+        return self._current
+
+    def reset(self):
+        self._prev_close = None
+        self._current = math.nan
+        self._count = 0
+        self._avg_gain = StreamingEMA(alpha=1 / self.length)
+        self._avg_loss = StreamingEMA(alpha=1 / self.length)
+        self._gains = RollingWindow(self.length, min_periods=1)
+        self._losses = RollingWindow(self.length, min_periods=1)
+
+    def get_indicator_name(self) -> str:
+        return "RSI"
+
     def display_in_terminal(self, rsi_values, symbol):
         """Displays RSI values in a terminal-friendly format.
 
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Concurrent multi-symbol scan: asyncio fetches, process-pool analysis, ranked results."""
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+SIGNAL_ORDER = {"BUY": 0, "SELL": 0, "HOLD": 1}
+
+
+def rank(results):
+    """Orders results best-first: actionable signals before HOLD, then by |score|, errors last."""
+    def key(result):
+        if result.get("error"):
+            return (2, 0.0)
+        return (SIGNAL_ORDER.get(result.get("signal"), 1), -abs(result.get("score") or 0.0))
+    return sorted(results, key=key)
+
+
+async def scan(symbols, fetch, analyze, concurrency=8, executor=None):
+    """Fetches and analyzes every symbol concurrently, yielding each result as it finishes.
+
+    `fetch(symbol)` is a blocking function that performs the REST calls for one
+    symbol (it runs in a thread) and returns the payload for `analyze`, or None
+    on failure.  At most `concurrency` fetches are in flight; request pacing is
+    left to `fetch`'s own REST layer (neonwhale's bybit_request uses the shared
+    ratelimit.RateLimiter), so the sweep keeps no second, separate request
+    budget.  `analyze(symbol, payload)` must be a picklable
+    top-level function; it runs in `executor` (a process pool by default) and
+    returns a result dict.  Failures are yielded as ``{"symbol": ..., "error": ...}``.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor()
+
+    async def run(symbol):
+        try:
+            async with semaphore:
+                payload = await asyncio.to_thread(fetch, symbol)
+            if payload is None:
+                return {"symbol": symbol, "error": "fetch failed"}
+            return await loop.run_in_executor(executor, analyze, symbol, payload)
+        except Exception as e:
+            logging.exception(f"Scan of {symbol} failed: {e}")
+            return {"symbol": symbol, "error": str(e)}
+
+    tasks = [asyncio.create_task(run(symbol)) for symbol in symbols]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,7 @@
+import math
 import pandas as pd
 from typing import Dict, Any
-from .base import Indicator
+from .base import Indicator, RollingWindow, bar_value, divide
 
 class StochRSI(Indicator):
     """
@@ -62,6 +63,8 @@ class StochRSI(Indicator):
         if not isinstance(self.length_d, int) or self.length_d <= 0:
             raise ValueError(f"Invalid 'length_d' in config: {self.length_d}. Must be a positive integer.")
 
+        self.reset()
+
     def calculate(self, data: pd.DataFrame | pd.Series) -> pd.DataFrame:
         """
         Calculates Stochastic RSI.
@@ -150,6 +153,43 @@ class StochRSI(Indicator):
 
         return rsi
 
+    def update(self, bar) -> Dict[str, float]:
+        """
+        Feeds one bar's close and returns the latest {'stoch_k', 'stoch_d'}.
+
+        Keeps the last 'length_rsi' gains/losses, 'length_k' RSI values and
+        'length_d' %K values, so the state does not grow with the history.
+        NaN closes are skipped, as calculate() drops them.
+        """
+        close = bar_value(bar, 'close')
+        if math.isnan(close):
+            return self._current
+        delta = 0.0 if self._prev_close is None else close - self._prev_close # First bar counts as no change, like diff().where()
+        self._prev_close = close
+        self._ups.push(delta if delta >= 0 else 0.0)
+        self._downs.push(-delta if delta < 0 else 0.0)
+
+        rsi = 100.0 - divide(100.0, 1.0 + divide(self._ups.mean(), self._downs.mean()))
+        self._rsi.push(rsi)
+        rsi_min, rsi_max = self._rsi.min(), self._rsi.max()
+        stoch_k = 100 * divide(rsi - rsi_min, rsi_max - rsi_min)
+        self._k.push(stoch_k)
+        self._current = {'stoch_k': stoch_k, 'stoch_d': self._k.mean()}
+        return self._current
+
+    def current(self) -> Dict[str, float]:
+        """Returns the latest {'stoch_k', 'stoch_d'} from update()."""
+        return self._current
+
+    def reset(self) -> None:
+        """Forgets all streaming state."""
+        self._prev_close = None
+        self._ups = RollingWindow(self.length_rsi)
+        self._downs = RollingWindow(self.length_rsi)
+        self._rsi = RollingWindow(self.length_k)
+        self._k = RollingWindow(self.length_d)
+        self._current = {'stoch_k': math.nan, 'stoch_d': math.nan}
+
     def get_indicator_name(self) -> str:
         """
         Returns the name of the indicator.
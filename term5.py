@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
-import os, time, hashlib, hmac, urllib.parse, json, threading, numpy as np, plotext as plt, smtplib, logging
+import os, time, hashlib, hmac, urllib.parse, json, threading, plotext as plt, smtplib, logging
 from email.message import EmailMessage
 import requests, pandas as pd, ccxt
 from colorama import init, Fore, Style
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+from exchange_registry import get_exchange
+from backtest import STRATEGIES, run_backtest
+from ohlcvstore import get_store
+from klinedownload import download
+from optimize import DEFAULT_SPACES, best_params, optimize
 from indicators import FibonacciPivotPoints, RSI, ATR, atr
 from enum import Enum  # Import Enum for order types/sides
 from queue import Queue # Correct import for Queue (thread-safe queue)
@@ -52,7 +57,8 @@ class BTT:
         self.exch = self._init_exch()
         self.rm = RM(CONFIG.risk)
         self.ntf = NH(CONFIG.email)
-        self.se = SE()
+        self.se = SE(self.rm)
+        self.history = get_store()
         self.ao = {}
         self.mdc = {}
         self.fpp_indicator = FibonacciPivotPoints(config={})
@@ -126,9 +132,45 @@ class BTT:
             print(Fore.RED + f"Error placing stop-limit order: {e}")
             logging.error(f"Stop-limit order placement error: {e}")
 
+    def _ohlcv(self, symbol: str, timeframe: str, limit: int = None) -> list:
+        """OHLCV rows (ccxt layout) from the local history store, fetching only bars it does not have yet.
+
+        `limit=None` returns all stored history, topped up to at least 1000 bars.  If the update fails the
+        stored rows are used as they are.
+        """
+        last = self.history.last_timestamp(symbol, timeframe)
+        want = limit or 1000
+        try:
+            if last is None:
+                self.history.append(symbol, timeframe, self.exch.fetch_ohlcv(symbol, timeframe, limit=want))
+            else:
+                # Page forward from the newest stored bar, so the stored history never gets a hole
+                since = last
+                while True:
+                    fresh = self.exch.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
+                    self.history.append(symbol, timeframe, fresh)
+                    if len(fresh) < 1000 or fresh[-1][0] <= since:
+                        break
+                    since = fresh[-1][0]
+                # Then backfill the older bars a shorter earlier request left out
+                first, rows = self.history.first_timestamp(symbol, timeframe), self.history.rows(symbol, timeframe)
+                since = first - (want - rows) * self.exch.parse_timeframe(timeframe) * 1000
+                while since < first:
+                    older = [row for row in self.exch.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
+                             if row[0] < first]
+                    if not older:
+                        break
+                    self.history.append(symbol, timeframe, older)
+                    since = older[-1][0] + 1
+        except ccxt.NetworkError as e:
+            if last is None:
+                raise
+            logging.error(f"Using stored candles for {symbol} {timeframe}, update failed: {e}")
+        return self.history.ohlcv(symbol, timeframe, limit)
+
     def chart_adv(self, symbol: str, timeframe: str = '1h', periods: int = 100):
         """Displays an advanced price chart with optional RSI overlay."""
-        ohlcv = self.exch.fetch_ohlcv(symbol, timeframe, limit=periods)
+        ohlcv = self._ohlcv(symbol, timeframe, periods)
         closes = [x[4] for x in ohlcv]
         plt.clear_figure()
         plt.plot(closes)
@@ -150,10 +192,14 @@ class BTT:
         """Initiates and displays backtesting results."""
         symbol = input(Fore.YELLOW + "Symbol: ").upper()
         timeframe = input(Fore.YELLOW + "Timeframe (1h/4h/1d): ")
-        strategy_name = input(Fore.YELLOW + "Strategy (ema/macd): ").lower()
+        strategy_name = input(Fore.YELLOW + f"Strategy ({'/'.join(STRATEGIES)}): ").lower()
+        history_start = input(Fore.YELLOW + "Download history from (YYYY-MM-DD, blank to skip): ").strip()
 
         try:
-            data = self.exch.fetch_ohlcv(symbol, timeframe, limit=1000)
+            if history_start:
+                bars = download(symbol, timeframe, history_start)
+                print(Fore.GREEN + f"Downloaded {bars:,} bars into the local history store.")
+            data = self._ohlcv(symbol, timeframe)
             if not data:
                 print(Fore.RED + "No data available for backtesting.")
                 return
@@ -161,10 +207,21 @@ class BTT:
             df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             df.set_index('timestamp', inplace=True)
-            bt_res = self.se.run_backtest(df, strategy_name)
-            print(Fore.CYAN + f"\n--- Backtest Results ({strategy_name.upper()}):")
+            params = None
+            if strategy_name in DEFAULT_SPACES and input(Fore.YELLOW + "Optimize parameters first? (y/n): ").lower() == 'y':
+                ranked = self.se.optimize(df, strategy_name)
+                print(Fore.CYAN + f"\n--- Top Parameter Sets ({len(ranked)} tested, by Sharpe):")
+                print(Fore.WHITE + ranked.head(5).to_string(index=False))
+                params = best_params(ranked, DEFAULT_SPACES[strategy_name])
+            bt_res = self.se.run_backtest(df, strategy_name, params)
+            print(Fore.CYAN + f"\n--- Backtest Results ({strategy_name.upper()}{f' {params}' if params else ''}):")
             print(Fore.WHITE + f"Total Return: {Fore.GREEN}{bt_res['tot_ret_perc']:.2f}%")
             print(Fore.WHITE + f"Max Drawdown: {Fore.RED}{bt_res['max_dd_perc']:.2f}%")
+            print(Fore.WHITE + f"Sharpe Ratio: {Fore.CYAN}{bt_res['sharpe']:.2f}")
+            print(Fore.WHITE + f"Trades: {Fore.CYAN}{bt_res['n_trades']}{Fore.WHITE}, Win Rate: {Fore.CYAN}{bt_res['win_rate_perc']:.1f}%")
+            if bt_res['n_trades']:
+                print(Fore.WHITE + "Last trades:")
+                print(bt_res['trades'].tail(5).to_string(index=False))
 
             plot_cumulative_returns = input(Fore.YELLOW + "Plot cumulative returns? (y/n): ").lower()
             if plot_cumulative_returns == 'y':
@@ -821,7 +878,7 @@ class BTT:
     def disp_rsi(self, symbol: str, timeframe: str):
         """Displays RSI for a given symbol and timeframe."""
         try:
-            ohlcv_data = self.exch.fetch_ohlcv(symbol, timeframe, limit=150)
+            ohlcv_data = self._ohlcv(symbol, timeframe, 150)
             closes_data = [x[4] for x in ohlcv_data]
             rsi_values = RSI(pd.Series(closes_data), 14)
             if not rsi_values.empty:
@@ -861,7 +918,7 @@ class BTT:
     def disp_atr(self, symbol: str, timeframe: str, period: int):
         """Displays ATR for a given symbol, timeframe, and period."""
         try:
-            ohlcv_data = self.exch.fetch_ohlcv(symbol, timeframe, limit=150)
+            ohlcv_data = self._ohlcv(symbol, timeframe, 150)
             df_ohlcv = pd.DataFrame(ohlcv_data, columns=['ts', 'open', 'high', 'low', 'close', 'volume'])
 
             atr_config = {"length": period}
@@ -1015,7 +1072,7 @@ class NH:
         """Price check loop for alerts."""
         while True:
             try:
-                exch = ccxt.bybit({'options': {'defaultType': 'swap'}})
+                exch = get_exchange('swap')
                 ticker = exch.fetch_ticker(symbol)
                 current_price = ticker['last']
                 if current_price <= target_price:
@@ -1057,38 +1114,17 @@ class NH:
 
 class SE:
     """Strategy Engine class."""
-    def run_backtest(self, df, strategy_name):
-        """Runs backtest for a given strategy."""
-        if strategy_name == 'ema':
-            return self._ema_strat(df)
-        else:
-            raise ValueError(f"Strategy '{strategy_name}' is not supported.")
-
-    def _ema_strat(self, df):
-        """EMA crossover strategy backtest."""
-        df['ema_fast'] = df['close'].ewm(span=12, adjust=False).mean()
-        df['ema_slow'] = df['close'].ewm(span=26, adjust=False).mean()
-        df['signal'] = np.where(df['ema_fast'] > df['ema_slow'], 1, -1)
-        df['position'] = df['signal'].shift(1)
-        df['rets'] = df['close'].pct_change()
-        df['strat_rets'] = df['position'] * df['rets']
-        df['cum_rets'] = (1 + df['strat_rets']).cumprod() - 1
-        bt_res = {'tot_ret_perc': df['cum_rets'].iloc[-1] * 100,
-                  'max_dd_perc': self._max_dd(df['cum_rets']) * 100,
-                  'cum_rets': df['cum_rets']}
-        return bt_res
-
-    def _max_dd(self, cumulative_returns):
-        """Calculates max drawdown."""
-        peak = cumulative_returns.iloc[0]
-        max_drawdown = 0
-        for ret in cumulative_returns:
-            if ret > peak:
-                peak = ret
-            drawdown = (peak - ret) / peak if peak != 0 else 0
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-        return max_drawdown
+    def __init__(self, rm=None):
+        """Initializes StrategyEngine; `rm` sizes positions in backtests."""
+        self.rm = rm
+
+    def run_backtest(self, df, strategy_name, params=None):
+        """Runs backtest for a given strategy (see backtest.STRATEGIES)."""
+        return run_backtest(df, strategy_name, params, rm=self.rm)
+
+    def optimize(self, df, strategy_name, n_random=None):
+        """Ranks parameter sets for a strategy across all CPU cores (see optimize.DEFAULT_SPACES)."""
+        return optimize(df, strategy_name, n_random=n_random, rm=self.rm)
 
 
 def get_msentiment():
@@ -0,0 +1,116 @@
+# indicators/test_batch.py
+"""calculate_batch() must match per-symbol calculate() column by column, and the rolling kernels must stay exact."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from .atr import ATR
+from .batch import rolling_mean, rolling_std, rolling_sum, stack
+from .bollinger_bands import BollingerBands
+from .ema import EMA
+from .momentum import Momentum
+from .rsi import RSI
+from .volatility import Volatility
+
+TOLERANCE = 1e-9
+BARS = 200_000
+ALL_MEASURES = {"use_parkinson": True, "use_garman_klass": True, "use_rogers_satchell": True, "use_yang_zhang": True}
+
+# (id, factory, calculate() on one symbol's frame -> DataFrame with the batched columns)
+CASES = [
+    ("EMA", lambda: EMA({}), lambda df: EMA({}).calculate(df)),
+    ("RSI-sma", lambda: RSI({"smoothing": "sma"}),
+     lambda df: pd.DataFrame({"rsi": RSI({"smoothing": "sma"}).calculate(df)}).reindex(df.index)),
+    ("RSI-wilder", lambda: RSI({"smoothing": "wilder"}),
+     lambda df: pd.DataFrame({"rsi": RSI({"smoothing": "wilder"}).calculate(df)}).reindex(df.index)),
+    ("ATR", lambda: ATR({}), lambda df: ATR({}).calculate(df.copy())),
+    ("BollingerBands", lambda: BollingerBands({}), lambda df: BollingerBands({}).calculate(df)),
+    ("Momentum", lambda: Momentum({}), lambda df: Momentum({}).calculate(df)),
+] + [
+    (f"Volatility-{method}", lambda method=method: Volatility({**ALL_MEASURES, "normalization_method": method}),
+     lambda df, method=method: Volatility({**ALL_MEASURES, "normalization_method": method}).calculate(df))
+    for method in ("zscore", "minmax", None)
+]
+
+
+@pytest.fixture(scope="module")
+def frames():
+    """OHLC frames of different lengths, one with a run of missing bars.
+
+    Prices stay inside a band: there pandas' own rolling std is accurate to
+    well under TOLERANCE, while on long trending series it drifts by ~1e-8
+    (test_rolling_stats_stay_exact covers that case against exact values).
+    """
+    rng = np.random.default_rng(5)
+    frames = []
+    for j, bars in enumerate([BARS, 180_000, 150_000, 100_000]):
+        close = 20 + 10 * np.sin(2 * np.pi * np.arange(bars) / 50_000 + j) + rng.normal(0, 1.0, bars)
+        open_ = close * np.exp(rng.normal(0, 0.002, bars))
+        df = pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.003, bars))),
+            "low": np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.003, bars))),
+            "close": close,
+        })
+        if j == 1:
+            df.iloc[50_000:50_040] = np.nan
+        df["Close"] = df["close"] # RSI reads the capitalised column
+        frames.append(df)
+    return frames
+
+
+@pytest.fixture(scope="module")
+def panel(frames):
+    return {field: stack(frames, field) for field in ("open", "high", "low", "close")}
+
+
+@pytest.mark.parametrize("factory, expected", [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_calculate_batch_matches_calculate(frames, panel, factory, expected):
+    batched = factory().calculate_batch(panel)
+    for j, df in enumerate(frames):
+        reference = expected(df)
+        for column, values in batched.items():
+            assert np.isnan(values[:BARS - len(df), j]).all(), f"{column}: padding of symbol {j} is not NaN"
+            np.testing.assert_allclose(values[BARS - len(df):, j], reference[column].to_numpy(dtype="float64"),
+                                       rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True,
+                                       err_msg=f"{column}, symbol {j}")
+
+
+def exact_windows(values, window, chunk=50_000):
+    """Mean and sample std of every full window by the two-pass formula (std 0 when all values are equal)."""
+    view = np.lib.stride_tricks.sliding_window_view(values, window)
+    means, stds = [], []
+    for start in range(0, len(view), chunk):
+        windows = view[start:start + chunk]
+        mean = windows.mean(axis=1)
+        means.append(mean)
+        std = np.sqrt(((windows - mean[:, None]) ** 2).sum(axis=1) / (window - 1))
+        stds.append(np.where(windows.max(axis=1) == windows.min(axis=1), 0.0, std))
+    return np.concatenate(means), np.concatenate(stds)
+
+
+@pytest.mark.parametrize("use_numba", [True, False], ids=["numba", "numpy"])
+def test_rolling_stats_stay_exact(use_numba):
+    """A year of 1m bars trending around 30k, with a flat stretch late in the history."""
+    rng = np.random.default_rng(3)
+    close = np.round(30_000 * np.exp(np.cumsum(rng.normal(0, 8e-4, 525_600))), 1)
+    close[150_000:150_100] = close[150_000]
+    mean, std = exact_windows(close, 20)
+
+    np.testing.assert_allclose(rolling_mean(close, 20, use_numba=use_numba)[19:, 0], mean, rtol=TOLERANCE)
+    np.testing.assert_allclose(rolling_sum(close, 20, use_numba=use_numba)[19:, 0], mean * 20, rtol=TOLERANCE)
+    rolled = rolling_std(close, 20, use_numba=use_numba)[:, 0]
+    np.testing.assert_allclose(rolled[19:], std, rtol=TOLERANCE)
+    assert (rolled[150_019:150_100] == 0.0).all()
+
+
+@pytest.mark.parametrize("use_numba", [True, False], ids=["numba", "numpy"])
+def test_rolling_stats_treat_inf_as_missing(use_numba):
+    rng = np.random.default_rng(4)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, 300))
+    close[[50, 120]] = np.inf, -np.inf
+    close[200:205] = np.nan
+    series = pd.Series(close).rolling(20, min_periods=5)
+    for kernel, expected in ((rolling_mean, series.mean()), (rolling_sum, series.sum()), (rolling_std, series.std())):
+        np.testing.assert_allclose(kernel(close, 20, min_periods=5, use_numba=use_numba)[:, 0], expected.to_numpy(),
+                                   rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True)
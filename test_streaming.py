@@ -0,0 +1,84 @@
+# indicators/test_streaming.py
+"""update()/current() must reproduce calculate() row by row for every streaming indicator."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from .atr import ATR
+from .atr_trailing_stop import ATRTrailingStop
+from .bollinger_bands import BollingerBands
+from .ema import EMA
+from .macd import MACD
+from .momentum import Momentum
+from .obv import OBV
+from .rsi import RSI
+from .stoch_rsi import StochRSI
+
+TOLERANCE = 1e-9
+
+# (id, factory, streamed columns or None for scalar output, calculate() -> expected values)
+CASES = [
+    ("EMA", lambda: EMA({}), ["ema_short", "ema_long"],
+     lambda df: EMA({}).calculate(df)[["ema_short", "ema_long"]]),
+    ("MACD", lambda: MACD({}), ["macd", "macd_signal", "macd_hist"],
+     lambda df: MACD({}).calculate(df.copy())[["macd", "macd_signal", "macd_hist"]]),
+    ("RSI-sma", lambda: RSI({"smoothing": "sma"}), None,
+     lambda df: RSI({"smoothing": "sma"}).calculate(df).reindex(df.index)),
+    ("RSI-wilder", lambda: RSI({"smoothing": "wilder"}), None,
+     lambda df: RSI({"smoothing": "wilder"}).calculate(df).reindex(df.index)),
+    ("StochRSI", lambda: StochRSI({}), ["stoch_k", "stoch_d"],
+     lambda df: StochRSI({}).calculate(df)[["stoch_k", "stoch_d"]]),
+    ("ATR", lambda: ATR({}), None,
+     lambda df: ATR({}).calculate(df.copy())["atr_14"]),
+    ("ATRTrailingStop", lambda: ATRTrailingStop({}), None,
+     lambda df: ATRTrailingStop({}).calculate(df)["atr_trailing_stop"]),
+    ("BollingerBands", lambda: BollingerBands({}), ["bollinger_mavg", "bollinger_upper", "bollinger_lower", "percent_b"],
+     lambda df: BollingerBands({}).calculate(df)[["bollinger_mavg", "bollinger_upper", "bollinger_lower", "percent_b"]]),
+    ("OBV", lambda: OBV(), None,
+     lambda df: OBV().calculate(df.copy())["obv"]),
+    ("Momentum", lambda: Momentum({}), ["momentum", "momentum_ema", "momentum_zscore"],
+     lambda df: Momentum({}).calculate(df)[["momentum", "momentum_ema", "momentum_zscore"]]),
+]
+
+
+def stream(indicator, df, columns=None):
+    """Feeds df one bar at a time; returns the update() outputs, checking each against current()."""
+    rows = []
+    for bar in df.to_dict("records"):
+        value = indicator.update(bar)
+        assert value == indicator.current() or value != value or isinstance(value, dict)
+        rows.append([value[c] for c in columns] if columns else value)
+    return np.asarray(rows, dtype="float64")
+
+
+@pytest.fixture(scope="module")
+def df():
+    rng = np.random.default_rng(11)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, 500))
+    spread = np.abs(rng.normal(0, 0.3, 500))
+    df = pd.DataFrame({
+        "open": np.roll(close, 1),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(1, 100, 500).round(3),
+    })
+    df["Close"] = df["close"] # RSI reads the capitalised column
+    return df
+
+
+@pytest.mark.parametrize("factory, columns, expected", [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_update_matches_calculate(df, factory, columns, expected):
+    streamed = stream(factory(), df, columns)
+    np.testing.assert_allclose(streamed, np.asarray(expected(df), dtype="float64"),
+                               rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True)
+
+
+@pytest.mark.parametrize("factory, columns, expected", [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_reset_forgets_history(df, factory, columns, expected):
+    indicator = factory()
+    stream(indicator, df.iloc[:200], columns)
+    indicator.reset()
+    streamed = stream(indicator, df, columns)
+    np.testing.assert_allclose(streamed, np.asarray(expected(df), dtype="float64"),
+                               rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True)
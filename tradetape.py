@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Preallocated ring buffer and streaming analytics for the public trade stream."""
+from collections import deque
+
+import numpy as np
+
+COLUMNS = ("price", "size", "timestamp", "side")
+SIDE_CODES = {"buy": 1, "sell": -1}
+
+
+class TradeTape:
+    """Fixed-size trade history backed by preallocated NumPy columns.
+
+    Every column is allocated at twice the capacity and each trade is written
+    to both halves, so the most recent `capacity` trades always form one
+    contiguous slice.  `view()` therefore returns a zero-copy window and
+    appending a trade never allocates.
+
+    Trades are deduplicated by their Bybit trade ID ("i").  Sides are stored as
+    +1 for buys and -1 for sells.
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("TradeTape capacity must be positive")
+        self.capacity = capacity
+        self._columns = {
+            "price": np.zeros(2 * capacity, dtype=np.float64),
+            "size": np.zeros(2 * capacity, dtype=np.float64),
+            "timestamp": np.zeros(2 * capacity, dtype=np.float64),
+            "side": np.zeros(2 * capacity, dtype=np.int8),
+        }
+        self._pos = 0
+        self._count = 0
+        self._ids = deque(maxlen=capacity)
+        self._id_set = set()
+
+    def append(self, trade_id, price, size, timestamp, side):
+        """Add one trade. Returns False if the trade ID was already seen."""
+        if trade_id is not None:
+            if trade_id in self._id_set:
+                return False
+            if len(self._ids) == self.capacity:
+                self._id_set.discard(self._ids[0])
+            self._ids.append(trade_id)
+            self._id_set.add(trade_id)
+
+        side_code = SIDE_CODES.get(side, 0) if isinstance(side, str) else side
+        pos, cap = self._pos, self.capacity
+        for name, value in zip(COLUMNS, (price, size, timestamp, side_code), strict=True):
+            column = self._columns[name]
+            column[pos] = value
+            column[pos + cap] = value
+        self._pos = (pos + 1) % cap
+        if self._count < cap:
+            self._count += 1
+        return True
+
+    def view(self, column, n=None):
+        """Zero-copy view of the last `n` values of `column`, oldest first."""
+        count = self._count if n is None else min(n, self._count)
+        end = self._pos + self.capacity
+        return self._columns[column][end - count:end]
+
+    def last(self, column):
+        """Most recent value of `column`, or None when the tape is empty."""
+        if not self._count:
+            return None
+        return self._columns[column][self._pos - 1]
+
+    def clear(self):
+        self._pos = 0
+        self._count = 0
+        self._ids.clear()
+        self._id_set.clear()
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    def __getitem__(self, column):
+        return self.view(column)
+
+    def __len__(self):
+        return self._count
+
+
+class StreamingCMI:
+    """Chande momentum over the last `period` trade-to-trade price changes.
+
+    Rolling up/down sums are adjusted as each trade arrives, so `update()` and
+    `value` are O(1).  The sums are rebuilt from the window once per lap of the
+    ring to stop floating-point drift from accumulating.
+    """
+
+    def __init__(self, period):
+        if period <= 0:
+            raise ValueError("CMI period must be positive")
+        self.period = period
+        self._diffs = [0.0] * period
+        self._idx = 0
+        self._count = 0
+        self._last_price = None
+        self._sum_up = 0.0
+        self._sum_down = 0.0
+
+    def update(self, price):
+        """Feed one trade price and return the current CMI (nan until warm)."""
+        if self._last_price is not None:
+            diff = price - self._last_price
+            old = self._diffs[self._idx]
+            if old > 0:
+                self._sum_up -= old
+            elif old < 0:
+                self._sum_down += old
+            if diff > 0:
+                self._sum_up += diff
+            elif diff < 0:
+                self._sum_down -= diff
+            self._diffs[self._idx] = diff
+            self._idx = (self._idx + 1) % self.period
+            if self._count < self.period:
+                self._count += 1
+            if self._idx == 0:
+                self._resync()
+        self._last_price = price
+        return self.value
+
+    def _resync(self):
+        self._sum_up = sum(d for d in self._diffs if d > 0)
+        self._sum_down = -sum(d for d in self._diffs if d < 0)
+
+    @property
+    def value(self):
+        if self._count < self.period:
+            return np.nan
+        total = self._sum_up + self._sum_down
+        if total == 0:
+            return 0.0
+        return (self._sum_up - self._sum_down) / total * 100
+
+    def reset(self):
+        self._diffs = [0.0] * self.period
+        self._idx = 0
+        self._count = 0
+        self._last_price = None
+        self._sum_up = 0.0
+        self._sum_down = 0.0
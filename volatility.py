@@ -1,5 +1,7 @@
 # indicators/volatility.py
 from .base import Indicator
+from .batch import batch_field, rolling_mean, rolling_std, rolling_sum, shift, true_range
+import warnings
 import pandas as pd
 import numpy as np
 from typing import Dict, Any
@@ -70,6 +72,64 @@ class Volatility:
 
         return volatility_df
 
+    def calculate_batch(self, data) -> Dict[str, np.ndarray]:
+        """
+        calculate() for (bars x symbols) 'open'/'high'/'low'/'close' arrays.
+
+        Returns one 2-D array per enabled measure plus "volatility"; each column
+        is normalized over its own history, as calculate() does per symbol.
+        """
+        close = batch_field(data, "close")
+        volatility_measures = {}
+
+        if self.use_std or self.use_yang_zhang:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = close / shift(close) - 1
+            std_volatility = rolling_std(returns, self.window) * np.sqrt(self.window)
+        if self.use_rogers_satchell or self.use_yang_zhang:
+            high, low, open_ = batch_field(data, "high"), batch_field(data, "low"), batch_field(data, "open")
+            rogers_satchell = np.sqrt((1.0 / self.window) * rolling_sum(
+                np.log(high / open_) * np.log(high / close) + np.log(low / open_) * np.log(low / close), self.window))
+
+        if self.use_std:
+            volatility_measures["std_volatility"] = std_volatility
+        if self.use_atr:
+            tr = true_range(batch_field(data, "high"), batch_field(data, "low"), close)
+            volatility_measures["atr_volatility"] = rolling_mean(tr, self.atr_period)
+        if self.use_bollinger:
+            mean = rolling_mean(close, self.window)
+            std = rolling_std(close, self.window)
+            volatility_measures["bollinger_volatility"] = (mean + std * self.bollinger_std_dev) - (mean - std * self.bollinger_std_dev)
+        if self.use_parkinson:
+            log_hl = np.log(batch_field(data, "high") / batch_field(data, "low"))
+            volatility_measures["parkinson_volatility"] = np.sqrt(
+                (1.0 / (4.0 * self.window * np.log(2.0))) * rolling_sum(log_hl ** 2, self.window))
+        if self.use_garman_klass:
+            log_hl = np.log(batch_field(data, "high") / batch_field(data, "low"))
+            log_co = np.log(close / batch_field(data, "open"))
+            term1 = 0.5 * (log_hl ** 2)
+            term2 = (2 * np.log(2) - 1) * (log_co ** 2)
+            volatility_measures["garman_klass_volatility"] = np.sqrt((1.0 / self.window) * rolling_sum(term1 - term2, self.window))
+        if self.use_rogers_satchell:
+            volatility_measures["rogers_satchell_volatility"] = rogers_satchell
+        if self.use_yang_zhang:
+            k = 0.34 / (1.34 + (self.window + 1) / (self.window - 1))
+            volatility_measures["yang_zhang_volatility"] = np.sqrt(k * (rogers_satchell ** 2) + (1 - k) * (std_volatility ** 2))
+
+        # Same per-column normalization and composite as calculate(); all-NaN columns stay NaN
+        with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for name, values in volatility_measures.items():
+                if self.normalization_method == "minmax":
+                    low_, high_ = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+                    volatility_measures[name] = (values - low_) / (high_ - low_)
+                elif self.normalization_method == "zscore":
+                    volatility_measures[name] = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)
+            volatility_measures["volatility"] = (np.nanmean(np.stack(list(volatility_measures.values())), axis=0)
+                                                 if volatility_measures else np.full(close.shape, np.nan))
+
+        return volatility_measures
+
     def _calculate_std_volatility(self, df: pd.DataFrame) -> pd.Series:
         """Calculates volatility as the standard deviation of returns."""
         if len(df) < self.window:
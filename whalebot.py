@@ -13,6 +13,16 @@ from colorama import init, Fore, Style
 from zoneinfo import ZoneInfo
 from decimal import Decimal, getcontext
 import json
+import queue
+import sys
+import threading
+import websocket
+from klinecache import KlineCache
+from ohlcvstore import get_store
+from livecandles import BAR_CLOSE, PRICE_MOVE, LiveCandles
+from indicator_plan import IndicatorPlan
+from psar import parabolic_sar
+from ratelimit import get_limiter
 
 # Decimal precision
 getcontext().prec = 10
@@ -27,6 +37,7 @@ API_SECRET = os.getenv("BYBIT_API_SECRET")
 if not API_KEY or not API_SECRET:
     raise ValueError("BYBIT_API_KEY and BYBIT_API_SECRET must be set in .env")
 BASE_URL = os.getenv("BYBIT_BASE_URL", "https://api.bybit.com")
+WS_URL = os.getenv("BYBIT_WS_URL", "wss://stream.bybit.com/v5/public/linear")
 
 # Constants
 CONFIG_FILE = "config.json"
@@ -36,6 +47,8 @@ MAX_API_RETRIES = 3
 RETRY_DELAY_SECONDS = 5
 VALID_INTERVALS = ["1", "3", "5", "15", "30", "60", "120", "240", "D", "W", "M"]
 RETRY_ERROR_CODES = [429, 500, 502, 503, 504]
+ANALYSIS_INDICATORS = ("atr", "momentum_ma", "obv", "rsi", "mfi", "cci", "wr", "adx", "adi", "psar", "fve", "macd")
+INDICATOR_PLAN_PARAMS = {"atr_period": 20, "psar_ep_first": True} # Match calculate_atr()/calculate_psar() defaults
 
 # Neon Color Scheme
 NEON_GREEN = Fore.LIGHTGREEN_EX
@@ -60,6 +73,9 @@ def load_config(filepath: str) -> dict:
             "interval": "15",
             "analysis_interval": 30,
             "retry_delay": 5,
+            "live_mode": False, # Stream candles over websocket instead of polling REST
+            "live_price_move_pct": 0.25, # Also analyze mid-bar after this % price move (0 = bar close only)
+            "ws_ping_interval": 20,
             "momentum_period": 10,
             "momentum_ma_short": 12,
             "momentum_ma_long": 26,
@@ -161,9 +177,11 @@ def safe_json_response(response: requests.Response, logger: logging.Logger = Non
 
 
 def bybit_request(method: str, endpoint: str, params: dict = None, logger: logging.Logger = None) -> Union[dict, None]:
-    """Handles Bybit API requests with retry logic."""
+    """Handles Bybit API requests, paced by the shared rate limiter, with retry logic."""
+    limiter = get_limiter()
     for retry in range(MAX_API_RETRIES):
         try:
+            limiter.acquire(endpoint)
             params = params or {}
             timestamp = str(int(datetime.now(TIMEZONE).timestamp() * 1000))
             signature_params = params.copy()  # Create a copy to avoid modifying original
@@ -192,9 +210,16 @@ def bybit_request(method: str, endpoint: str, params: dict = None, logger: loggi
                 request_kwargs['json'] = params # Use json for POST data
 
             response = requests.request(**request_kwargs) # Use kwargs for request
+            json_response = safe_json_response(response, logger) if response.status_code == 200 else None
+            ret_code = json_response.get("retCode") if json_response else None
 
+            if limiter.observe(endpoint, response.headers, response.status_code, ret_code):
+                if logger:
+                    logger.warning(
+                        f"{NEON_YELLOW}Rate limited. Retrying {retry + 1}/{MAX_API_RETRIES} once the limit resets...{RESET}"
+                    )
+                continue # The limiter holds the next attempt until the reset timestamp
             if response.status_code == 200:
-                json_response = safe_json_response(response, logger)
                 if json_response:
                     return json_response
                 else:
@@ -204,7 +229,7 @@ def bybit_request(method: str, endpoint: str, params: dict = None, logger: loggi
             elif response.status_code in RETRY_ERROR_CODES:
                 if logger:
                     logger.warning(
-                        f"{NEON_YELLOW}Rate limited or server error. Retrying {retry + 1}/{MAX_API_RETRIES} after {RETRY_DELAY_SECONDS * (2**retry)} seconds...{RESET}"
+                        f"{NEON_YELLOW}Server error. Retrying {retry + 1}/{MAX_API_RETRIES} after {RETRY_DELAY_SECONDS * (2**retry)} seconds...{RESET}"
                     )
                 time.sleep(RETRY_DELAY_SECONDS * (2**retry)) # Exponential backoff
             else:
@@ -224,11 +249,13 @@ def bybit_request(method: str, endpoint: str, params: dict = None, logger: loggi
     return None
 
 
-def fetch_klines(symbol: str, interval: str, limit: int = 200, logger: logging.Logger = None) -> pd.DataFrame:
+def fetch_klines(symbol: str, interval: str, limit: int = 200, logger: logging.Logger = None, start: int = None) -> pd.DataFrame:
     """Fetches kline data from Bybit and returns it as a Pandas DataFrame."""
     try:
         endpoint = "/v5/market/kline"
         params = {"symbol": symbol, "interval": interval, "limit": limit, "category": "linear"}
+        if start is not None:
+            params["start"] = start
         response = bybit_request("GET", endpoint, params, logger)
         if (
             response
@@ -548,26 +575,34 @@ class TradingAnalyzer:
             self.logger.error(f"{NEON_RED}Missing 'close' column for EMA calculation: {e}{RESET}")
             return pd.Series(dtype="float64") # Return empty series
 
-    def determine_trend_momentum(self) -> dict:
+    def calculate_indicators(self, indicators=ANALYSIS_INDICATORS) -> Dict[str, np.ndarray]:
+        """Calculates a set of indicators in one pass, sharing diffs, true range, typical price and rolling windows."""
+        plan = IndicatorPlan.from_config(self.config, params=INDICATOR_PLAN_PARAMS, indicators=indicators)
+        return plan.evaluate(self.df)
+
+    def determine_trend_momentum(self, series: Dict[str, np.ndarray] = None) -> dict:
         """Determines market trend and momentum strength using momentum MAs and ATR."""
         if self.df.empty or len(self.df) < 26: # Need enough data for MA calculations
             return {"trend": "Insufficient Data", "strength": 0}
 
-        atr = self.calculate_atr() # Average True Range for volatility normalization
-        if atr.iloc[-1] == 0: # Avoid division by zero in trend strength calculation
+        if series is None:
+            series = self.calculate_indicators(("atr", "momentum_ma"))
+        atr = series["atr"][-1] # Average True Range for volatility normalization
+        if atr == 0: # Avoid division by zero in trend strength calculation
             self.logger.warning(f"{NEON_YELLOW}ATR is zero, cannot calculate trend strength.{RESET}")
             return {"trend": "Neutral", "strength": 0}
 
-        self.calculate_momentum_ma() # Calculate momentum MAs first
-        if self.df["momentum_ma_short"].iloc[-1] > self.df["momentum_ma_long"].iloc[-1]:
+        ma_short = series["momentum_ma_short"][-1]
+        ma_long = series["momentum_ma_long"][-1]
+        if ma_short > ma_long:
             trend = "Uptrend" # Short-term momentum MA above long-term suggests uptrend
-        elif self.df["momentum_ma_short"].iloc[-1] < self.df["momentum_ma_long"].iloc[-1]:
+        elif ma_short < ma_long:
             trend = "Downtrend" # Short-term momentum MA below long-term suggests downtrend
         else:
             trend = "Neutral" # MAs close or equal, trend is neutral
 
         # Trend strength as normalized difference between momentum MAs by volatility (ATR)
-        trend_strength = abs(self.df["momentum_ma_short"].iloc[-1] - self.df["momentum_ma_long"].iloc[-1]) / atr.iloc[-1]
+        trend_strength = abs(ma_short - ma_long) / atr
         return {"trend": trend, "strength": trend_strength}
 
 
@@ -636,37 +671,8 @@ class TradingAnalyzer:
 
     def calculate_psar(self, acceleration=0.02, max_acceleration=0.2) -> pd.Series:
         """Calculates Parabolic SAR (PSAR) - trend following indicator."""
-        psar = pd.Series(index=self.df.index, dtype="float64") # Initialize PSAR series
-        psar.iloc[0] = self.df["low"].iloc[0]  # Initialize first PSAR point to first low
-
-        trend = 1      # Initial trend is uptrend (1), downtrend (-1)
-        ep = self.df["high"].iloc[0] # Extreme point, highest high in uptrend, lowest low downtrend
-        af = acceleration  # Acceleration factor, increases with each new EP
-
-        for i in range(1, len(self.df)):
-            if trend == 1: # Uptrend
-                psar.iloc[i] = psar.iloc[i-1] + af * (ep - psar.iloc[i-1]) # PSAR calculation
-                if self.df["high"].iloc[i] > ep: # If new high is higher than EP, extend EP
-                    ep = self.df["high"].iloc[i]
-                    af = min(af + acceleration, max_acceleration) # Increase AF, but limit to max_acceleration
-                if self.df["low"].iloc[i] < psar.iloc[i]: # Trend reversal condition
-                    trend = -1 # Switch to downtrend
-                    psar.iloc[i] = ep # New PSAR is previous EP
-                    ep = self.df["low"].iloc[i] # New EP is current low
-                    af = acceleration # Reset AF
-
-            elif trend == -1: # Downtrend
-                psar.iloc[i] = psar.iloc[i-1] + af * (ep - psar.iloc[i-1])
-                if self.df["low"].iloc[i] < ep: # If new low is lower than EP, extend EP
-                    ep = self.df["low"].iloc[i]
-                    af = min(af + acceleration, max_acceleration)
-                if self.df["high"].iloc[i] > psar.iloc[i]: # Trend reversal condition
-                    trend = 1 # Switch to uptrend
-                    psar.iloc[i] = ep # New PSAR is previous EP
-                    ep = self.df["high"].iloc[i] # New EP is current high
-                    af = acceleration # Reset AF
-
-        return psar
+        psar = parabolic_sar(self.df["high"], self.df["low"], acceleration, max_acceleration, ep_first=True) # EP is extended before the reversal check
+        return pd.Series(psar, index=self.df.index)
 
 
     def calculate_fve(self) -> pd.Series:
@@ -689,40 +695,29 @@ class TradingAnalyzer:
         self.calculate_pivot_points(high, low, close)
         nearest_supports, nearest_resistances = self.find_nearest_levels(float(current_price))
 
-        trend_data = self.determine_trend_momentum()
+        # --- Indicator calculations (one pass over the frame) ---
+        series = self.calculate_indicators()
+        trend_data = self.determine_trend_momentum(series)
         trend = trend_data.get("trend", "Unknown")
         strength = trend_data.get("strength", 0)
-        atr = self.calculate_atr()
-
-
-        # --- Indicator calculations ---
-        obv = self.calculate_obv()
-        rsi = self.calculate_rsi()
-        mfi = self.calculate_mfi()
-        cci = self.calculate_cci()
-        wr = self.calculate_williams_r()
-        adx = self.calculate_adx()
-        adi = self.calculate_adi()
-        sma = self.calculate_sma(10)
-        psar = self.calculate_psar()
-        fve = self.calculate_fve()
-        macd_df = self.calculate_macd()
+        atr = series["atr"]
+        macd = np.column_stack((series["macd"], series["macd_signal"], series["macd_histogram"]))
 
 
         # --- Prepare indicator values for output ---
         indicator_values = {
-            "obv": obv.tail(3).tolist(),
-            "rsi": rsi.tail(3).tolist(),
-            "mfi": mfi.tail(3).tolist(),
-            "cci": cci.tail(3).tolist(),
-            "wr": wr.tail(3).tolist(),
-            "adx": [adx] * 3, # ADX is single value, repeat for consistent processing in output
-            "adi": adi.tail(3).tolist(),
+            "obv": series["obv"][-3:].tolist(),
+            "rsi": series["rsi"][-3:].tolist(),
+            "mfi": series["mfi"][-3:].tolist(),
+            "cci": series["cci"][-3:].tolist(),
+            "wr": series["wr"][-3:].tolist(),
+            "adx": [series["adx"][-1]] * 3, # ADX is single value, repeat for consistent processing in output
+            "adi": series["adi"][-3:].tolist(),
             "mom": [trend_data] * 3, # Trend data (trend string and strength)
             "sma": [self.df["close"].iloc[-1]], # Special handling for SMA—just last value
-            "psar": psar.tail(3).tolist(),
-            "fve": fve.tail(3).tolist(),
-            "macd": macd_df.tail(3).values.tolist() if not macd_df.empty else [], # Handle empty MACD DataFrame
+            "psar": series["psar"][-3:].tolist(),
+            "fve": series["fve"][-3:].tolist(),
+            "macd": macd[-3:].tolist(), # Rows of [macd, signal, histogram]
         }
 
         # --- Construct output string ---
@@ -734,7 +729,7 @@ class TradingAnalyzer:
 {NEON_BLUE}Price:{RESET}   {self.df['close'].iloc[-3]:.2f} | {self.df['close'].iloc[-2]:.2f} | {self.df['close'].iloc[-1]:.2f}
 {NEON_BLUE}Vol:{RESET}   {self.df['volume'].iloc[-3]:,} | {self.df['volume'].iloc[-2]:,} | {self.df['volume'].iloc[-1]:,}
 {NEON_BLUE}Current Price:{RESET} {current_price:.2f}
-{NEON_BLUE}ATR:{RESET} {atr.iloc[-1]:.4f}
+{NEON_BLUE}ATR:{RESET} {atr[-1]:.4f}
 {NEON_BLUE}Trend:{RESET} {trend} (Strength: {strength:.2f})
 
 """
@@ -849,8 +844,12 @@ def main():
         print(f"{NEON_RED}Invalid interval: {interval}{RESET}")
 
     logger = setup_logger(symbol) # Set up logging for this symbol
+    if CONFIG.get("live_mode", False) or "--live" in sys.argv[1:]:
+        run_live(symbol, interval, logger)
+        return
     analysis_interval = CONFIG["analysis_interval"] # Get analysis interval from config
     retry_delay = CONFIG["retry_delay"] # Get retry delay from config
+    kline_cache = KlineCache(fetch_klines, store=get_store()) # Keeps candles between cycles (and runs), fetching only new bars
 
 
     while True: # Main analysis loop - runs continuously
@@ -862,7 +861,7 @@ def main():
                 time.sleep(retry_delay)
                 continue # Retry price fetch
 
-            df = fetch_klines(symbol, interval, logger=logger) # Fetch kline data (OHLCV)
+            df = kline_cache.get(symbol, interval, logger) # Fetch new kline data (OHLCV) onto the cached window
             if df.empty: # Handle kline data fetch failure
                 logger.error(f"{NEON_RED}Failed to fetch kline data. Retrying in {retry_delay} seconds...{RESET}")
                 time.sleep(retry_delay)
@@ -885,5 +884,94 @@ def main():
             time.sleep(retry_delay) # Wait and retry
 
 
+def run_live(symbol: str, interval: str, logger: logging.Logger):
+    """Streams kline/tickers over websocket and analyzes on bar close or on a large enough price move."""
+    retry_delay = CONFIG["retry_delay"]
+    ping_interval = CONFIG.get("ws_ping_interval", 20)
+    kline_cache = KlineCache(fetch_klines, store=get_store())
+    df = pd.DataFrame()
+    while df.empty: # Seed the candle window once over REST
+        df = kline_cache.get(symbol, interval, logger)
+        if df.empty:
+            logger.error(f"{NEON_RED}Failed to fetch kline data. Retrying in {retry_delay} seconds...{RESET}")
+            time.sleep(retry_delay)
+
+    candles = LiveCandles(df, symbol, interval, CONFIG.get("live_price_move_pct", 0.25))
+    triggers = queue.Queue()
+    stop = threading.Event()
+
+    connections = 0
+
+    def on_open(ws):
+        nonlocal connections
+        connections += 1
+        if connections > 1: # Fill bars missed while disconnected
+            gap_fill = kline_cache.get(symbol, interval, logger)
+            if not gap_fill.empty:
+                candles.reseed(gap_fill)
+        logger.info(f"{NEON_GREEN}Live stream connected: {', '.join(candles.topics)}{RESET}")
+        ws.send(json.dumps({"op": "subscribe", "args": candles.topics}))
+
+    def on_message(ws, raw):
+        message = json.loads(raw)
+        if message.get("op") in ("subscribe", "pong") or message.get("ret_msg") == "pong":
+            if message.get("success") is False:
+                logger.error(f"{NEON_RED}Subscription failed: {message}{RESET}")
+            return
+        reason = candles.on_message(message)
+        if reason:
+            triggers.put(reason)
+
+    ws_app = websocket.WebSocketApp(
+        WS_URL,
+        on_open=on_open,
+        on_message=on_message,
+        on_error=lambda ws, e: logger.error(f"{NEON_RED}WebSocket error: {e}{RESET}"),
+        on_close=lambda ws, code, msg: logger.warning(f"{NEON_YELLOW}WebSocket closed ({code}): {msg}{RESET}"),
+    )
+
+    def stream():
+        while not stop.is_set(): # Reconnect until the user stops the bot
+            ws_app.run_forever()
+            if not stop.is_set():
+                logger.warning(f"{NEON_YELLOW}Live stream dropped. Reconnecting in {retry_delay} seconds...{RESET}")
+                time.sleep(retry_delay)
+
+    def heartbeat():
+        # Own timer, so pings keep going however busy the trigger queue is; Bybit drops idle connections
+        while not stop.wait(ping_interval):
+            if ws_app.sock and ws_app.sock.connected:
+                try:
+                    ws_app.send(json.dumps({"op": "ping"}))
+                except websocket.WebSocketException as e:
+                    logger.warning(f"{NEON_YELLOW}Ping failed: {e}{RESET}")
+
+    threading.Thread(target=stream, daemon=True).start()
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        while True:
+            try:
+                reason = triggers.get(timeout=1.0) # Wake up regularly so Ctrl+C is noticed
+            except queue.Empty:
+                continue
+            pending = {reason}
+            while not triggers.empty(): # Coalesce a burst of triggers into one analysis
+                pending.add(triggers.get_nowait())
+            reason = BAR_CLOSE if BAR_CLOSE in pending else PRICE_MOVE
+            try:
+                price = candles.last_price
+                candles.mark_analyzed(price)
+                logger.info(f"Live analysis triggered by {reason.replace('_', ' ')} at {price}")
+                analyzer = TradingAnalyzer(candles.frame(), logger, CONFIG, symbol, interval)
+                analyzer.analyze(Decimal(str(price)), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            except Exception as e:
+                logger.exception(f"{NEON_RED}Live analysis failed: {e}{RESET}")
+    except KeyboardInterrupt:
+        logger.info(f"{NEON_YELLOW}Analysis stopped by user.{RESET}")
+    finally:
+        stop.set()
+        ws_app.close()
+
+
 if __name__ == "__main__":
     main() # Execute main function when script is run
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Pluggable JSON decoding for Bybit websocket frames, with book levels as float64 arrays."""
+import json
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+if msgspec is not None:
+    BACKEND = "msgspec"
+    loads = msgspec.json.decode
+elif orjson is not None:
+    BACKEND = "orjson"
+    loads = orjson.loads
+else:
+    BACKEND = "json"
+    loads = json.loads
+
+_EMPTY_LEVELS = np.empty((0, 2), dtype=np.float64)
+
+
+def levels_array(pairs):
+    """Converts Bybit ``[[price, size], ...]`` pairs (strings or floats) to an (n, 2) float64 array."""
+    if not len(pairs):
+        return _EMPTY_LEVELS
+    return np.array(pairs, dtype=np.float64)
+
+
+if msgspec is not None:
+    class _BookData(msgspec.Struct):
+        s: str = ""
+        b: List[Tuple[float, float]] = []
+        a: List[Tuple[float, float]] = []
+        u: int = 0
+        seq: int = 0
+
+    class _BookMessage(msgspec.Struct):
+        topic: str
+        type: str
+        data: _BookData
+        ts: int = 0
+        cts: int = 0
+
+    # strict=False lets msgspec parse Bybit's quoted numbers straight into floats
+    _book_decoder = msgspec.json.Decoder(_BookMessage, strict=False)
+
+    def _decode_book(raw, arrays):
+        msg = _book_decoder.decode(raw)
+        data = msg.data
+        bids, asks = (levels_array(data.b), levels_array(data.a)) if arrays else (data.b, data.a)
+        return {
+            "topic": msg.topic,
+            "type": msg.type,
+            "ts": msg.ts,
+            "cts": msg.cts,
+            "data": {"s": data.s, "b": bids, "a": asks, "u": data.u, "seq": data.seq},
+        }
+else:
+    def _decode_book(raw, arrays):
+        msg = loads(raw)
+        if arrays:
+            data = msg["data"]
+            data["b"] = levels_array(data.get("b", ()))
+            data["a"] = levels_array(data.get("a", ()))
+        return msg
+
+
+def decode_message(raw, arrays=False):
+    """Decodes one websocket frame (str or bytes) with the fastest available backend.
+
+    Frames come back shaped exactly as ``json.loads`` would return them, except
+    for the book levels of ``orderbook.*`` pushes: with `arrays` they are (n, 2)
+    float64 arrays of [price, size]; otherwise they stay [price, size] pairs,
+    already parsed to floats when msgspec is installed.  Pairs are the cheaper
+    form for level-by-level consumers such as BookSide.apply, since building a
+    NumPy array costs more than a small delta's worth of set_level calls.
+    """
+    head = raw[:24]
+    if (b'"orderbook.' in head) if isinstance(head, bytes) else ('"orderbook.' in head):
+        return _decode_book(raw, arrays)
+    return loads(raw)
+
+
+def _synthetic_stream(messages=20_000, depth=50, seed=11):
+    """orderbook.50 frames shaped like Bybit's: one snapshot followed by small deltas."""
+    rng = np.random.default_rng(seed)
+    mid = 60_000.0
+
+    def side(prices):
+        return [[f"{p:.1f}", f"{rng.uniform(0.001, 5):.3f}"] for p in prices]
+
+    frames = []
+    snapshot = {"s": "BTCUSDT", "b": side(mid - 0.1 * np.arange(1, depth + 1)),
+                "a": side(mid + 0.1 * np.arange(1, depth + 1)), "u": 1, "seq": 1}
+    frames.append(json.dumps({"topic": f"orderbook.{depth}.BTCUSDT", "type": "snapshot", "ts": 0, "data": snapshot, "cts": 0}))
+    for i in range(1, messages):
+        n_bid, n_ask = rng.integers(0, 6, size=2)
+        data = {"s": "BTCUSDT",
+                "b": [[f"{mid - 0.1 * k:.1f}", "0" if rng.random() < 0.2 else f"{rng.uniform(0.001, 5):.3f}"]
+                      for k in rng.integers(1, depth + 1, size=n_bid)],
+                "a": [[f"{mid + 0.1 * k:.1f}", "0" if rng.random() < 0.2 else f"{rng.uniform(0.001, 5):.3f}"]
+                      for k in rng.integers(1, depth + 1, size=n_ask)],
+                "u": i + 1, "seq": i + 1}
+        frames.append(json.dumps({"topic": f"orderbook.{depth}.BTCUSDT", "type": "delta", "ts": i, "data": data, "cts": i}))
+    return frames
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from orderbook import BookSide
+
+    if len(sys.argv) > 1:
+        from wsrecord import read_frames
+
+        frames = [raw for _, raw in read_frames(sys.argv[1]) if '"orderbook.' in raw[:24]]
+        source = sys.argv[1]
+    else:
+        frames = _synthetic_stream()
+        source = "synthetic orderbook.50 stream"
+
+    def replay(decode, frames):
+        bids, asks = BookSide(descending=True, depth=5), BookSide(depth=5)
+        started = time.perf_counter()
+        for frame in frames:
+            data = decode(frame)["data"]
+            bids.apply(data["b"])
+            asks.apply(data["a"])
+        return time.perf_counter() - started, bids.items(), asks.items()
+
+    print(f"Replaying {len(frames)} frames from {source} (backend: {BACKEND})")
+    baseline_s, bids, asks = replay(json.loads, frames)
+    encoded = [f.encode() for f in frames]
+    for label, decode, batch in (
+        ("pairs, str frames", decode_message, frames),
+        ("pairs, bytes frames", decode_message, encoded),
+        ("arrays, bytes frames", lambda raw: decode_message(raw, arrays=True), encoded),
+    ):
+        elapsed, fast_bids, fast_asks = replay(decode, batch)
+        assert fast_bids == bids and fast_asks == asks, "decoded book diverged from the json.loads path"
+        print(f"  decode_message ({label:20}) : {len(frames) / elapsed:10,.0f} msg/s  ({baseline_s / elapsed:4.2f}x)")
+    print(f"  json.loads + float()                  : {len(frames) / baseline_s:10,.0f} msg/s")
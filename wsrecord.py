@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""Record raw websocket frames to disk and replay them offline."""
+import gzip
+import hashlib
+import os
+import time
+
+from orderbook import APPLY_SNAPSHOT, GAP, SKIP, BookSide, SequenceTracker
+
+RECORD_ENV = "BYBIT_WS_RECORD"
+
+
+class FrameRecorder:
+    """Appends raw frames to a gzip file, one ``<receive time ns>\\t<frame>`` line each.
+
+    The file is opened in append mode, so restarting a bot adds a new gzip
+    member to the same recording.  Data is sync-flushed every `flush_every`
+    frames, which keeps everything up to the last flush readable if the
+    process dies mid-write.
+    """
+
+    def __init__(self, path, flush_every=100):
+        self.path = path
+        self.flush_every = flush_every
+        self.frames = 0
+        self._file = gzip.open(path, "at", encoding="utf-8")
+
+    @classmethod
+    def from_env(cls):
+        """Returns a recorder for the path in $BYBIT_WS_RECORD, or None when it is unset."""
+        path = os.getenv(RECORD_ENV)
+        return cls(path) if path else None
+
+    def write(self, raw, received_ns=None):
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        self._file.write(f"{received_ns or time.time_ns()}\t{raw}\n")
+        self.frames += 1
+        if self.frames % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_frames(path):
+    """Yields (received_ns, raw frame) pairs; a recording cut off mid-write ends at the last whole line."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                stamp, sep, raw = line.rstrip("\n").partition("\t")
+                if sep and stamp.isdigit():
+                    yield int(stamp), raw
+        except (EOFError, gzip.BadGzipFile):
+            return
+
+
+def replay(path, on_frame, speed=None):
+    """Feeds every recorded frame to `on_frame(raw)` and returns (frames, seconds).
+
+    With `speed=None` frames are replayed back to back; otherwise the recorded
+    gaps are reproduced, divided by `speed` (1.0 is real time).
+    """
+    count = 0
+    first_ns = None
+    started = time.perf_counter()
+    for received_ns, raw in read_frames(path):
+        if speed:
+            if first_ns is None:
+                first_ns = received_ns
+            due = (received_ns - first_ns) / 1e9 / speed
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        on_frame(raw)
+        count += 1
+    return count, time.perf_counter() - started
+
+
+async def replay_async(path, on_frame, speed=None):
+    """replay() for coroutine consumers such as BybitStream.feed."""
+    import asyncio
+
+    count = 0
+    first_ns = None
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for received_ns, raw in read_frames(path):
+        if speed:
+            if first_ns is None:
+                first_ns = received_ns
+            delay = (received_ns - first_ns) / 1e9 / speed - (loop.time() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await on_frame(raw)
+        count += 1
+    return count, loop.time() - started
+
+
+class SignalDigest:
+    """Reference book/signal pipeline for offline throughput and determinism checks.
+
+    Mirrors the order-book bots: sequence-checked BookSides, top-`levels`
+    imbalance and the LONG/SHORT thresholds, plus the streaming CMI over
+    public trades, all kept per symbol so multi-symbol recordings replay each
+    book on its own.  Deltas after a gap are skipped until the next snapshot.
+    Every signal is hashed together with its symbol and the index of the
+    frame that produced it, so two runs (or two versions of the code) agree
+    only if they emit the same signals on the same frames.
+    """
+
+    def __init__(self, levels=5, long_threshold=1.6, short_threshold=0.6, cmi_period=20):
+        from tradetape import StreamingCMI
+        from wsdecode import decode_message
+
+        self.decode = decode_message
+        self.levels = levels
+        self.long_threshold = long_threshold
+        self.short_threshold = short_threshold
+        self._new_cmi = lambda: StreamingCMI(cmi_period)
+        self.books = {}  # symbol -> (bids, asks, SequenceTracker)
+        self.cmis = {}  # symbol -> StreamingCMI
+        self.frames = 0
+        self.signals = 0
+        self._hash = hashlib.sha256()
+
+    def on_frame(self, raw):
+        msg = self.decode(raw)
+        self.frames += 1
+        topic = msg.get("topic", "")
+        symbol = topic.rpartition(".")[2]
+        if topic.startswith("orderbook."):
+            data = msg["data"]
+            book = self.books.get(symbol)
+            if book is None:
+                book = self.books[symbol] = (BookSide(descending=True, depth=self.levels),
+                                             BookSide(depth=self.levels), SequenceTracker())
+            bids, asks, sequence = book
+            action = sequence.check(msg.get("type"), data)
+            if action in (SKIP, GAP):
+                return
+            if action == APPLY_SNAPSHOT:
+                bids.clear()
+                asks.clear()
+            bids.apply(data.get("b", ()))
+            asks.apply(data.get("a", ()))
+            bid_sum = bids.top_sum(self.levels)
+            ask_sum = asks.top_sum(self.levels)
+            imbalance = bid_sum / ask_sum if ask_sum > 0 else (float("inf") if bid_sum > 0 else 0.0)
+            signal = "LONG" if imbalance > self.long_threshold else "SHORT" if imbalance < self.short_threshold else None
+            if signal:
+                self.signals += 1
+                self._hash.update(f"{self.frames}:{symbol}:{signal}:{imbalance!r}\n".encode())
+        elif topic.startswith("publicTrade."):
+            cmi = self.cmis.get(symbol)
+            if cmi is None:
+                cmi = self.cmis[symbol] = self._new_cmi()
+            for trade in msg["data"]:
+                cmi.update(float(trade["p"]))
+            self._hash.update(f"{self.frames}:{symbol}:cmi:{cmi.value!r}\n".encode())
+
+    @property
+    def digest(self):
+        return self._hash.hexdigest()
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Record or replay Bybit websocket frames.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="record live orderbook/trade frames")
+    record.add_argument("path")
+    record.add_argument("symbols", nargs="+")
+    record.add_argument("--depth", type=int, default=50)
+    record.add_argument("--seconds", type=float, default=60.0)
+    record.add_argument("--url", default="wss://stream.bybit.com/v5/public/linear")
+    play = commands.add_parser("replay", help="replay a recording through the reference signal pipeline")
+    play.add_argument("path")
+    play.add_argument("--speed", type=float, default=None, help="1.0 = recorded speed (default: as fast as possible)")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        from bybitws import BybitStream
+
+        async def capture():
+            with FrameRecorder(args.path) as recorder:
+                stream = BybitStream(args.url, recorder=recorder)
+                for symbol in args.symbols:
+                    stream.subscribe(symbol, [f"orderbook.{args.depth}.{symbol}", f"publicTrade.{symbol}"], lambda msg: None)
+
+                async def stop_later():
+                    await asyncio.sleep(args.seconds)
+                    await stream.close()
+
+                await stream.run(stop_later())
+                print(f"Recorded {recorder.frames} frames to {args.path}")
+
+        asyncio.run(capture())
+    else:
+        pipeline = SignalDigest()
+        frames, elapsed = replay(args.path, pipeline.on_frame, args.speed)
+        print(f"Replayed {frames} frames in {elapsed:.3f}s ({frames / elapsed:,.0f} msg/s)")
+        print(f"{pipeline.signals} signals, digest {pipeline.digest}")